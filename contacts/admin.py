@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import Contact, ContactStatusChoices
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .export import export_contacts
+from .models import Contact, ContactStatusChoices, GeocodedCity, ImportJob
+from .statuses import status_registry
 
 
 @admin.register(ContactStatusChoices)
@@ -10,10 +15,11 @@ class ContactStatusChoicesAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
     fields = ['name', 'description']
     readonly_fields = ['created_at']
+    list_select_related = ['contact_count']
 
     def get_contact_count(self, obj):
         """Display number of contacts with this status."""
-        return obj.contacts.count()
+        return obj.get_contact_count()
     get_contact_count.short_description = 'Liczba kontaktów'
 
 
@@ -28,7 +34,8 @@ class ContactAdmin(admin.ModelAdmin):
         'email',
         'city',
         'status',
-        'date_added'
+        'date_added',
+        'updated_at'
     ]
     search_fields = ['first_name', 'last_name', 'email', 'phone_number', 'city']
     list_filter = ['status', 'city', 'date_added']
@@ -49,25 +56,52 @@ class ContactAdmin(admin.ModelAdmin):
         }),
     )
 
-    readonly_fields = ['date_added']
-    actions = ['mark_as_new', 'mark_as_inactive']
+    readonly_fields = ['date_added', 'updated_at']
+    actions = ['mark_as_new', 'mark_as_inactive', 'export_csv']
 
     @admin.action(description='Oznacz jako nowy')
     def mark_as_new(self, request, queryset):
         """Bulk action to mark selected contacts as 'new'."""
-        try:
-            new_status = ContactStatusChoices.objects.get(name='nowy')
-            updated = queryset.update(status=new_status)
-            self.message_user(request, f'Zaktualizowano {updated} kontakt(ów).')
-        except ContactStatusChoices.DoesNotExist:
+        new_status = status_registry.get_by_name('nowy')
+        if new_status is None:
             self.message_user(request, 'Status "nowy" nie istnieje.', level='ERROR')
+            return
+        updated = queryset.update(status=new_status, updated_at=timezone.now())
+        self.message_user(request, f'Zaktualizowano {updated} kontakt(ów).')
 
     @admin.action(description='Oznacz jako nieaktualny')
     def mark_as_inactive(self, request, queryset):
         """Bulk action to mark selected contacts as 'inactive'."""
-        try:
-            inactive_status = ContactStatusChoices.objects.get(name='nieaktualny')
-            updated = queryset.update(status=inactive_status)
-            self.message_user(request, f'Zaktualizowano {updated} kontakt(ów).')
-        except ContactStatusChoices.DoesNotExist:
+        inactive_status = status_registry.get_by_name('nieaktualny')
+        if inactive_status is None:
             self.message_user(request, 'Status "nieaktualny" nie istnieje.', level='ERROR')
+            return
+        updated = queryset.update(status=inactive_status, updated_at=timezone.now())
+        self.message_user(request, f'Zaktualizowano {updated} kontakt(ów).')
+
+    @admin.action(description='Eksportuj do CSV')
+    def export_csv(self, request, queryset):
+        """Stream selected contacts as a CSV file accepted by the importer."""
+        response = StreamingHttpResponse(export_contacts(queryset, 'csv'), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="kontakty.csv"'
+        return response
+
+
+@admin.register(GeocodedCity)
+class GeocodedCityAdmin(admin.ModelAdmin):
+    """Admin configuration for stored geocoding results."""
+
+    list_display = ['name', 'latitude', 'longitude', 'found', 'updated_at']
+    list_filter = ['found']
+    search_fields = ['name']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """Admin configuration for background CSV imports."""
+
+    list_display = ['file_name', 'status', 'rows_processed', 'created_count', 'skipped_count', 'created_at']
+    list_filter = ['status']
+    search_fields = ['file_name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
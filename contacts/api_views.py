@@ -1,95 +1,74 @@
-import requests
-from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework import generics, status
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Q
-from django.core.cache import cache
-
-from .models import Contact
-from .serializers import ContactSerializer, ContactListSerializer
-
-
-# Weather API configuration
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
-REQUEST_TIMEOUT = 15
-
-# Weather code descriptions (Polish)
-WEATHER_CODES = {
-    0: "Bezchmurnie", 1: "Głównie bezchmurnie", 2: "Częściowe zachmurzenie",
-    3: "Pochmurno", 45: "Mgła", 48: "Szadź", 51: "Lekka mżawka",
-    53: "Umiarkowana mżawka", 55: "Gęsta mżawka", 61: "Lekki deszcz",
-    63: "Umiarkowany deszcz", 65: "Silny deszcz", 71: "Lekki śnieg",
-    73: "Umiarkowany śnieg", 75: "Silny śnieg", 80: "Przelotne opady",
-    81: "Umiarkowane przelotne opady", 82: "Silne przelotne opady",
-    95: "Burza", 96: "Burza z gradem", 99: "Silna burza z gradem"
-}
-
-# Fallback coordinates for Polish cities (used when Nominatim is unreachable)
-POLISH_CITIES_COORDS = {
-    'warszawa': (52.2297, 21.0122),
-    'kraków': (50.0647, 19.9450),
-    'krakow': (50.0647, 19.9450),
-    'wrocław': (51.1079, 17.0385),
-    'wroclaw': (51.1079, 17.0385),
-    'poznań': (52.4064, 16.9252),
-    'poznan': (52.4064, 16.9252),
-    'gdańsk': (54.3520, 18.6466),
-    'gdansk': (54.3520, 18.6466),
-    'łódź': (51.7592, 19.4560),
-    'lodz': (51.7592, 19.4560),
-    'szczecin': (53.4285, 14.5528),
-    'lublin': (51.2465, 22.5684),
-    'katowice': (50.2649, 19.0238),
-    'bydgoszcz': (53.1235, 18.0084),
-    'białystok': (53.1325, 23.1688),
-    'bialystok': (53.1325, 23.1688),
-}
-
-
-class ContactListCreateAPIView(generics.ListCreateAPIView):
+from django.db import connection, transaction
+from django.conf import settings
+
+from .bulk import MATCH_FIELDS, bulk_create_contacts, bulk_delete_contacts, bulk_update_contacts
+from .changes import ExpiredCursor, change_feed_available, get_changes
+from .conditional import ConditionalGetMixin, contact_version, contacts_version
+from .fieldsets import CONTACT_FIELDS, CONTACT_LIST_FIELDS, contact_columns, parse_fieldset
+from .filters import DEFAULT_SORT, RELEVANCE, filter_contacts, get_sort
+from .jobs import check_import_queue
+from .models import Contact, ImportJob
+from .pagination import ContactPagination, InvalidCursor
+from .renderers import FastJSONRenderer
+from .serializers import ContactSerializer, ContactListSerializer, ImportJobSerializer, serialize_contact_rows
+from .resilience import get_resilience_stats
+from .response_cache import ResponseCacheMixin, contact_list_cache
+from .weather import (
+    describe_weather_error, get_cached_weather, get_weather, normalize_city, weather_flight
+)
+
+
+class ContactListCreateAPIView(ConditionalGetMixin, ResponseCacheMixin, generics.ListCreateAPIView):
     """API endpoint for listing and creating contacts."""
 
     queryset = Contact.objects.all()
     serializer_class = ContactListSerializer
+    pagination_class = ContactPagination
+    # List data has no floats, which orjson would format differently
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        # Search filter
-        search = self.request.query_params.get('q', '').strip()
-        if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(city__icontains=search)
-            )
-
-        # Status filter
-        status_id = self.request.query_params.get('status', '')
-        if status_id:
-            queryset = queryset.filter(status_id=status_id)
-
-        # Sorting
-        sort_by = self.request.query_params.get('sort', 'date_added')
-        sort_order = self.request.query_params.get('order', 'desc')
+    # The list view also sorts by city; the API keeps its original sort fields
+    sort_fields = ('date_added', 'last_name', 'first_name')
 
-        valid_fields = ['last_name', 'date_added', 'first_name']
-        if sort_by not in valid_fields:
-            sort_by = 'date_added'
+    def get_queryset(self):
+        return filter_contacts(super().get_queryset(), self.request.query_params, self.sort_fields)
 
-        order_prefix = '-' if sort_order == 'desc' else ''
-        queryset = queryset.order_by(f'{order_prefix}{sort_by}')
+    version_key = 'api-list'
 
-        return queryset
+    def get_version(self):
+        return contacts_version()
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ContactSerializer
         return ContactListSerializer
 
+    def list(self, request, *args, **kwargs):
+        """List contacts, loading only the columns of the ``?fields=`` / ``?expand=`` fieldset.
+
+        Rows come from a ``values()`` projection instead of model instances
+        unless ``CONTACT_API_FAST_LIST`` is off.
+        """
+        fields, expand = parse_fieldset(request.query_params, CONTACT_LIST_FIELDS)
+        sort_by, _ = get_sort(request.query_params, self.sort_fields)
+        # Keyset cursors read the sort column; search results are walked by date
+        columns = contact_columns(fields, DEFAULT_SORT if sort_by == RELEVANCE else sort_by)
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if not settings.CONTACT_API_FAST_LIST:
+            page = self.paginate_queryset(queryset.only(*columns))
+            serializer = self.get_serializer(page, many=True, fields=fields, expand=expand)
+            return self.get_paginated_response(serializer.data)
+
+        page = self.paginate_queryset(queryset.values(*columns))
+        return self.get_paginated_response(serialize_contact_rows(page, fields, expand))
+
     def create(self, request, *args, **kwargs):
         serializer = ContactSerializer(data=request.data)
         if serializer.is_valid():
@@ -104,12 +83,24 @@ class ContactListCreateAPIView(generics.ListCreateAPIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ContactDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ContactDetailAPIView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """API endpoint for retrieving, updating, and deleting a single contact."""
 
     queryset = Contact.objects.all()
     serializer_class = ContactSerializer
 
+    version_key = 'api-detail'
+
+    def get_version(self):
+        return contact_version(self.kwargs['pk'])
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the contact, loading only the columns of the ``?fields=`` / ``?expand=`` fieldset."""
+        fields, expand = parse_fieldset(request.query_params, CONTACT_FIELDS)
+        self.queryset = self.queryset.only(*contact_columns(fields))
+        instance = self.get_object()
+        return Response(self.get_serializer(instance, fields=fields, expand=expand).data)
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -135,6 +126,93 @@ class ContactDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class ContactBulkAPIView(APIView):
+    """API endpoint creating, updating or deleting many contacts in one request.
+
+    The body is a JSON list: contacts to create (POST), partial updates
+    (PATCH) or contacts to delete (DELETE). Updates and deletes find contacts
+    by ``?match=id|email|phone_number``; update items carry that field, delete
+    items are its values. Each request runs in one transaction and reports a
+    result per item, so invalid items do not stop the valid ones.
+    """
+
+    def post(self, request):
+        return self.run(request, bulk_create_contacts)
+
+    def patch(self, request):
+        return self.run(request, bulk_update_contacts, match=True)
+
+    def delete(self, request):
+        return self.run(request, bulk_delete_contacts, match=True)
+
+    def run(self, request, operation, match=False):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'message': 'Oczekiwano listy elementów'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.CONTACT_BULK_MAX_ITEMS:
+            return Response(
+                {'message': f'Maksymalnie {settings.CONTACT_BULK_MAX_ITEMS} elementów w jednym zapytaniu'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        kwargs = {}
+        if match:
+            kwargs['match'] = request.query_params.get('match', 'id')
+            if kwargs['match'] not in MATCH_FIELDS:
+                return Response(
+                    {'message': f'Parametr match musi być jednym z: {", ".join(MATCH_FIELDS)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        with transaction.atomic():
+            results = operation(items, **kwargs)
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        return Response({'summary': summary, 'results': results})
+
+
+class ContactChangesAPIView(APIView):
+    """API endpoint listing contact changes since a cursor, in commit order.
+
+    Without ``since`` it starts from the beginning: every contact as an
+    upsert, plus recent deletions. Clients store ``next`` and pass it as
+    ``since`` on their next sync; ``has_more`` means another page is ready.
+    """
+
+    def get(self, request):
+        if not change_feed_available():
+            return Response(
+                {'message': 'Dziennik zmian nie jest dostępny dla tej bazy danych'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', settings.CONTACT_CHANGES_PAGE_SIZE)),
+                        settings.CONTACT_CHANGES_PAGE_SIZE)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'message': 'Nieprawidłowy limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            changes, next_cursor, has_more = get_changes(request.query_params.get('since'), limit)
+        except ExpiredCursor:
+            return Response(
+                {'message': 'Kursor wygasł, pobierz wszystkie kontakty od nowa (bez parametru since)'},
+                status=status.HTTP_410_GONE
+            )
+        except InvalidCursor:
+            return Response({'message': 'Nieprawidłowy kursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = []
+        for entry, contact in changes:
+            change = {'type': 'delete' if contact is None else 'upsert', 'id': entry.contact_id,
+                      'changed_at': entry.changed_at}
+            if contact is not None:
+                change['contact'] = ContactSerializer(contact).data
+            results.append(change)
+        return Response({'changes': results, 'next': next_cursor, 'has_more': has_more})
+
+
 class WeatherAPIView(APIView):
     """API endpoint for weather data with caching and fallback coordinates."""
 
@@ -142,83 +220,109 @@ class WeatherAPIView(APIView):
         if not city or len(city) < 2:
             return Response({'error': 'Nieprawidłowa nazwa miasta'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Decode and normalize city name
-        city_decoded = unquote(city)
-        city_normalized = city_decoded.lower().strip()
-
-        # Check cache first
-        cache_key = f'weather_{city_normalized.replace(" ", "_")}'
-        cached_weather = cache.get(cache_key)
-        if cached_weather:
-            return Response(cached_weather)
+        city_decoded, city_normalized = normalize_city(city)
 
         try:
-            lat, lon = None, None
+            return Response(get_weather(city_decoded, city_normalized))
+        except Exception as exc:
+            message, error_status = describe_weather_error(exc)
+            return Response({'error': message}, status=error_status)
+
+
+class WeatherBatchAPIView(APIView):
+    """API endpoint returning weather for many cities in a single request.
+
+    Cities are passed as repeated ``city`` query parameters. Duplicates are
+    collapsed after normalization, cache hits are answered directly and the
+    remaining cities are fetched from upstream concurrently.
+    """
+
+    def get(self, request):
+        cities = request.query_params.getlist('city')
+        if not cities:
+            return Response({'error': 'Nie podano miast'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(cities) > settings.WEATHER_BATCH_MAX_CITIES:
+            return Response(
+                {'error': f'Maksymalnie {settings.WEATHER_BATCH_MAX_CITIES} miast w jednym zapytaniu'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Try fallback coordinates first for Polish cities
-            if city_normalized in POLISH_CITIES_COORDS:
-                lat, lon = POLISH_CITIES_COORDS[city_normalized]
-            else:
-                # Try Nominatim geocoding API
+        # Group requested names by normalized city
+        results = {}
+        requested = {}
+        for city in cities:
+            if not city or len(city) < 2:
+                results[city] = {'error': 'Nieprawidłowa nazwa miasta'}
+                continue
+            city_decoded, city_normalized = normalize_city(city)
+            requested.setdefault(city_normalized, (city_decoded, []))[1].append(city)
+
+        # Answer cache hits straight away
+        weather_by_city = get_cached_weather(
+            {name: city_decoded for name, (city_decoded, _) in requested.items()}
+        )
+
+        # Fetch the misses concurrently
+        misses = [name for name in requested if name not in weather_by_city]
+        if misses:
+            # More threads than bulkhead slots would only be rejected by it
+            max_workers = min(
+                len(misses), settings.WEATHER_BATCH_MAX_WORKERS, settings.WEATHER_MAX_CONCURRENT_CALLS
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    name: executor.submit(self.fetch_in_thread, requested[name][0], name)
+                    for name in misses
+                }
+            for name, future in futures.items():
                 try:
-                    headers = {'User-Agent': 'DjangoContactManager/1.0 (recruitment-task)'}
-                    params = {'q': city_decoded, 'format': 'json', 'limit': 1}
-                    geo_response = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
-                    geo_response.raise_for_status()
-                    geo_data = geo_response.json()
-
-                    if geo_data:
-                        lat = float(geo_data[0]['lat'])
-                        lon = float(geo_data[0]['lon'])
-                except requests.RequestException:
-                    pass
-
-            if lat is None or lon is None:
-                return Response({'error': 'Nie znaleziono miasta'}, status=status.HTTP_404_NOT_FOUND)
-
-            # Fetch weather from Open-Meteo API
-            weather_params = {
-                'latitude': lat,
-                'longitude': lon,
-                'current_weather': 'true',
-                'hourly': 'relativehumidity_2m',
-                'timezone': 'Europe/Warsaw'
-            }
-
-            weather_response = requests.get(OPEN_METEO_URL, params=weather_params, timeout=REQUEST_TIMEOUT)
-            weather_response.raise_for_status()
-            weather_data = weather_response.json()
-
-            current = weather_data.get('current_weather', {})
-
-            # Extract humidity from hourly data
-            humidity = None
-            hourly = weather_data.get('hourly', {})
-            if 'relativehumidity_2m' in hourly:
-                from datetime import datetime
-                current_hour = datetime.now().hour
-                humidity_list = hourly['relativehumidity_2m']
-                if current_hour < len(humidity_list):
-                    humidity = humidity_list[current_hour]
-
-            weather_code = current.get('weathercode', 0)
-
-            response_data = {
-                'city': city_decoded,
-                'temperature': current.get('temperature'),
-                'humidity': humidity,
-                'wind_speed': current.get('windspeed'),
-                'description': WEATHER_CODES.get(weather_code, 'Nieznane')
-            }
-
-            # Cache result for 30 minutes
-            cache.set(cache_key, response_data, timeout=1800)
-
-            return Response(response_data)
-
-        except requests.Timeout:
-            return Response({'error': 'Przekroczono czas oczekiwania'}, status=status.HTTP_504_GATEWAY_TIMEOUT)
-        except requests.RequestException:
-            return Response({'error': 'Błąd pobierania danych pogodowych'}, status=status.HTTP_502_BAD_GATEWAY)
-        except Exception:
-            return Response({'error': 'Wystąpił błąd'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                    weather_by_city[name] = future.result()
+                except Exception as exc:
+                    weather_by_city[name] = {'error': describe_weather_error(exc)[0]}
+
+        for name, (_, originals) in requested.items():
+            for city in originals:
+                results[city] = weather_by_city[name]
+
+        return Response({'results': results})
+
+    @staticmethod
+    def fetch_in_thread(city_decoded, city_normalized):
+        """Run get_weather in a pool thread, closing its DB connection afterwards."""
+        try:
+            return get_weather(city_decoded, city_normalized)
+        finally:
+            connection.close()
+
+
+class ImportJobAPIView(generics.RetrieveAPIView):
+    """API endpoint for polling the progress of a background CSV import."""
+
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+
+    def get_object(self):
+        # Polled while the import runs; fail it here if its process is gone
+        check_import_queue()
+        return super().get_object()
+
+
+class WeatherMetricsAPIView(APIView):
+    """API endpoint exposing weather fetch counters and upstream health.
+
+    Circuit breaker and bulkhead state is kept per worker process, so it
+    describes the worker that served the request.
+    """
+
+    def get(self, request):
+        return Response({
+            'singleflight': weather_flight.get_stats(),
+            **get_resilience_stats(),
+        })
+
+
+class ResponseCacheMetricsAPIView(APIView):
+    """API endpoint exposing hit ratio and byte counts of the contact list response cache."""
+
+    def get(self, request):
+        return Response(contact_list_cache.get_stats())
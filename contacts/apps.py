@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ContactsConfig(AppConfig):
     """Configuration for the contacts application."""
 
     name = 'contacts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .signals import reinstall_triggers
+
+        post_migrate.connect(reinstall_triggers, sender=self)
+        from .weather import start_warmup_scheduler
+
+        start_warmup_scheduler()
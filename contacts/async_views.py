@@ -0,0 +1,28 @@
+from django.http import JsonResponse
+from django.views import View
+
+from .weather import aget_weather, describe_weather_error, normalize_city
+
+
+class AsyncWeatherView(View):
+    """Async weather endpoint with the same responses as ``WeatherAPIView``.
+
+    Served through ASGI (``core.asgi``), one worker can keep many upstream
+    requests in flight instead of blocking a thread per request.
+    """
+
+    async def get(self, request, city):
+        if not city or len(city) < 2:
+            return self.json({'error': 'Nieprawidłowa nazwa miasta'}, status=400)
+
+        city_decoded, city_normalized = normalize_city(city)
+
+        try:
+            return self.json(await aget_weather(city_decoded, city_normalized))
+        except Exception as exc:
+            message, error_status = describe_weather_error(exc)
+            return self.json({'error': message}, status=error_status)
+
+    @staticmethod
+    def json(data, status=200):
+        return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
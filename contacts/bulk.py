@@ -0,0 +1,243 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Contact
+from .serializers import ContactBulkSerializer
+from .weather import queue_city_warmup
+
+
+# Fields by which bulk updates and deletes find contacts
+MATCH_FIELDS = ('id', 'email', 'phone_number')
+
+UNIQUE_MESSAGES = {
+    'email': 'Kontakt z tym adresem email już istnieje.',
+    'phone_number': 'Kontakt z tym numerem telefonu już istnieje.',
+}
+CONFLICT_MESSAGE = 'Kontakt z tym adresem email lub numerem telefonu już istnieje.'
+NOT_FOUND_MESSAGE = 'Nie znaleziono kontaktu.'
+REPEATED_MESSAGE = 'Kontakt występuje w żądaniu więcej niż raz.'
+INVALID_ITEM_MESSAGE = 'Oczekiwano obiektu.'
+
+# Owner of a unique value taken by an earlier item of the same request
+CLAIMED = object()
+
+
+def failed(errors):
+    return {'status': 'error', 'errors': errors}
+
+
+def changes_value(contact, name, value):
+    """Return whether ``value`` differs from field ``name`` of ``contact``.
+
+    Relations are compared by primary key, so the related object is not loaded.
+    """
+    field = Contact._meta.get_field(name)
+    if field.is_relation:
+        return getattr(contact, field.attname) != getattr(value, 'pk', value)
+    return getattr(contact, name) != value
+
+
+def validate_items(items, results, partial=False):
+    """Yield (index, validated data) of valid items, recording errors of the others.
+
+    One serializer validates every item, as ``many=True`` would, instead of
+    building its fields again for each of thousands of items.
+    """
+    serializer = ContactBulkSerializer(partial=partial)
+    for index, item in items:
+        try:
+            yield index, serializer.run_validation(item)
+        except ValidationError as exc:
+            results[index] = failed(exc.detail)
+
+
+def normalize_key(match, value):
+    """Return a lookup value for the ``match`` field, or None if it is unusable."""
+    if match == 'id':
+        if isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return value.strip().lower() if match == 'email' else value.strip()
+
+
+def find_owners(values_by_field):
+    """Return {field: {value: contact id}} for unique values already stored.
+
+    One ``IN`` query per field for the whole batch.
+    """
+    return {
+        field: dict(Contact.objects.filter(**{f'{field}__in': values}).values_list(field, 'pk'))
+        if values else {}
+        for field, values in values_by_field.items()
+    }
+
+
+def claim_unique_values(data, owners, contact_id=None):
+    """Reserve the email and phone of ``data`` for ``contact_id``; return errors on conflict."""
+    errors = {
+        field: [message] for field, message in UNIQUE_MESSAGES.items()
+        if field in data and owners[field].get(data[field], contact_id) != contact_id
+    }
+    if not errors:
+        for field in UNIQUE_MESSAGES:
+            if field in data:
+                owners[field][data[field]] = CLAIMED
+    return errors
+
+
+def find_contacts(keys, match, results):
+    """Map item indexes to contacts for (index, raw key) pairs, recording misses in ``results``."""
+    normalized = {}
+    for index, value in keys:
+        key = normalize_key(match, value)
+        if key is None:
+            results[index] = failed({match: [NOT_FOUND_MESSAGE]})
+        else:
+            normalized[index] = key
+    stored = Contact.objects.in_bulk(set(normalized.values()), field_name='pk' if match == 'id' else match)
+
+    found = {}
+    seen = set()
+    for index, key in normalized.items():
+        contact = stored.get(key)
+        if contact is None:
+            results[index] = failed({match: [NOT_FOUND_MESSAGE]})
+        elif contact.pk in seen:
+            results[index] = failed({match: [REPEATED_MESSAGE]})
+        else:
+            seen.add(contact.pk)
+            found[index] = contact
+    return found
+
+
+def warm_up_cities(cities):
+    """Queue weather warm-up after the commit; bulk writes send no signals."""
+    def queue():
+        for city in cities:
+            queue_city_warmup(city)
+
+    if cities:
+        transaction.on_commit(queue)
+
+
+def bulk_create_contacts(items):
+    """Validate and insert contact dicts; return one result per item, in order.
+
+    Emails and phone numbers are checked against the database with one set
+    query per field, and against earlier items of the same request.
+    """
+    results = [None] * len(items)
+    candidates = list(validate_items(enumerate(items), results))
+
+    owners = find_owners({field: {data[field] for _, data in candidates} for field in UNIQUE_MESSAGES})
+    contacts = []
+    for index, data in candidates:
+        errors = claim_unique_values(data, owners)
+        if errors:
+            results[index] = failed(errors)
+        else:
+            contacts.append((index, Contact(**data)))
+
+    try:
+        with transaction.atomic():
+            Contact.objects.bulk_create([contact for _, contact in contacts])
+    except IntegrityError:
+        # A concurrent write took some of the values; retry one by one
+        for index, contact in contacts:
+            try:
+                with transaction.atomic():
+                    contact.save(force_insert=True)
+            except IntegrityError:
+                contact.pk = None
+                results[index] = failed({'non_field_errors': [CONFLICT_MESSAGE]})
+
+    for index, contact in contacts:
+        if results[index] is None:
+            results[index] = {'status': 'created', 'id': contact.pk}
+    warm_up_cities({contact.city for index, contact in contacts if contact.pk})
+    return results
+
+
+def bulk_update_contacts(items, match='id'):
+    """Apply partial updates to contacts found by ``match``; return one result per item.
+
+    Each item holds the ``match`` field of its contact and the fields to change.
+    """
+    results = [None] * len(items)
+    keys = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            keys.append((index, item.get(match)))
+        else:
+            results[index] = failed({'non_field_errors': [INVALID_ITEM_MESSAGE]})
+    found = find_contacts(keys, match, results)
+
+    updates = (
+        (index, {name: value for name, value in items[index].items() if name != match})
+        for index in found
+    )
+    candidates = []
+    for index, data in validate_items(updates, results, partial=True):
+        contact = found[index]
+        changes = {name: value for name, value in data.items() if changes_value(contact, name, value)}
+        candidates.append((index, contact, changes))
+
+    owners = find_owners({
+        field: {changes[field] for _, _, changes in candidates if field in changes}
+        for field in UNIQUE_MESSAGES
+    })
+    updated = []
+    fields = set()
+    for index, contact, changes in candidates:
+        errors = claim_unique_values(changes, owners, contact.pk)
+        if errors:
+            results[index] = failed(errors)
+            continue
+        for name, value in changes.items():
+            setattr(contact, name, value)
+        fields.update(changes)
+        updated.append((index, contact, changes))
+
+    changed = [contact for _, contact, changes in updated if changes]
+    # bulk_update() skips auto_now
+    now = timezone.now()
+    for contact in changed:
+        contact.updated_at = now
+    try:
+        with transaction.atomic():
+            if changed:
+                Contact.objects.bulk_update(changed, sorted(fields) + ['updated_at'])
+    except IntegrityError:
+        for index, contact, changes in updated:
+            if not changes:
+                continue
+            try:
+                with transaction.atomic():
+                    contact.save(update_fields=[*changes, 'updated_at'])
+            except IntegrityError:
+                results[index] = failed({'non_field_errors': [CONFLICT_MESSAGE]})
+
+    for index, contact, changes in updated:
+        if results[index] is None:
+            results[index] = {'status': 'updated', 'id': contact.pk}
+    warm_up_cities({
+        contact.city for index, contact, changes in updated
+        if 'city' in changes and results[index]['status'] == 'updated'
+    })
+    return results
+
+
+def bulk_delete_contacts(keys, match='id'):
+    """Delete contacts found by ``match`` values; return one result per key."""
+    results = [None] * len(keys)
+    found = find_contacts(enumerate(keys), match, results)
+    Contact.objects.filter(pk__in=[contact.pk for contact in found.values()]).delete()
+    for index, contact in found.items():
+        results[index] = {'status': 'deleted', 'id': contact.pk}
+    return results
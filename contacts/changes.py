@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Contact, ContactChange
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+class ExpiredCursor(Exception):
+    """Raised for a cursor older than the tombstone retention; the client must resync."""
+
+
+def change_feed_available(using='default'):
+    """Return whether the change log is maintained by triggers (SQLite, migration 0009)."""
+    return connections[using].vendor == 'sqlite'
+
+
+def parse_change_cursor(cursor):
+    """Return (seq, issued at) for a change feed cursor; (0, None) when empty.
+
+    Raises ``InvalidCursor`` or ``ExpiredCursor``.
+    """
+    if not cursor:
+        return 0, None
+    position = decode_cursor(cursor)
+    try:
+        seq = int(position['seq'])
+        issued_at = parse_datetime(position['at'])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if issued_at is None:
+        raise InvalidCursor(cursor)
+    # Tombstones the client has not seen may have been pruned since
+    if issued_at < timezone.now() - timedelta(days=settings.CONTACT_TOMBSTONE_RETENTION_DAYS):
+        raise ExpiredCursor(cursor)
+    return seq, issued_at
+
+
+def get_changes(cursor, limit):
+    """Return (upserted contacts and tombstones in commit order, next cursor, has more).
+
+    Each contact appears once, at its latest change. The next cursor carries
+    the time of the last returned change: tombstones after it are younger,
+    so they are still kept while the cursor is valid. An empty page renews
+    the cursor with the current time, so clients that find nothing new keep
+    a valid cursor.
+    """
+    since, issued_at = parse_change_cursor(cursor)
+    entries = list(ContactChange.objects.filter(seq__gt=since).order_by('seq')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    contacts = Contact.objects.in_bulk([entry.contact_id for entry in entries if not entry.deleted])
+    changes = []
+    for entry in entries:
+        if entry.deleted:
+            changes.append((entry, None))
+        elif entry.contact_id in contacts:
+            changes.append((entry, contacts[entry.contact_id]))
+        # Otherwise deleted after the log was read; its tombstone comes later
+
+    if entries:
+        since, issued_at = entries[-1].seq, entries[-1].changed_at
+    else:
+        issued_at = timezone.now()
+    next_cursor = encode_cursor({'seq': since, 'at': issued_at.isoformat()})
+    return changes, next_cursor, has_more
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period; return their number."""
+    cutoff = timezone.now() - timedelta(days=settings.CONTACT_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = ContactChange.objects.filter(deleted=True, changed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,90 @@
+import hashlib
+
+from django.contrib import messages
+from django.db.models.expressions import RawSQL
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .changes import change_feed_available
+from .models import ContactChange
+from .versions import get_generation
+
+
+def contacts_version():
+    """Return (seq, time) of the latest contact write, or None if unknown.
+
+    The change log (``contacts.changes``) gets a new ``seq`` on every insert,
+    update and delete, whatever path made it, so it doubles as a table version.
+    The ``seq`` is read from the AUTOINCREMENT counter in ``sqlite_sequence``
+    rather than from the log, whose latest entry may be a pruned tombstone:
+    the version must never go back to one an earlier state had.
+    """
+    if not change_feed_available():
+        return None
+    counter = RawSQL('SELECT seq FROM sqlite_sequence WHERE name = %s', [ContactChange._meta.db_table])
+    return (
+        ContactChange.objects.order_by('-seq').annotate(counter=counter)
+        .values_list('counter', 'changed_at').first()
+    )
+
+
+def contact_version(contact_id):
+    """Return (seq, time) of the latest write of one contact, or None if unknown."""
+    if not change_feed_available():
+        return None
+    return ContactChange.objects.filter(contact_id=contact_id, deleted=False).values_list('seq', 'changed_at').first()
+
+
+def make_etag(*parts):
+    """Return a strong ETag for a representation identified by ``parts``."""
+    # Status names are part of every contact representation
+    digest = hashlib.sha1(repr((*parts, get_generation('statuses'))).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class VersionedViewMixin:
+    """View whose representation changes only with a version of its data.
+
+    ``get_version()`` returns (seq, last modified) from a cheap version lookup
+    (``contacts_version`` or ``contact_version``), or None when unknown; it
+    runs before the main query. ``version_key`` tells apart views sharing a
+    version.
+    """
+
+    version_key = None
+
+    def get_version(self):
+        raise NotImplementedError
+
+    def current_version(self):
+        """Return ``get_version()``, looked up once per request."""
+        if not hasattr(self, '_version'):
+            self._version = self.get_version()
+        return self._version
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """Answer GET with 304 Not Modified while the client's copy is current.
+
+    A None version always runs the view.
+    """
+
+    def get(self, request, *args, **kwargs):
+        # Pending flash messages change the page
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        version = self.current_version()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        seq, last_modified = version
+        etag = make_etag(self.version_key, seq, request.get_full_path(), request.META.get('HTTP_ACCEPT', ''))
+        last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,63 @@
+from django.db import connections, transaction
+from django.db.models import Count
+
+from .models import Contact, ContactStatusChoices, ContactStatusCount
+
+
+def counters_available(using='default'):
+    """Return whether contact counters are maintained by triggers (SQLite, migration 0008).
+
+    Elsewhere the counter table exists but is not kept current, so callers
+    fall back to ``COUNT(*)``.
+    """
+    return connections[using].vendor == 'sqlite'
+
+
+def status_counts(using='default'):
+    """Return {status id: number of contacts}, read from the counters where available."""
+    if counters_available(using):
+        return dict(ContactStatusCount.objects.using(using).values_list('status_id', 'count'))
+    return dict(
+        Contact.objects.using(using).order_by().values('status')
+        .annotate(total=Count('pk')).values_list('status', 'total')
+    )
+
+
+def count_for_params(params, using='default', counts=None):
+    """Return the number of contacts ``filter_contacts`` would give for ``params``.
+
+    Only unsearched lists (optionally filtered by status) are answered from the
+    counters; None means the caller has to count the queryset itself.
+    ``counts`` are ``status_counts()`` the caller has already read.
+    """
+    if params.get('q', '').strip():
+        return None
+    if counts is None:
+        counts = status_counts(using)
+    status_filter = params.get('status', '')
+    if not status_filter:
+        return sum(counts.values())
+    try:
+        status_id = int(status_filter)
+    except ValueError:
+        return None
+    return counts.get(status_id, 0)
+
+
+def repair_counters(using='default'):
+    """Recount contacts per status and fix drifted counters.
+
+    Returns a list of (status, stored count, actual count) for each corrected counter.
+    """
+    fixes = []
+    with transaction.atomic(using=using):
+        stored = dict(ContactStatusCount.objects.using(using).select_for_update().values_list('status_id', 'count'))
+        statuses = ContactStatusChoices.objects.using(using).annotate(total=Count('contacts'))
+        for status in statuses:
+            if stored.get(status.pk) == status.total:
+                continue
+            fixes.append((status, stored.get(status.pk), status.total))
+            ContactStatusCount.objects.using(using).update_or_create(
+                status=status, defaults={'count': status.total}
+            )
+    return fixes
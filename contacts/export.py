@@ -0,0 +1,65 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import F
+
+from .importer import REQUIRED_COLUMNS
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Rows written per yielded piece of the response
+EXPORT_BUFFER_ROWS = 500
+
+
+class _Echo:
+    """File-like object returning what is written, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def export_values(queryset):
+    """Project contacts to plain dicts with the status name, streamed from the database."""
+    return queryset.values(
+        'id', 'first_name', 'last_name', 'phone_number', 'email', 'city', 'date_added',
+        status_name=F('status__name'),
+    ).iterator(chunk_size=settings.CONTACT_EXPORT_CHUNK_SIZE)
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(REQUIRED_COLUMNS)
+    for row in rows:
+        yield writer.writerow([
+            row['first_name'], row['last_name'], row['phone_number'],
+            row['email'], row['city'], row['status_name'],
+        ])
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        row['status'] = row.pop('status_name')
+        row['date_added'] = row['date_added'].isoformat()
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def export_contacts(queryset, fmt='csv'):
+    """Yield an export of ``queryset`` in pieces of ``EXPORT_BUFFER_ROWS`` rows.
+
+    CSV has the columns expected by the importer; NDJSON has one JSON object
+    per contact, including its id and creation date.
+    """
+    lines = _csv_lines if fmt == 'csv' else _ndjson_lines
+    buffer = []
+    for line in lines(export_values(queryset)):
+        buffer.append(line)
+        if len(buffer) >= EXPORT_BUFFER_ROWS:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,52 @@
+from rest_framework.exceptions import ValidationError
+
+
+# Fields of contact API representations, in output order
+CONTACT_FIELDS = (
+    'id', 'first_name', 'last_name', 'phone_number', 'email', 'city', 'status', 'date_added', 'updated_at'
+)
+# Fields of list items unless ``?fields=`` is given
+CONTACT_LIST_FIELDS = ('id', 'first_name', 'last_name', 'city', 'status', 'date_added')
+# Relations ``?expand=`` turns into nested objects
+EXPANDABLE_FIELDS = ('status',)
+
+# Model columns behind fields whose names differ
+FIELD_COLUMNS = {'status': 'status_id'}
+
+
+def _names(params, param):
+    return [name.strip() for value in params.getlist(param) for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(params, default_fields):
+    """Return (fields, expanded fields) from the ``fields`` and ``expand`` parameters.
+
+    ``?fields=id,email`` picks fields of ``CONTACT_FIELDS`` (kept in their
+    order), ``default_fields`` without it; ``?expand=status`` includes the
+    status as an ``{id, name}`` object. Raises ``ValidationError`` (400)
+    naming unknown fields.
+    """
+    requested = _names(params, 'fields')
+    expand = _names(params, 'expand')
+    errors = {}
+    unknown = [name for name in requested if name not in CONTACT_FIELDS]
+    if unknown:
+        errors['fields'] = [
+            f'Nieznane pola: {", ".join(unknown)}. Dostępne pola: {", ".join(CONTACT_FIELDS)}.'
+        ]
+    unknown = [name for name in expand if name not in EXPANDABLE_FIELDS]
+    if unknown:
+        errors['expand'] = [
+            f'Nie można rozwinąć pól: {", ".join(unknown)}. Dostępne: {", ".join(EXPANDABLE_FIELDS)}.'
+        ]
+    if errors:
+        raise ValidationError(errors)
+
+    wanted = set(requested or default_fields) | set(expand)
+    return tuple(name for name in CONTACT_FIELDS if name in wanted), frozenset(expand)
+
+
+def contact_columns(fields, *extra):
+    """Return the contact columns to load for ``fields``, plus ``extra`` columns and the id."""
+    columns = {'id', *extra, *(FIELD_COLUMNS.get(name, name) for name in fields)}
+    return sorted(columns)
@@ -0,0 +1,67 @@
+from django.db.models import Q
+
+from .search import fts_available, fts_search
+
+
+# Sort fields accepted by the contact list, the API and the export
+SORT_FIELDS = ('date_added', 'last_name', 'first_name', 'city')
+DEFAULT_SORT = 'date_added'
+
+# Ranked search results; the default order when searching
+RELEVANCE = 'relevance'
+
+
+def substring_search(queryset, query):
+    """Filter contacts whose names, email, city or phone contain ``query``."""
+    return queryset.filter(
+        Q(first_name__icontains=query) |
+        Q(last_name__icontains=query) |
+        Q(email__icontains=query) |
+        Q(city__icontains=query) |
+        Q(phone_number__icontains=query)
+    )
+
+
+def search_contacts(queryset, query):
+    """Filter contacts matching ``query`` in names, email, city or phone.
+
+    Uses the FTS5 index (word prefixes, Polish letters folded, annotated
+    with ``search_rank``) where available, substring matching otherwise.
+    """
+    if fts_available(queryset.db):
+        results = fts_search(queryset, query)
+        if results is not None:
+            return results
+    return substring_search(queryset, query)
+
+
+def get_sort(params, sort_fields=SORT_FIELDS):
+    """Return (field, descending) from ``sort``/``order`` parameters.
+
+    Searches are sorted by ``RELEVANCE`` unless another sort is requested.
+    """
+    searching = bool(params.get('q', '').strip())
+    sort_by = params.get('sort') or (RELEVANCE if searching else DEFAULT_SORT)
+    if sort_by == RELEVANCE and searching:
+        return RELEVANCE, False
+    if sort_by not in sort_fields:
+        sort_by = DEFAULT_SORT
+    return sort_by, params.get('order', 'desc') == 'desc'
+
+
+def filter_contacts(queryset, params, sort_fields=SORT_FIELDS):
+    """Apply the ``q``, ``status``, ``sort`` and ``order`` parameters to a contact queryset."""
+    search_query = params.get('q', '').strip()
+    if search_query:
+        queryset = search_contacts(queryset, search_query)
+
+    status_filter = params.get('status', '')
+    if status_filter:
+        queryset = queryset.filter(status_id=status_filter)
+
+    sort_by, descending = get_sort(params, sort_fields)
+    if sort_by == RELEVANCE:
+        if 'search_rank' in queryset.query.extra:
+            return queryset.order_by('search_rank', '-pk')
+        sort_by, descending = DEFAULT_SORT, True
+    return queryset.order_by(f"{'-' if descending else ''}{sort_by}")
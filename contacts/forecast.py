@@ -0,0 +1,123 @@
+import logging
+import math
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import OperationalError
+from django.utils import timezone
+
+from .models import WeatherForecast
+
+logger = logging.getLogger(__name__)
+
+# Hourly variables requested from Open-Meteo, in storage order
+SERIES = ('temperature_2m', 'relativehumidity_2m', 'windspeed_10m', 'weathercode')
+
+# Locations closer than ~10 m share one stored forecast
+COORD_PRECISION = 4
+
+
+class ForecastNotAvailable(Exception):
+    """Raised when a forecast window does not cover the requested time."""
+
+
+class ForecastWindow:
+    """Hourly forecast series for one location, answering values for any time."""
+
+    def __init__(self, starts_at, hours, values):
+        self.starts_at = starts_at
+        self.hours = hours
+        self.values = values
+
+    @classmethod
+    def from_response(cls, data):
+        """Build a window from an Open-Meteo response requested with ``timeformat=unixtime``."""
+        hourly = data.get('hourly', {})
+        times = hourly.get('time') or []
+        if not times:
+            raise ValueError('Forecast response has no hourly data')
+        values = array('f')
+        for name in SERIES:
+            column = hourly.get(name) or []
+            values.extend(
+                math.nan if i >= len(column) or column[i] is None else column[i]
+                for i in range(len(times))
+            )
+        starts_at = datetime.fromtimestamp(times[0], tz=dt_timezone.utc)
+        return cls(starts_at, len(times), values)
+
+    @classmethod
+    def from_model(cls, forecast):
+        values = array('f')
+        values.frombytes(bytes(forecast.series))
+        return cls(forecast.starts_at, forecast.hours, values)
+
+    @property
+    def ends_at(self):
+        return self.starts_at + timedelta(hours=self.hours - 1)
+
+    def covers(self, when):
+        return self.starts_at <= when <= self.ends_at
+
+    def _series(self, name):
+        offset = SERIES.index(name) * self.hours
+        return self.values[offset:offset + self.hours]
+
+    def at(self, when):
+        """Return {variable: value} at ``when``, interpolating between hours.
+
+        Weather codes are categorical, so the code of the current hour is used.
+        Returns None when ``when`` is outside the window.
+        """
+        if not self.covers(when):
+            return None
+        position = (when - self.starts_at).total_seconds() / 3600
+        index = int(position)
+        fraction = position - index
+
+        result = {}
+        for name in SERIES:
+            series = self._series(name)
+            value = series[index]
+            if name != 'weathercode' and fraction and index + 1 < self.hours:
+                value += (series[index + 1] - value) * fraction
+            result[name] = None if math.isnan(value) else value
+        return result
+
+
+def _location(lat, lon):
+    return round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)
+
+
+def get_stored_window(lat, lon, when=None):
+    """Return the stored window for a location if it still covers ``when``."""
+    when = when or timezone.now()
+    latitude, longitude = _location(lat, lon)
+    forecast = WeatherForecast.objects.filter(latitude=latitude, longitude=longitude).first()
+    if forecast is None:
+        return None
+    window = ForecastWindow.from_model(forecast)
+    return window if window.covers(when) else None
+
+
+def store_window(lat, lon, data):
+    """Persist the forecast window from an Open-Meteo response and return it.
+
+    The window is returned even if it cannot be stored.
+    """
+    window = ForecastWindow.from_response(data)
+    latitude, longitude = _location(lat, lon)
+    try:
+        WeatherForecast.objects.update_or_create(
+            latitude=latitude,
+            longitude=longitude,
+            defaults={
+                'starts_at': window.starts_at,
+                'hours': window.hours,
+                'series': window.values.tobytes(),
+            }
+        )
+    except OperationalError:
+        # Concurrent writers on SQLite ("database is locked"); the next fetch stores it
+        logger.warning('Could not store forecast for %s, %s', latitude, longitude, exc_info=True)
+    return window
@@ -1,5 +1,46 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
 from .models import Contact, ContactStatusChoices
+from .statuses import status_registry
+
+
+class StatusChoiceIterator(forms.models.ModelChoiceIterator):
+    """Status options taken from the status registry instead of a query."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for status in status_registry.all():
+            yield self.choice(status)
+
+    def __len__(self):
+        return len(status_registry.all()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(status_registry.all())
+
+
+class StatusChoiceField(forms.ModelChoiceField):
+    """Status select rendered and validated against the status registry."""
+
+    iterator = StatusChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, ContactStatusChoices):
+            return value
+        try:
+            status = status_registry.get(int(value))
+        except (TypeError, ValueError):
+            status = None
+        if status is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value}
+            )
+        return status
 
 
 class ContactForm(forms.ModelForm):
@@ -8,6 +49,7 @@ class ContactForm(forms.ModelForm):
     class Meta:
         model = Contact
         fields = ['first_name', 'last_name', 'phone_number', 'email', 'city', 'status']
+        field_classes = {'status': StatusChoiceField}
 
         widgets = {
             'first_name': forms.TextInput(attrs={
@@ -114,6 +156,7 @@ class ContactImportForm(forms.Form):
         if csv_file:
             if not csv_file.name.endswith('.csv'):
                 raise forms.ValidationError('Plik musi mieć rozszerzenie .csv')
-            if csv_file.size > 5 * 1024 * 1024:
-                raise forms.ValidationError('Plik jest zbyt duży (maksymalnie 5MB)')
+            max_size = settings.CONTACT_IMPORT_MAX_SIZE
+            if max_size and csv_file.size > max_size:
+                raise forms.ValidationError(f'Plik jest zbyt duży (maksymalnie {filesizeformat(max_size)})')
         return csv_file
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import OperationalError
+from django.utils import timezone
+
+from .models import GeocodedCity
+from .weather_client import get_async_client, get_client
+
+logger = logging.getLogger(__name__)
+
+# Fallback coordinates for Polish cities (used when Nominatim is unreachable)
+POLISH_CITIES_COORDS = {
+    'warszawa': (52.2297, 21.0122),
+    'kraków': (50.0647, 19.9450),
+    'krakow': (50.0647, 19.9450),
+    'wrocław': (51.1079, 17.0385),
+    'wroclaw': (51.1079, 17.0385),
+    'poznań': (52.4064, 16.9252),
+    'poznan': (52.4064, 16.9252),
+    'gdańsk': (54.3520, 18.6466),
+    'gdansk': (54.3520, 18.6466),
+    'łódź': (51.7592, 19.4560),
+    'lodz': (51.7592, 19.4560),
+    'szczecin': (53.4285, 14.5528),
+    'lublin': (51.2465, 22.5684),
+    'katowice': (50.2649, 19.0238),
+    'bydgoszcz': (53.1235, 18.0084),
+    'białystok': (53.1325, 23.1688),
+    'bialystok': (53.1325, 23.1688),
+}
+
+
+# Marker stored for cities that the geocoding service could not resolve
+NOT_FOUND = object()
+
+
+class CityNotFound(Exception):
+    """Raised when coordinates for a city cannot be determined."""
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Per-process front for the GeocodedCity table
+geocode_lru = LRUCache(settings.GEOCODE_LRU_SIZE)
+
+
+def nominatim_lookup(city_decoded):
+    """Query Nominatim; return (lat, lon) or None when the city is unknown."""
+    return get_client().geocode(city_decoded)
+
+
+def _remember(city_normalized, coords):
+    """Put a lookup result into the in-process LRU."""
+    if coords is NOT_FOUND:
+        geocode_lru.set(city_normalized, NOT_FOUND, settings.GEOCODE_NOT_FOUND_TIMEOUT)
+    else:
+        geocode_lru.set(city_normalized, coords, settings.GEOCODE_CACHE_TIMEOUT)
+    return coords
+
+
+def _lookup_stored(city_normalized):
+    """Return coords or NOT_FOUND from the GeocodedCity table, None if unknown."""
+    row = GeocodedCity.objects.filter(name=city_normalized).first()
+    if row is None:
+        return None
+    if row.found:
+        return row.latitude, row.longitude
+
+    # Negative results expire so that the city is retried eventually
+    retry_after = row.updated_at + timedelta(seconds=settings.GEOCODE_NOT_FOUND_TIMEOUT)
+    if retry_after <= timezone.now():
+        return None
+    geocode_lru.set(city_normalized, NOT_FOUND, (retry_after - timezone.now()).total_seconds())
+    return NOT_FOUND
+
+
+def get_known_coords(city_normalized):
+    """Return coords or NOT_FOUND for a city seen before, None if it is unknown."""
+    # Try fallback coordinates first for Polish cities
+    if city_normalized in POLISH_CITIES_COORDS:
+        return POLISH_CITIES_COORDS[city_normalized]
+
+    coords = geocode_lru.get(city_normalized)
+    if coords is None:
+        coords = _lookup_stored(city_normalized)
+        if coords is not None and coords is not NOT_FOUND:
+            _remember(city_normalized, coords)
+    return coords
+
+
+def store_result(city_normalized, result):
+    """Persist a Nominatim result; return coords or NOT_FOUND."""
+    coords = result if result is not None else NOT_FOUND
+    if len(city_normalized) <= GeocodedCity._meta.get_field('name').max_length:
+        try:
+            GeocodedCity.objects.update_or_create(
+                name=city_normalized,
+                defaults={
+                    'latitude': result[0] if result else None,
+                    'longitude': result[1] if result else None,
+                    'found': result is not None,
+                }
+            )
+        except OperationalError:
+            # The lookup succeeded; a busy database only costs a repeat lookup later
+            logger.warning('Could not store geocoding result for %s', city_normalized, exc_info=True)
+    return _remember(city_normalized, coords)
+
+
+def geocode_city(city_decoded, city_normalized):
+    """Return (lat, lon) for a city, calling Nominatim only for unseen cities."""
+    coords = get_known_coords(city_normalized)
+
+    if coords is None:
+        # Try Nominatim geocoding API; transport errors are not cached
+        try:
+            result = nominatim_lookup(city_decoded)
+        except requests.RequestException:
+            raise CityNotFound(city_decoded)
+        coords = store_result(city_normalized, result)
+
+    if coords is NOT_FOUND:
+        raise CityNotFound(city_decoded)
+    return coords
+
+
+async def ageocode_city(city_decoded, city_normalized):
+    """Async variant of ``geocode_city`` using the async upstream client."""
+    coords = await sync_to_async(get_known_coords)(city_normalized)
+
+    if coords is None:
+        try:
+            result = await get_async_client().geocode(city_decoded)
+        except requests.RequestException:
+            raise CityNotFound(city_decoded)
+        coords = await sync_to_async(store_result)(city_normalized, result)
+
+    if coords is NOT_FOUND:
+        raise CityNotFound(city_decoded)
+    return coords
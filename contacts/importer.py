@@ -0,0 +1,216 @@
+import codecs
+import csv
+import io
+from collections import deque
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import Contact, ContactStatusChoices
+from .statuses import status_registry
+from .validation import validate_chunks
+from .writes import yield_to_interactive_writes
+
+
+REQUIRED_COLUMNS = ('first_name', 'last_name', 'phone_number', 'email', 'city', 'status')
+
+# Bytes read from the start of an upload to detect its encoding and dialect
+SNIFF_SIZE = 8 * 1024
+
+
+def missing_columns(fieldnames):
+    """Return required columns absent from CSV headers."""
+    headers = {h.strip().lower() for h in fieldnames if h}
+    return set(REQUIRED_COLUMNS) - headers
+
+
+def detect_encoding(head):
+    """Return 'utf-8-sig' if the first bytes of a file are UTF-8, 'latin-1' otherwise."""
+    try:
+        # Not final: the sample may end in the middle of a multibyte character
+        codecs.getincrementaldecoder('utf-8-sig')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8-sig'
+
+
+def sniff_csv(binary_file):
+    """Return (encoding, dialect, sample) from the first ``SNIFF_SIZE`` bytes of a file.
+
+    The file is rewound afterwards; ``dialect`` is None when it could not be sniffed.
+    """
+    head = binary_file.read(SNIFF_SIZE)
+    binary_file.seek(0)
+    encoding = detect_encoding(head)
+
+    # Sniff complete lines only
+    sample = head.decode(encoding, errors='ignore')
+    if len(head) == SNIFF_SIZE and '\n' in sample:
+        sample = sample[:sample.rindex('\n')]
+
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;')
+    except csv.Error:
+        dialect = None
+    return encoding, dialect, sample
+
+
+def read_header(binary_file):
+    """Return the column names of a CSV file without consuming it, or None if it is empty."""
+    _, dialect, sample = sniff_csv(binary_file)
+    reader = csv.reader(io.StringIO(sample), **({'dialect': dialect} if dialect else {}))
+    return next(reader, None)
+
+
+def open_csv(binary_file):
+    """Return a ``csv.DictReader`` streaming rows from a binary file object.
+
+    Only the first ``SNIFF_SIZE`` bytes are read up front, to detect the
+    encoding and the delimiter; the rest is decoded incrementally while
+    rows are consumed, so memory use does not depend on the file size.
+    Bytes that do not decode later in a UTF-8 file are replaced.
+    """
+    encoding, dialect, _ = sniff_csv(binary_file)
+    text = io.TextIOWrapper(binary_file, encoding=encoding, errors='replace', newline='')
+    if dialect is None:
+        return csv.DictReader(text)
+    return csv.DictReader(text, dialect=dialect)
+
+
+def numbered_rows(rows):
+    """Yield (line, row) pairs for CSV rows.
+
+    The lines of a ``csv`` reader come from its ``line_num``, which counts
+    blank lines and every line of a multi-line quoted value; a row is
+    reported at the line it ends on. Other iterables are numbered from 2,
+    after the header.
+    """
+    if not hasattr(rows, 'line_num'):
+        yield from enumerate(rows, 2)
+        return
+    for row in rows:
+        yield rows.line_num, row
+
+
+class ContactImporter:
+    """Set-based bulk importer for contact rows.
+
+    Rows are validated like ``ContactForm`` input and processed in chunks: statuses are resolved from a map loaded
+    once, existing emails and phone numbers of a chunk are fetched with two
+    ``IN`` queries, duplicates within the file are tracked in hash sets and
+    accepted rows are inserted with ``bulk_create`` in one transaction per
+    chunk. A row is skipped when its email or phone number already exists
+    (in the database or earlier in the file), just like the row-by-row
+    import did. Earlier chunks are already stored when the next one is
+    checked, so only the current chunk is held in memory.
+
+    Skipped rows are listed in ``rejections`` as ``{'line': ..., 'reason': ...}``,
+    up to ``CONTACT_IMPORT_MAX_REJECTIONS`` entries.
+    """
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or settings.CONTACT_IMPORT_CHUNK_SIZE
+        self.max_rejections = settings.CONTACT_IMPORT_MAX_REJECTIONS
+        self.default_status = status_registry.get_by_name('nowy')
+        if self.default_status is None:
+            self.default_status, _ = ContactStatusChoices.objects.get_or_create(
+                name='nowy',
+                defaults={'description': 'Nowy kontakt'}
+            )
+        self.statuses = {status.name.lower(): status.pk for status in status_registry.all()}
+        self.rows_processed = 0
+        self.created_count = 0
+        self.skipped_count = 0
+        self.rejections = []
+        self.cities = set()
+
+    def import_rows(self, rows, progress=None, workers=None):
+        """Import an iterable of raw CSV rows; return self with updated counts.
+
+        Rows are validated in parallel by ``workers`` processes (see
+        ``validate_chunks``); database writes stay in the calling thread.
+        ``progress`` is called with the importer after every chunk. Each
+        chunk waits for pending interactive writes first (``contacts.writes``).
+        """
+        # ``rows`` stays referenced: dropping a reader closes the file under it
+        numbered = numbered_rows(rows)
+        # Line numbers of the chunks handed to validation, which reads ahead
+        lines = deque()
+
+        def chunks():
+            while chunk := list(islice(numbered, self.chunk_size)):
+                lines.append([line for line, _ in chunk])
+                yield [row for _, row in chunk]
+
+        for results in validate_chunks(chunks(), workers):
+            yield_to_interactive_writes()
+            self.import_chunk(results, lines.popleft())
+            if progress is not None:
+                progress(self)
+        return self
+
+    def reject(self, line, reason):
+        self.skipped_count += 1
+        if len(self.rejections) < self.max_rejections:
+            self.rejections.append({'line': line, 'reason': reason})
+
+    def build_contact(self, record):
+        """Return an unsaved Contact for a validated record."""
+        status = record.pop('status')
+        return Contact(status_id=self.statuses.get(status, self.default_status.id), **record)
+
+    def import_chunk(self, results, lines):
+        """Insert one chunk of ``validate_row`` results, read from the given file lines."""
+        entries = []
+        for (record, error), line in zip(results, lines):
+            self.rows_processed += 1
+            if error:
+                self.reject(line, error)
+            elif record is not None:
+                entries.append((line, self.build_contact(record)))
+        self.insert(entries)
+
+    def insert(self, entries):
+        """Insert (line, unsaved contact) pairs, skipping duplicates of stored or earlier rows."""
+        if not entries:
+            return
+        existing_emails = set(
+            Contact.objects.filter(email__in={c.email for _, c in entries}).values_list('email', flat=True)
+        )
+        existing_phones = set(
+            Contact.objects.filter(phone_number__in={c.phone_number for _, c in entries})
+            .values_list('phone_number', flat=True)
+        )
+
+        accepted = []
+        for line, contact in entries:
+            if contact.email in existing_emails:
+                self.reject(line, 'Kontakt z tym adresem email już istnieje.')
+                continue
+            if contact.phone_number in existing_phones:
+                self.reject(line, 'Kontakt z tym numerem telefonu już istnieje.')
+                continue
+            # Later rows of the chunk with the same values are duplicates
+            existing_emails.add(contact.email)
+            existing_phones.add(contact.phone_number)
+            accepted.append((line, contact))
+
+        try:
+            with transaction.atomic():
+                Contact.objects.bulk_create([contact for _, contact in accepted])
+            self.created_count += len(accepted)
+        except IntegrityError:
+            # A concurrent write took some of the values; retry row by row
+            self._insert_one_by_one(accepted)
+        self.cities.update(contact.city for _, contact in accepted)
+
+    def _insert_one_by_one(self, entries):
+        with transaction.atomic():
+            for line, contact in entries:
+                try:
+                    with transaction.atomic():
+                        contact.save(force_insert=True)
+                    self.created_count += 1
+                except IntegrityError:
+                    self.reject(line, 'Kontakt z tym adresem email lub numerem telefonu już istnieje.')
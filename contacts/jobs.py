@@ -0,0 +1,178 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .importer import ContactImporter, open_csv
+from .models import ImportJob
+from .weather import queue_city_warmup
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+# Import threads submitted and not finished yet
+_active_threads = 0
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.CONTACT_IMPORT_WORKERS,
+                thread_name_prefix='contact-import',
+            )
+        return _executor
+
+
+def create_import_job(csv_file):
+    """Store an uploaded CSV file as a pending import job and queue it."""
+    fail_stale_jobs()
+    job = ImportJob.objects.create(file=csv_file, file_name=csv_file.name, file_size=csv_file.size)
+    transaction.on_commit(process_pending_jobs)
+    return job
+
+
+def process_pending_jobs():
+    """Start an import thread of this process on the queue, unless all of them are busy.
+
+    Threads take jobs with ``claim_next_job()``, so pending jobs left by a
+    restarted process are picked up too. Does nothing when
+    ``CONTACT_IMPORT_WORKERS`` leaves jobs to ``manage.py import_worker``.
+    """
+    global _active_threads
+    if not settings.CONTACT_IMPORT_WORKERS:
+        return
+    executor = _get_executor()
+    with _executor_lock:
+        if _active_threads >= settings.CONTACT_IMPORT_WORKERS:
+            return
+        _active_threads += 1
+    executor.submit(_run_in_thread)
+
+
+def check_import_queue():
+    """Fail abandoned jobs and make sure pending ones are being worked on; called by polls."""
+    fail_stale_jobs()
+    process_pending_jobs()
+
+
+def claim_job(job_id):
+    """Mark a pending job as running; return False if another worker took it first."""
+    now = timezone.now()
+    return bool(
+        ImportJob.objects.filter(pk=job_id, status=ImportJob.Status.PENDING)
+        .update(status=ImportJob.Status.RUNNING, started_at=now, heartbeat_at=now)
+    )
+
+
+def claim_next_job():
+    """Claim the oldest pending job and return its id, or None if the queue is empty."""
+    pending = ImportJob.objects.filter(status=ImportJob.Status.PENDING).order_by('created_at')
+    for job_id in pending.values_list('pk', flat=True)[:10]:
+        if claim_job(job_id):
+            return job_id
+    return None
+
+
+def fail_job(job_id, error, **filters):
+    """Mark a job failed and delete its upload; return False if ``filters`` no longer match it."""
+    job = ImportJob.objects.filter(pk=job_id, **filters).first()
+    if job is None:
+        return False
+    marked = ImportJob.objects.filter(pk=job_id, **filters).update(
+        status=ImportJob.Status.FAILED, error=error, finished_at=timezone.now(), file=''
+    )
+    if marked and job.file:
+        job.file.delete(save=False)
+    return bool(marked)
+
+
+def fail_stale_jobs():
+    """Mark jobs nothing will finish as failed; return the number of jobs marked.
+
+    A running job without progress for ``CONTACT_IMPORT_STALE_AFTER``
+    seconds lost its process (a restart, a kill). It is not queued again:
+    its earlier chunks are stored and a rerun would reject those rows as
+    duplicates. A job pending for as long while no import runs has no
+    process to take it, e.g. no ``manage.py import_worker`` is started.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CONTACT_IMPORT_STALE_AFTER)
+    running = ImportJob.objects.filter(status=ImportJob.Status.RUNNING)
+    failed = 0
+    for job_id in running.filter(heartbeat_at__lt=cutoff).values_list('pk', flat=True):
+        failed += fail_job(
+            job_id, 'Import został przerwany: proces importu przestał odpowiadać.',
+            status=ImportJob.Status.RUNNING, heartbeat_at__lt=cutoff,
+        )
+    if not running.exists():
+        pending = ImportJob.objects.filter(status=ImportJob.Status.PENDING, created_at__lt=cutoff)
+        for job_id in pending.values_list('pk', flat=True):
+            failed += fail_job(
+                job_id, 'Import nie został rozpoczęty: żaden proces importu nie działa.',
+                status=ImportJob.Status.PENDING,
+            )
+    return failed
+
+
+def run_import_job(job_id, validation_workers=1):
+    """Import the file of a claimed job, recording progress after every chunk.
+
+    Rows are validated inline by default: import threads of a web process
+    must not start a process pool next to the request workers.
+    ``manage.py import_worker`` passes ``CONTACT_IMPORT_VALIDATION_WORKERS``.
+    """
+    job = ImportJob.objects.get(pk=job_id)
+    try:
+        with job.file.open('rb') as csv_file:
+            binary_file = csv_file.file
+
+            def save_progress(importer):
+                ImportJob.objects.filter(pk=job_id).update(
+                    processed_bytes=binary_file.tell(),
+                    rows_processed=importer.rows_processed,
+                    created_count=importer.created_count,
+                    skipped_count=importer.skipped_count,
+                    rejections=importer.rejections,
+                    heartbeat_at=timezone.now(),
+                )
+
+            importer = ContactImporter().import_rows(
+                open_csv(binary_file), progress=save_progress, workers=validation_workers
+            )
+    except Exception as exc:
+        logger.exception('Import job %s failed', job_id)
+        fail_job(job_id, str(exc))
+        return
+
+    ImportJob.objects.filter(pk=job_id).update(
+        status=ImportJob.Status.DONE,
+        processed_bytes=job.file_size,
+        rows_processed=importer.rows_processed,
+        created_count=importer.created_count,
+        skipped_count=importer.skipped_count,
+        rejections=importer.rejections,
+        finished_at=timezone.now(),
+    )
+    job.file.delete(save=False)
+    ImportJob.objects.filter(pk=job_id).update(file='')
+
+    # Bulk inserts send no signals, so queue weather warm-up here
+    for city in importer.cities:
+        queue_city_warmup(city)
+
+
+def _run_in_thread():
+    global _active_threads
+    try:
+        while (job_id := claim_next_job()) is not None:
+            run_import_job(job_id)
+    finally:
+        with _executor_lock:
+            _active_threads -= 1
+        connection.close()
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+
+def _make_backend(backend, location):
+    params = {'TIMEOUT': 1800}
+    if backend == 'sqlite':
+        return SQLiteCache(location, params)
+    return LocMemCache(location, params)
+
+
+def _run_worker(args):
+    """Simulate weather lookups in one worker process; return its statistics."""
+    backend, location, requests, cities, upstream_ms, seed = args
+    cache = _make_backend(backend, location)
+    rng = random.Random(seed)
+    # Skewed popularity, like contact cities: a few large cities dominate
+    weights = [1 / (rank + 1) for rank in range(cities)]
+    names = [f'weather_city_{i}' for i in range(cities)]
+
+    hits = 0
+    latencies = []
+    for name in rng.choices(names, weights, k=requests):
+        start = time.perf_counter()
+        value = cache.get(name)
+        latencies.append(time.perf_counter() - start)
+        if value is not None:
+            hits += 1
+            continue
+        time.sleep(upstream_ms / 1000)
+        cache.set(name, {'city': name, 'temperature': 20.5, 'humidity': 60, 'wind_speed': 10})
+    return hits, latencies
+
+
+class Command(BaseCommand):
+    help = 'Compare hit ratio and latency of the locmem and SQLite cache backends across worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=2000, help='Lookups per worker')
+        parser.add_argument('--cities', type=int, default=200, help='Distinct cities')
+        parser.add_argument('--upstream-ms', type=float, default=5, help='Simulated upstream latency on a miss')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        self.stdout.write(
+            f"{workers} workers x {options['requests']} lookups, {options['cities']} cities, "
+            f"{options['upstream_ms']} ms per upstream call"
+        )
+        self.stdout.write(f"{'backend':<8} {'hit ratio':>9} {'upstream':>9} {'get p50':>10} {'get p99':>10} {'wall':>8}")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for backend in ('locmem', 'sqlite'):
+                location = os.path.join(tmpdir, 'bench.sqlite3') if backend == 'sqlite' else 'bench'
+                jobs = [
+                    (backend, location, options['requests'], options['cities'], options['upstream_ms'], seed)
+                    for seed in range(workers)
+                ]
+                start = time.perf_counter()
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    results = pool.map(_run_worker, jobs)
+                wall = time.perf_counter() - start
+
+                hits = sum(r[0] for r in results)
+                latencies = sorted(lat for r in results for lat in r[1])
+                total = len(latencies)
+                p50 = statistics.median(latencies) * 1e6
+                p99 = latencies[int(total * 0.99) - 1] * 1e6
+                self.stdout.write(
+                    f'{backend:<8} {hits / total:>9.1%} {total - hits:>9} '
+                    f'{p50:>8.0f}us {p99:>8.0f}us {wall:>7.2f}s'
+                )
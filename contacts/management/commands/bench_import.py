@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_save
+
+from contacts.importer import ContactImporter
+from contacts.models import Contact, ContactStatusChoices
+from contacts.signals import warm_weather_for_contact_city
+from contacts.validation import normalize_row
+
+
+STATUSES = ('nowy', 'w trakcie', 'zagubiony', 'nieaktualny')
+
+
+def generate_rows(count, duplicate_every=20):
+    """Yield CSV-like rows; every ``duplicate_every``-th row repeats an earlier email."""
+    for i in range(count):
+        n = i - 1 if duplicate_every and i and i % duplicate_every == 0 else i
+        yield {
+            'first_name': f'imię{i}',
+            'last_name': f'nazwisko{i}',
+            'phone_number': f'+48{500000000 + i}',
+            'email': f'kontakt{n}@example.com',
+            'city': ('warszawa', 'kraków', 'gdańsk', 'łódź')[i % 4],
+            'status': STATUSES[i % len(STATUSES)],
+        }
+
+
+def legacy_import(rows):
+    """Row-by-row import as done by the view before the bulk engine, for comparison."""
+    created = skipped = 0
+    default_status, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+    for row in rows:
+        row = normalize_row(row)
+        try:
+            status = ContactStatusChoices.objects.get(name__iexact=row['status'])
+        except ContactStatusChoices.DoesNotExist:
+            status = default_status
+        email = row['email'].lower()
+        phone = row['phone_number']
+        if Contact.objects.filter(email=email).exists() or Contact.objects.filter(phone_number=phone).exists():
+            skipped += 1
+            continue
+        Contact.objects.create(
+            first_name=row['first_name'].title(), last_name=row['last_name'].title(),
+            phone_number=phone, email=email, city=row['city'].title(), status=status
+        )
+        created += 1
+    return created, skipped
+
+
+class Command(BaseCommand):
+    help = 'Measure CSV import throughput on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None, help='Validation processes (default: setting)')
+        parser.add_argument(
+            '--legacy', action='store_true',
+            help='Also run the row-by-row import (slow; only for sizes up to 100k)'
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        # Weather warm-up would put network calls into the legacy timings
+        post_save.disconnect(warm_weather_for_contact_city, sender=Contact)
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for status in STATUSES:
+                ContactStatusChoices.objects.get_or_create(name=status)
+            self.stdout.write(f"{'engine':<8} {'rows':>9} {'created':>9} {'skipped':>8} {'time':>8} {'rows/s':>9}")
+            for count in options['rows']:
+                self._run('bulk', count, self._bulk(options['chunk_size'], options['workers']))
+                if options['legacy'] and count <= 100_000:
+                    self._run('legacy', count, legacy_import)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            post_save.connect(warm_weather_for_contact_city, sender=Contact)
+
+    def _bulk(self, chunk_size, workers):
+        def run(rows):
+            importer = ContactImporter(chunk_size=chunk_size).import_rows(rows, workers=workers)
+            return importer.created_count, importer.skipped_count
+        return run
+
+    def _run(self, engine, count, run):
+        Contact.objects.all().delete()
+        start = time.perf_counter()
+        created, skipped = run(generate_rows(count))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{engine:<8} {count:>9} {created:>9} {skipped:>8} {elapsed:>7.2f}s {count / elapsed:>9.0f}'
+        )
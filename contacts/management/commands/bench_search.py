@@ -0,0 +1,85 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_save
+
+from contacts.filters import RELEVANCE, filter_contacts, substring_search
+from contacts.models import Contact, ContactStatusChoices
+from contacts.search import fts_available
+from contacts.signals import warm_weather_for_contact_city
+
+
+FIRST_NAMES = ('Jan', 'Anna', 'Piotr', 'Łucja', 'Małgorzata', 'Krzysztof', 'Zofia', 'Paweł', 'Ewa', 'Michał')
+LAST_NAMES = ('Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk', 'Kamiński', 'Lewandowski', 'Żółkiewski')
+CITIES = ('Warszawa', 'Kraków', 'Łódź', 'Wrocław', 'Poznań', 'Gdańsk', 'Szczecin', 'Białystok', 'Opole')
+
+QUERIES = ('kowal', 'lodz', 'zolkiewski', 'anna nowak', '48500012', 'nieistniejacy')
+
+
+class Command(BaseCommand):
+    help = 'Compare substring (icontains) and FTS5 contact search on a throwaway database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+
+    def handle(self, *args, **options):
+        post_save.disconnect(warm_weather_for_contact_city, sender=Contact)
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # A file database: a million contacts with indexes do not fit comfortably in memory
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'bench_search.sqlite3')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                self._fill(options['rows'])
+                self._compare(options['repeat'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                connection.settings_dict['TEST']['NAME'] = None
+                post_save.connect(warm_weather_for_contact_city, sender=Contact)
+
+    def _fill(self, rows):
+        status, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for offset in range(0, rows, 5000):
+            Contact.objects.bulk_create([
+                Contact(
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    phone_number=f'+48{500000000 + i}',
+                    email=f'kontakt{i}@example.com',
+                    city=rng.choice(CITIES),
+                    status=status,
+                )
+                for i in range(offset, min(offset + 5000, rows))
+            ])
+        self.stdout.write(f'Inserted {rows} contacts in {time.perf_counter() - start:.1f}s (FTS: {fts_available()})')
+
+    def _time(self, build, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = build()
+            # What a list page does: count the matches and fetch the first page
+            total = queryset.count()
+            list(queryset[:10])
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000, total
+
+    def _compare(self, repeat):
+        self.stdout.write(f"{'query':<16} {'icontains':>11} {'fts5':>11} {'matches':>9} {'fts matches':>12}")
+        contacts = Contact.objects.all()
+        for query in QUERIES:
+            slow, slow_total = self._time(
+                lambda: substring_search(contacts, query).order_by('-date_added'), repeat
+            )
+            fast, fast_total = self._time(
+                lambda: filter_contacts(contacts, {'q': query, 'sort': RELEVANCE}), repeat
+            )
+            self.stdout.write(f'{query:<16} {slow:>9.1f}ms {fast:>9.1f}ms {slow_total:>9} {fast_total:>12}')
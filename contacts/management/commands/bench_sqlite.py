@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from contacts.writes import interactive_write, yield_to_interactive_writes
+
+BENCH_ALIAS = 'bench_sqlite'
+CITIES = ('Warszawa', 'Kraków', 'Gdańsk', 'Opole', 'Łódź', 'Poznań')
+SEED_ROWS = 10000
+
+
+def _create_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE bench_contact (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, city TEXT, n INTEGER)'
+    )
+    conn.execute('CREATE INDEX bench_contact_city ON bench_contact (city)')
+    conn.executemany(
+        'INSERT INTO bench_contact (name, city, n) VALUES (?, ?, 0)',
+        ((f'Kontakt {i}', CITIES[i % len(CITIES)]) for i in range(SEED_ROWS)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _connect(profile, path):
+    """Register the bench database under BENCH_ALIAS with the settings of ``profile``."""
+    databases = connections.configure_settings({
+        'default': settings.DATABASES['default'],
+        BENCH_ALIAS: {**settings.DATABASE_PROFILES[profile], 'NAME': path},
+    })
+    connections.settings[BENCH_ALIAS] = databases[BENCH_ALIAS]
+    return connections[BENCH_ALIAS]
+
+
+def _run_worker(args):
+    """Run one role until the deadline; return (role, operations, lock errors, latencies)."""
+    role, profile, path, seconds, use_yield, chunk_size, seed = args
+    connection = _connect(profile, path)
+    rng = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    operations = errors = 0
+    latencies = []
+
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            if role == 'reader':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT id, name FROM bench_contact WHERE city = %s ORDER BY id DESC LIMIT 20',
+                        [rng.choice(CITIES)],
+                    )
+                    cursor.fetchall()
+                operations += 1
+            elif role == 'writer':
+                # Read, then write in one transaction, like a form save
+                with interactive_write(), transaction.atomic(using=BENCH_ALIAS), connection.cursor() as cursor:
+                    pk = rng.randint(1, SEED_ROWS)
+                    cursor.execute('SELECT n FROM bench_contact WHERE id = %s', [pk])
+                    cursor.fetchone()
+                    cursor.execute('UPDATE bench_contact SET n = n + 1 WHERE id = %s', [pk])
+                operations += 1
+                latencies.append(time.perf_counter() - start)
+                # Time between one user's saves
+                time.sleep(0.005)
+            else:
+                if use_yield:
+                    yield_to_interactive_writes()
+                with transaction.atomic(using=BENCH_ALIAS), connection.cursor() as cursor:
+                    cursor.executemany(
+                        'INSERT INTO bench_contact (name, city, n) VALUES (%s, %s, 0)',
+                        [(f'Import {seed}-{i}', rng.choice(CITIES)) for i in range(chunk_size)],
+                    )
+                operations += chunk_size
+        except OperationalError as exc:
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            errors += 1
+    connection.close()
+    return role, operations, errors, latencies
+
+
+def run_bench(profile, seconds=5, readers=4, writers=4, imports=1, use_yield=True, chunk_size=2000):
+    """Run readers, interactive writers and imports as separate processes on a new database.
+
+    Returns per-role totals: ``operations`` (reads, saves or imported rows),
+    ``errors`` ("database is locked") and, for writers, save ``latencies``.
+    """
+    roles = ['reader'] * readers + ['writer'] * writers + ['import'] * imports
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'bench.sqlite3')
+        _create_database(path)
+        jobs = [(role, profile, path, seconds, use_yield, chunk_size, seed) for seed, role in enumerate(roles)]
+        # Forked workers must not share the parent's connections
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(len(jobs)) as pool:
+            results = pool.map(_run_worker, jobs)
+
+    stats = {role: {'operations': 0, 'errors': 0, 'latencies': []} for role in ('reader', 'writer', 'import')}
+    for role, operations, errors, latencies in results:
+        stats[role]['operations'] += operations
+        stats[role]['errors'] += errors
+        stats[role]['latencies'].extend(latencies)
+    return stats
+
+
+class Command(BaseCommand):
+    help = 'Measure SQLite throughput and lock errors of the database profiles under parallel readers and writers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4, help='Reading processes')
+        parser.add_argument('--writers', type=int, default=4, help='Processes saving single contacts')
+        parser.add_argument('--imports', type=int, default=1, help='Processes inserting chunks')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows per import transaction')
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, {options['imports']} imports, "
+            f'{seconds:g}s per profile'
+        )
+        self.stdout.write(
+            f"{'profile':<24} {'reads/s':>9} {'saves/s':>8} {'save p50':>9} {'save p99':>9} "
+            f"{'rows/s':>8} {'lock errors':>11}"
+        )
+        runs = (('development', True), ('production', False), ('production', True))
+        for profile, use_yield in runs:
+            stats = run_bench(
+                profile, seconds, options['readers'], options['writers'], options['imports'],
+                use_yield, options['chunk_size'],
+            )
+            latencies = sorted(stats['writer']['latencies']) or [0]
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+            errors = sum(role['errors'] for role in stats.values())
+            label = profile if use_yield else f'{profile} (no yield)'
+            self.stdout.write(
+                f"{label:<24} {stats['reader']['operations'] / seconds:>9.0f} "
+                f"{stats['writer']['operations'] / seconds:>8.0f} {p50:>7.1f}ms {p99:>7.1f}ms "
+                f"{stats['import']['operations'] / seconds:>8.0f} {errors:>11}"
+            )
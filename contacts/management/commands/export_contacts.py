@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from contacts.export import EXPORT_FORMATS, export_contacts
+from contacts.filters import SORT_FIELDS, filter_contacts
+from contacts.models import Contact
+
+
+class Command(BaseCommand):
+    help = 'Stream contacts as CSV (importable) or NDJSON, with the same filters as the contact list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--q', default='', help='Search phrase')
+        parser.add_argument('--status', default='', help='Status id')
+        parser.add_argument('--sort', choices=SORT_FIELDS, default='date_added')
+        parser.add_argument('--order', choices=('asc', 'desc'), default='desc')
+        parser.add_argument('--output', '-o', help='Output file (default: standard output)')
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('q', 'status', 'sort', 'order')}
+        queryset = filter_contacts(Contact.objects.all(), params)
+
+        pieces = export_contacts(queryset, options['format'])
+        if not options['output']:
+            for piece in pieces:
+                self.stdout.write(piece, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as out:
+            out.writelines(pieces)
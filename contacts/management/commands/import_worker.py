@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from contacts.jobs import claim_next_job, fail_stale_jobs, run_import_job
+from contacts.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Process pending CSV import jobs from the database queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of waiting for new jobs',
+        )
+
+    def handle(self, *args, **options):
+        interval = settings.CONTACT_IMPORT_POLL_INTERVAL
+        while True:
+            stale = fail_stale_jobs()
+            if stale:
+                self.stderr.write(f'Przerwane importy oznaczone jako błędne: {stale}')
+            job_id = claim_next_job()
+            if job_id is None:
+                if options['once']:
+                    return
+                time.sleep(interval)
+                continue
+
+            run_import_job(job_id, validation_workers=settings.CONTACT_IMPORT_VALIDATION_WORKERS)
+            job = ImportJob.objects.get(pk=job_id)
+            self.stdout.write(
+                f'Import #{job.pk} ({job.file_name}): {job.get_status_display()}, '
+                f'dodano: {job.created_count}, pominięto: {job.skipped_count}'
+            )
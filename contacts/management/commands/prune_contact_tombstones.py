@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from contacts.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete contact deletion records older than CONTACT_TOMBSTONE_RETENTION_DAYS from the change log.'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Usunięte wpisy o usuniętych kontaktach starsze niż {settings.CONTACT_TOMBSTONE_RETENTION_DAYS} dni: {deleted}'
+        ))
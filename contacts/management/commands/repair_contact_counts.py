@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from contacts.counters import repair_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount contacts per status and correct the stored counters.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        fixes = repair_counters(options['database'])
+        for status, stored, actual in fixes:
+            self.stdout.write(f"{status}: {'brak' if stored is None else stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f'Poprawione liczniki: {len(fixes)}'))
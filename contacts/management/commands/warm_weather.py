@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from contacts.weather import warm_contact_cities
+
+
+class Command(BaseCommand):
+    help = 'Prefetch weather for all distinct contact cities into the weather cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Refresh every city, including ones with fresh cache entries',
+        )
+
+    def handle(self, *args, **options):
+        stats = warm_contact_cities(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Miasta: {stats['cities']}, odświeżone: {stats['warmed']}, aktualne: {stats['fresh']}, "
+            f"nieznalezione: {stats['not_found']}, błędy: {stats['failed']}"
+        ))
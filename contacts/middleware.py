@@ -0,0 +1,32 @@
+from django.urls import Resolver404, resolve
+
+from .writes import interactive_write
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Views of the ``contacts`` namespace that write contacts
+CONTACT_WRITE_VIEWS = frozenset({'create', 'update', 'delete', 'api-list', 'api-detail', 'api-bulk'})
+
+
+def writes_contacts(request):
+    """Return whether a request may write contacts."""
+    if request.method in SAFE_METHODS:
+        return False
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return False
+    return match.namespace == 'contacts' and match.url_name in CONTACT_WRITE_VIEWS
+
+
+class InteractiveWriteMiddleware:
+    """Count requests that may write contacts as interactive writes, which imports yield to."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not writes_contacts(request):
+            return self.get_response(request)
+        with interactive_write():
+            return self.get_response(request)
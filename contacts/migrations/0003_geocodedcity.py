@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0002_seed_statuses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedCity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Znormalizowana nazwa miasta (małe litery)', max_length=100, unique=True, verbose_name='Nazwa miasta')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Szerokość geograficzna')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Długość geograficzna')),
+                ('found', models.BooleanField(default=True, help_text='Czy usługa geokodowania rozpoznała miasto', verbose_name='Znaleziono')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Data aktualizacji')),
+            ],
+            options={
+                'verbose_name': 'Lokalizacja miasta',
+                'verbose_name_plural': 'Lokalizacje miast',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_geocodedcity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField(verbose_name='Szerokość geograficzna')),
+                ('longitude', models.FloatField(verbose_name='Długość geograficzna')),
+                ('starts_at', models.DateTimeField(help_text='Czas pierwszej godziny w serii', verbose_name='Początek prognozy')),
+                ('hours', models.PositiveSmallIntegerField(verbose_name='Liczba godzin')),
+                ('series', models.BinaryField(help_text='Spakowane serie float32, jedna po drugiej', verbose_name='Dane godzinowe')),
+                ('fetched_at', models.DateTimeField(auto_now=True, verbose_name='Data pobrania')),
+            ],
+            options={
+                'verbose_name': 'Prognoza pogody',
+                'verbose_name_plural': 'Prognozy pogody',
+                'constraints': [models.UniqueConstraint(fields=('latitude', 'longitude'), name='unique_forecast_location')],
+            },
+        ),
+    ]
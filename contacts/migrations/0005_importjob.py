@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0004_weatherforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(blank=True, help_text='Przesłany plik CSV; usuwany po zakończeniu importu', upload_to='imports/', verbose_name='Plik')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Nazwa pliku')),
+                ('file_size', models.PositiveBigIntegerField(verbose_name='Rozmiar pliku')),
+                ('status', models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('done', 'Zakończony'), ('failed', 'Błąd')], default='pending', max_length=10, verbose_name='Status')),
+                ('processed_bytes', models.PositiveBigIntegerField(default=0, verbose_name='Przetworzone bajty')),
+                ('rows_processed', models.PositiveIntegerField(default=0, verbose_name='Przetworzone wiersze')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Dodane kontakty')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Pominięte wiersze')),
+                ('rejections', models.JSONField(blank=True, default=list, help_text='Lista {line, reason} dla pominiętych wierszy', verbose_name='Odrzucone wiersze')),
+                ('error', models.TextField(blank=True, help_text='Przyczyna niepowodzenia importu', verbose_name='Błąd')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data utworzenia')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Data rozpoczęcia')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Data zakończenia')),
+            ],
+            options={
+                'verbose_name': 'Import kontaktów',
+                'verbose_name_plural': 'Importy kontaktów',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='contacts_im_status_cec29f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+FTS_TABLE = 'contacts_contact_fts'
+FTS_COLUMNS = ('first_name', 'last_name', 'email', 'city', 'phone_number')
+COLUMNS = ', '.join(FTS_COLUMNS)
+
+
+def values(prefix):
+    """Column values with ł/Ł folded, which remove_diacritics does not cover."""
+    return ', '.join(
+        f"replace(replace({prefix}{column}, 'ł', 'l'), 'Ł', 'L')" for column in FTS_COLUMNS
+    )
+
+
+def create_fts_index(apps, schema_editor):
+    """Create the FTS5 index, its sync triggers and fill it; SQLite only."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({COLUMNS}, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(f"""
+        CREATE TRIGGER contacts_contact_fts_insert AFTER INSERT ON contacts_contact BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {COLUMNS}) VALUES (new.id, {values('new.')});
+        END
+    """)
+    schema_editor.execute(f"""
+        CREATE TRIGGER contacts_contact_fts_update AFTER UPDATE OF {COLUMNS} ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, {COLUMNS}) VALUES (new.id, {values('new.')});
+        END
+    """)
+    schema_editor.execute(f"""
+        CREATE TRIGGER contacts_contact_fts_delete AFTER DELETE ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """)
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, {COLUMNS}) SELECT id, {values('')} FROM contacts_contact"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for action in ('insert', 'update', 'delete'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS contacts_contact_fts_{action}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0006_contact_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
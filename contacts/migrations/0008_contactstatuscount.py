@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+COUNTER_TABLE = 'contacts_contactstatuscount'
+
+TRIGGERS = {
+    # Every status gets its counter row, so contact triggers only need UPDATEs
+    'contacts_status_count_create': f"""
+        AFTER INSERT ON contacts_contactstatuschoices BEGIN
+            INSERT OR IGNORE INTO {COUNTER_TABLE} (status_id, count) VALUES (new.id, 0);
+        END
+    """,
+    'contacts_contact_count_insert': f"""
+        AFTER INSERT ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+    'contacts_contact_count_delete': f"""
+        AFTER DELETE ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+        END
+    """,
+    'contacts_contact_count_update': f"""
+        AFTER UPDATE OF status_id ON contacts_contact WHEN old.status_id <> new.status_id BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+}
+
+
+def create_counters(apps, schema_editor):
+    """Fill the counters and, on SQLite, install the triggers that maintain them."""
+    ContactStatusChoices = apps.get_model('contacts', 'ContactStatusChoices')
+    ContactStatusCount = apps.get_model('contacts', 'ContactStatusCount')
+    db_alias = schema_editor.connection.alias
+    statuses = ContactStatusChoices.objects.using(db_alias).annotate(total=models.Count('contacts'))
+    ContactStatusCount.objects.using(db_alias).bulk_create(
+        ContactStatusCount(status_id=status.pk, count=status.total) for status in statuses
+    )
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, body in TRIGGERS.items():
+        schema_editor.execute(f'CREATE TRIGGER {name} {body}')
+
+
+def drop_counters(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0007_contact_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactStatusCount',
+            fields=[
+                ('status', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contact_count', serialize=False, to='contacts.contactstatuschoices', verbose_name='Status')),
+                ('count', models.IntegerField(default=0, verbose_name='Liczba kontaktów')),
+            ],
+            options={
+                'verbose_name': 'Licznik kontaktów',
+                'verbose_name_plural': 'Liczniki kontaktów',
+            },
+        ),
+        migrations.RunPython(create_counters, drop_counters),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:22
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+FTS_TABLE = 'contacts_contact_fts'
+FTS_COLUMNS = 'first_name, last_name, email, city, phone_number'
+COUNTER_TABLE = 'contacts_contactstatuscount'
+CHANGE_TABLE = 'contacts_contactchange'
+
+# Same text format as Django's SQLite datetime columns (UTC)
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# ł/Ł folded, which remove_diacritics does not cover
+FTS_VALUES = ', '.join(
+    f"replace(replace(new.{column}, 'ł', 'l'), 'Ł', 'L')" for column in FTS_COLUMNS.split(', ')
+)
+
+
+def record_change(row, deleted):
+    return f"""
+        DELETE FROM {CHANGE_TABLE} WHERE contact_id = {row}.id;
+        INSERT INTO {CHANGE_TABLE} (contact_id, deleted, changed_at) VALUES ({row}.id, {deleted}, {NOW});
+    """
+
+
+CHANGE_TRIGGERS = {
+    'contacts_contact_change_insert': f"AFTER INSERT ON contacts_contact BEGIN {record_change('new', 0)} END",
+    'contacts_contact_change_update': f"AFTER UPDATE ON contacts_contact BEGIN {record_change('new', 0)} END",
+    'contacts_contact_change_delete': f"AFTER DELETE ON contacts_contact BEGIN {record_change('old', 1)} END",
+}
+
+# Triggers of migrations 0007 and 0008, dropped when the contact table was remade
+RESTORED_TRIGGERS = {
+    'contacts_contact_fts_insert': f"""
+        AFTER INSERT ON contacts_contact BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) VALUES (new.id, {FTS_VALUES});
+        END
+    """,
+    'contacts_contact_fts_update': f"""
+        AFTER UPDATE OF {FTS_COLUMNS} ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) VALUES (new.id, {FTS_VALUES});
+        END
+    """,
+    'contacts_contact_fts_delete': f"""
+        AFTER DELETE ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    'contacts_contact_count_insert': f"""
+        AFTER INSERT ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+    'contacts_contact_count_delete': f"""
+        AFTER DELETE ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+        END
+    """,
+    'contacts_contact_count_update': f"""
+        AFTER UPDATE OF status_id ON contacts_contact WHEN old.status_id <> new.status_id BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+}
+
+
+def create_change_log(apps, schema_editor):
+    """Fill the change log with existing contacts and, on SQLite, install its triggers.
+
+    Adding ``updated_at`` remade the contact table, which dropped the search
+    and counter triggers; they are installed again too.
+    """
+    Contact = apps.get_model('contacts', 'Contact')
+    ContactChange = apps.get_model('contacts', 'ContactChange')
+    db_alias = schema_editor.connection.alias
+    Contact.objects.using(db_alias).update(updated_at=F('date_added'))
+    ContactChange.objects.using(db_alias).bulk_create(
+        ContactChange(contact_id=contact_id, changed_at=date_added)
+        for contact_id, date_added in Contact.objects.using(db_alias).order_by('pk').values_list('pk', 'date_added')
+    )
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, body in {**RESTORED_TRIGGERS, **CHANGE_TRIGGERS}.items():
+        schema_editor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+
+def drop_change_log(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in CHANGE_TRIGGERS:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0008_contactstatuscount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Data i czas ostatniej zmiany kontaktu', verbose_name='Data modyfikacji'),
+        ),
+        migrations.CreateModel(
+            name='ContactChange',
+            fields=[
+                ('seq', models.AutoField(primary_key=True, serialize=False, verbose_name='Numer zmiany')),
+                ('contact_id', models.PositiveBigIntegerField(unique=True, verbose_name='Kontakt')),
+                ('deleted', models.BooleanField(default=False, verbose_name='Usunięty')),
+                ('changed_at', models.DateTimeField(verbose_name='Data zmiany')),
+            ],
+            options={
+                'verbose_name': 'Zmiana kontaktu',
+                'verbose_name_plural': 'Zmiany kontaktów',
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['deleted', 'changed_at'], name='contacts_co_deleted_0e80d3_idx')],
+            },
+        ),
+        migrations.RunPython(create_change_log, drop_change_log),
+    ]
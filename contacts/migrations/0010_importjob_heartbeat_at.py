@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0009_contact_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Aktualizowany przez proces importu po każdej partii wierszy', null=True, verbose_name='Ostatni postęp'),
+        ),
+    ]
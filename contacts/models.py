@@ -32,7 +32,14 @@ class ContactStatusChoices(models.Model):
 
     def get_contact_count(self):
         """Return number of contacts with this status."""
-        return self.contact_set.count()
+        from .counters import counters_available
+
+        if counters_available(self._state.db or 'default'):
+            try:
+                return self.contact_count.count
+            except ContactStatusCount.DoesNotExist:
+                pass
+        return self.contacts.count()
 
     def __str__(self):
         return self.name
@@ -87,6 +94,13 @@ class Contact(models.Model):
         help_text="Data i czas dodania kontaktu do systemu"
     )
 
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Data modyfikacji",
+        help_text="Data i czas ostatniej zmiany kontaktu"
+    )
+
     # Foreign key relation
     status = models.ForeignKey(
         ContactStatusChoices,
@@ -102,13 +116,268 @@ class Contact(models.Model):
         ordering = ['-date_added']
         indexes = [
             models.Index(fields=['last_name', 'first_name']),
-            models.Index(fields=['-date_added']),
+            # Keyset pagination: one (sort field, id) index per list sort
+            models.Index(fields=['date_added', 'id'], name='contact_date_added_id_idx'),
+            models.Index(fields=['last_name', 'id'], name='contact_last_name_id_idx'),
+            models.Index(fields=['first_name', 'id'], name='contact_first_name_id_idx'),
+            models.Index(fields=['city', 'id'], name='contact_city_id_idx'),
+            # The same orderings within one status
+            models.Index(fields=['status', 'date_added', 'id'], name='contact_status_date_added_idx'),
+            models.Index(fields=['status', 'last_name', 'id'], name='contact_status_last_name_idx'),
+            models.Index(fields=['status', 'first_name', 'id'], name='contact_status_first_name_idx'),
+            models.Index(fields=['status', 'city', 'id'], name='contact_status_city_idx'),
         ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded city, so saves can tell whether it changed."""
+        instance = super().from_db(db, field_names, values)
+        if 'city' in field_names:
+            instance.loaded_city = values[field_names.index('city')]
+        return instance
+
     def get_absolute_url(self):
         """Return URL for contact detail view."""
         return reverse('contacts:detail', kwargs={'pk': self.pk})
 
+
+class ContactChange(models.Model):
+    """Latest change of each contact, in commit order, for the change feed.
+
+    Rows are written by database triggers (migration 0009): every insert or
+    update of a contact replaces its row with a new ``seq``, a delete with a
+    tombstone (``deleted=True``). See ``contacts.changes``.
+    """
+
+    seq = models.AutoField(primary_key=True, verbose_name="Numer zmiany")
+
+    contact_id = models.PositiveBigIntegerField(unique=True, verbose_name="Kontakt")
+
+    deleted = models.BooleanField(default=False, verbose_name="Usunięty")
+
+    changed_at = models.DateTimeField(verbose_name="Data zmiany")
+
+    class Meta:
+        verbose_name = "Zmiana kontaktu"
+        verbose_name_plural = "Zmiany kontaktów"
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['deleted', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {'usunięto' if self.deleted else 'zapisano'} {self.contact_id}"
+
+
+class ContactStatusCount(models.Model):
+    """Number of contacts per status, kept current by database triggers.
+
+    See ``contacts.counters``; the ``repair_contact_counts`` command
+    recounts them if they ever drift.
+    """
+
+    status = models.OneToOneField(
+        ContactStatusChoices,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='contact_count',
+        verbose_name="Status"
+    )
+
+    # Not PositiveIntegerField: a drifted counter must not make deletes fail its CHECK
+    count = models.IntegerField(default=0, verbose_name="Liczba kontaktów")
+
+    class Meta:
+        verbose_name = "Licznik kontaktów"
+        verbose_name_plural = "Liczniki kontaktów"
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class GeocodedCity(models.Model):
+    """Cached geocoding result for a normalized city name.
+
+    Cities that could not be resolved are stored with ``found=False`` and
+    are looked up again only after ``GEOCODE_NOT_FOUND_TIMEOUT``.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Nazwa miasta",
+        help_text="Znormalizowana nazwa miasta (małe litery)"
+    )
+
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Szerokość geograficzna"
+    )
+
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Długość geograficzna"
+    )
+
+    found = models.BooleanField(
+        default=True,
+        verbose_name="Znaleziono",
+        help_text="Czy usługa geokodowania rozpoznała miasto"
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Data aktualizacji"
+    )
+
+    class Meta:
+        verbose_name = "Lokalizacja miasta"
+        verbose_name_plural = "Lokalizacje miast"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class WeatherForecast(models.Model):
+    """Hourly forecast window for one location.
+
+    The hourly series (see ``contacts.forecast.SERIES``) are stored as one
+    packed float32 array, so a single upstream fetch can answer "current"
+    weather for every hour of the forecast horizon.
+    """
+
+    latitude = models.FloatField(verbose_name="Szerokość geograficzna")
+
+    longitude = models.FloatField(verbose_name="Długość geograficzna")
+
+    starts_at = models.DateTimeField(
+        verbose_name="Początek prognozy",
+        help_text="Czas pierwszej godziny w serii"
+    )
+
+    hours = models.PositiveSmallIntegerField(
+        verbose_name="Liczba godzin"
+    )
+
+    series = models.BinaryField(
+        verbose_name="Dane godzinowe",
+        help_text="Spakowane serie float32, jedna po drugiej"
+    )
+
+    fetched_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Data pobrania"
+    )
+
+    class Meta:
+        verbose_name = "Prognoza pogody"
+        verbose_name_plural = "Prognozy pogody"
+        constraints = [
+            models.UniqueConstraint(fields=['latitude', 'longitude'], name='unique_forecast_location'),
+        ]
+
+    def __str__(self):
+        return f"{self.latitude}, {self.longitude} ({self.starts_at:%Y-%m-%d %H:%M}, {self.hours} h)"
+
+
+class ImportJob(models.Model):
+    """CSV import run in the background, with progress counters for polling."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Oczekuje'
+        RUNNING = 'running', 'W trakcie'
+        DONE = 'done', 'Zakończony'
+        FAILED = 'failed', 'Błąd'
+
+    file = models.FileField(
+        upload_to='imports/',
+        blank=True,
+        verbose_name="Plik",
+        help_text="Przesłany plik CSV; usuwany po zakończeniu importu"
+    )
+
+    file_name = models.CharField(
+        max_length=255,
+        verbose_name="Nazwa pliku"
+    )
+
+    file_size = models.PositiveBigIntegerField(
+        verbose_name="Rozmiar pliku"
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Status"
+    )
+
+    processed_bytes = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Przetworzone bajty"
+    )
+
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name="Przetworzone wiersze")
+
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Dodane kontakty")
+
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name="Pominięte wiersze")
+
+    rejections = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Odrzucone wiersze",
+        help_text="Lista {line, reason} dla pominiętych wierszy"
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name="Błąd",
+        help_text="Przyczyna niepowodzenia importu"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data utworzenia")
+
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Data rozpoczęcia")
+
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Data zakończenia")
+
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Ostatni postęp",
+        help_text="Aktualizowany przez proces importu po każdej partii wierszy"
+    )
+
+    class Meta:
+        verbose_name = "Import kontaktów"
+        verbose_name_plural = "Importy kontaktów"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """Return completion in percent, estimated from the bytes read."""
+        if self.status == self.Status.DONE:
+            return 100
+        if not self.file_size:
+            return 0
+        return min(99, int(self.processed_bytes * 100 / self.file_size))
+
+    @property
+    def finished(self):
+        return self.status in (self.Status.DONE, self.Status.FAILED)
+
+    def get_absolute_url(self):
+        return reverse('contacts:import-job', kwargs={'pk': self.pk})
@@ -0,0 +1,179 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counters import count_for_params
+from .filters import DEFAULT_SORT, RELEVANCE, SORT_FIELDS, get_sort
+
+
+class InvalidCursor(Exception):
+    """Raised for a cursor that cannot be decoded or belongs to another sort order."""
+
+
+def encode_cursor(position):
+    data = json.dumps(position, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class KeysetPage:
+    """One page of keyset pagination with cursors of its neighbours."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def paginate_keyset(queryset, sort_by, descending, cursor, page_size):
+    """Return a KeysetPage of ``queryset`` ordered by (``sort_by``, id).
+
+    The cursor holds the sort value and id of the row the page starts after
+    (or, for backward cursors, before), so each page is a range scan of the
+    matching (field, id) index whatever its depth. Raises ``InvalidCursor``.
+    """
+    backward = False
+    if cursor:
+        position = decode_cursor(cursor)
+        if not isinstance(position, dict) or (position.get('sort'), position.get('desc')) != (sort_by, descending):
+            raise InvalidCursor(cursor)
+        backward = bool(position.get('back'))
+        try:
+            value = queryset.model._meta.get_field(sort_by).to_python(position['value'])
+            pk = int(position['id'])
+        except (KeyError, TypeError, ValueError, ValidationError) as exc:
+            raise InvalidCursor(cursor) from exc
+        lookup = 'lt' if descending != backward else 'gt'
+        # (field, id) past the cursor; the redundant lte/gte bound lets SQLite seek the index
+        queryset = queryset.filter(**{f'{sort_by}__{lookup}e': value}).filter(
+            Q(**{f'{sort_by}__{lookup}': value}) | Q(**{f'pk__{lookup}': pk})
+        )
+
+    prefix = '-' if descending != backward else ''
+    rows = list(queryset.order_by(f'{prefix}{sort_by}', f'{prefix}pk')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backward:
+        rows.reverse()
+
+    def cursor_for(row, back):
+        # Rows are model instances, or dicts from values() including sort_by and id
+        if isinstance(row, dict):
+            value, pk = row[sort_by], row['id']
+        else:
+            value, pk = getattr(row, sort_by), row.pk
+        # Full precision: rows added within the same millisecond must stay apart
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return encode_cursor({'sort': sort_by, 'desc': descending, 'back': back, 'value': value, 'id': pk})
+
+    has_next = bool(cursor) if backward else has_more
+    has_previous = has_more if backward else bool(cursor)
+    return KeysetPage(
+        rows,
+        next_cursor=cursor_for(rows[-1], False) if rows and has_next else None,
+        previous_cursor=cursor_for(rows[0], True) if rows and has_previous else None,
+    )
+
+
+class CountedPaginator(Paginator):
+    """Paginator that takes the total from ``count`` when it is already known."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """Page-number pagination reading unsearched totals from the contact counters."""
+
+    known_count = None
+
+    def django_paginator_class(self, object_list, per_page):
+        return CountedPaginator(object_list, per_page, count=self.known_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.known_count = count_for_params(request.query_params, queryset.db)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ContactPagination(BasePagination):
+    """Page-number pagination, or keyset pagination when ``cursor`` is passed.
+
+    ``?cursor=`` (empty for the first page) switches to keyset mode, which
+    answers ``next``/``previous`` links without counting the result set.
+    """
+
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.page_number = CountedPageNumberPagination()
+        self.page_size = self.page_number.page_size
+        self.keyset_page = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is None:
+            self.keyset_page = None
+            return self.page_number.paginate_queryset(queryset, request, view)
+
+        sort_by, descending = get_sort(request.query_params, getattr(view, 'sort_fields', SORT_FIELDS))
+        if sort_by == RELEVANCE:
+            # Ranks are not stable positions; cursors walk search results by date
+            sort_by, descending = DEFAULT_SORT, True
+        try:
+            self.keyset_page = paginate_keyset(queryset, sort_by, descending, cursor, self.page_size)
+        except InvalidCursor:
+            raise NotFound('Nieprawidłowy kursor')
+        return self.keyset_page.object_list
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return self.page_number.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_link(self.keyset_page.next_cursor)),
+            ('previous', self.get_link(self.keyset_page.previous_cursor)),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when an upstream call is rejected without being attempted."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised when the circuit breaker for an upstream host is open."""
+
+
+class BulkheadFullError(UpstreamUnavailable):
+    """Raised when all upstream call slots are taken."""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for a single upstream host.
+
+    The outcomes of the last ``window`` calls are tracked. Once at least
+    ``min_calls`` were made and the failure rate reaches ``failure_rate``
+    the circuit opens and calls fail fast for ``open_seconds``. After that
+    a single trial call is let through (half-open): success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=20, open_seconds=30):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name)
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name)
+                self._trial_in_flight = True
+
+    def _after_call(self, success):
+        """Record a call outcome; ``None`` means the call was not really attempted."""
+        with self._lock:
+            if success is None:
+                self._trial_in_flight = False
+                return
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                self._outcomes.clear()
+                if success:
+                    self._state = self.CLOSED
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self._state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """Call ``func`` through the breaker; ``RequestException`` counts as failure."""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except requests.RequestException:
+            self._after_call(False)
+            raise
+        except BaseException:
+            # Not an upstream failure, but release a half-open trial slot
+            self._after_call(None)
+            raise
+        self._after_call(True)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        """Async variant of ``call`` for coroutine functions."""
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except requests.RequestException:
+            self._after_call(False)
+            raise
+        except BaseException:
+            self._after_call(None)
+            raise
+        self._after_call(True)
+        return result
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def snapshot(self):
+        """Return breaker state and recent failure statistics."""
+        state = self.state
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = self._outcomes.count(False)
+            return {
+                'state': state,
+                'recent_calls': calls,
+                'recent_failures': failures,
+                'failure_rate': round(failures / calls, 3) if calls else 0.0,
+                'rejected_calls': self._rejected,
+            }
+
+
+class Bulkhead:
+    """Limit of concurrent upstream calls within a worker process."""
+
+    def __init__(self, name, max_concurrent, acquire_timeout=0.5):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._rejected = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold one call slot, raising ``BulkheadFullError`` if none frees up in time."""
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise BulkheadFullError(self.name)
+        with self._lock:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._semaphore.release()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'active_calls': self._active,
+                'rejected_calls': self._rejected,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Shared by all weather upstream calls (Nominatim and Open-Meteo)
+weather_bulkhead = Bulkhead(
+    'weather',
+    max_concurrent=settings.WEATHER_MAX_CONCURRENT_CALLS,
+    acquire_timeout=settings.WEATHER_BULKHEAD_TIMEOUT,
+)
+
+
+def get_breaker(host):
+    """Return the circuit breaker for an upstream host, creating it if needed."""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host,
+                failure_rate=settings.WEATHER_BREAKER_FAILURE_RATE,
+                min_calls=settings.WEATHER_BREAKER_MIN_CALLS,
+                window=settings.WEATHER_BREAKER_WINDOW,
+                open_seconds=settings.WEATHER_BREAKER_OPEN_SECONDS,
+            )
+        return breaker
+
+
+def guarded_get(url, session=None, **kwargs):
+    """HTTP GET through the host's circuit breaker and the weather bulkhead.
+
+    Uses ``session`` when given, plain ``requests`` otherwise. HTTP error
+    statuses are raised, so they count as failures.
+    """
+    breaker = get_breaker(urlparse(url).netloc)
+    http = session or requests
+
+    def get():
+        with weather_bulkhead.slot():
+            response = http.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    return breaker.call(get)
+
+
+def get_resilience_stats():
+    """Return state of all circuit breakers and the weather bulkhead."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {
+        'circuit_breakers': {host: breaker.snapshot() for host, breaker in breakers.items()},
+        'bulkhead': weather_bulkhead.snapshot(),
+    }
@@ -0,0 +1,120 @@
+import hashlib
+import pickle
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .conditional import VersionedViewMixin
+from .versions import get_generation
+
+
+class ResponseCache:
+    """Responses of contact list views, shared by all worker processes.
+
+    Keys carry the contacts version (latest change log ``seq``) and the
+    statuses generation, so any write starts a new set of keys; entries of
+    older versions are never read again and expire on their own.
+
+    Entries are stored pickled, which lets hits and stores be counted in
+    bytes. Counters live in the shared cache, like those of ``SingleFlight``.
+    """
+
+    COUNTERS = ('hits', 'misses', 'stored_bytes', 'served_bytes')
+
+    def __init__(self, name):
+        self.name = name
+
+    def make_key(self, version_key, version, params, *variants):
+        """Return the cache key of a view's response for the given query params.
+
+        Params are sorted, so their order in the URL does not matter.
+        """
+        seq, changed_at = version
+        request_id = repr((sorted(params.lists()), *variants))
+        digest = hashlib.sha1(request_id.encode()).hexdigest()
+        # changed_at guards against a seq reused after the change log was recreated
+        return (f'contacts:response:{self.name}:{version_key}:{seq}:{changed_at.timestamp()}:'
+                f'{get_generation("statuses")}:{digest}')
+
+    def get(self, key):
+        """Return the entry stored under ``key``, or None."""
+        blob = cache.get(key)
+        if blob is None:
+            self._incr('misses')
+            return None
+        self._incr('hits')
+        self._incr('served_bytes', len(blob))
+        return pickle.loads(blob)
+
+    def set(self, key, entry):
+        blob = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        cache.set(key, blob, settings.CONTACT_RESPONSE_CACHE_TIMEOUT)
+        self._incr('stored_bytes', len(blob))
+
+    def _counter_key(self, counter):
+        return f'response_cache_{self.name}_{counter}'
+
+    def _incr(self, counter, delta=1):
+        key = self._counter_key(counter)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+
+    def get_stats(self):
+        """Return counters, including the share of lookups served from the cache."""
+        values = cache.get_many([self._counter_key(c) for c in self.COUNTERS])
+        stats = {c: values.get(self._counter_key(c), 0) for c in self.COUNTERS}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def reset_stats(self):
+        """Reset all counters to zero."""
+        cache.delete_many([self._counter_key(c) for c in self.COUNTERS])
+
+
+contact_list_cache = ResponseCache('contact_list')
+
+
+class ResponseCacheMixin(VersionedViewMixin):
+    """Serve GET from ``contact_list_cache`` while the contacts version is unchanged.
+
+    API responses are cached as their data and rendered again for each
+    request, as the renderer depends on ``Accept``; page responses are cached
+    rendered. Only 200 responses are cached; a None version bypasses the cache.
+    """
+
+    def get_cache_variants(self, request):
+        """Request details besides the query string that the response depends on."""
+        # API pagination links are absolute; the data is rendered per request
+        return (request.build_absolute_uri('/'),)
+
+    def get(self, request, *args, **kwargs):
+        if not settings.CONTACT_RESPONSE_CACHE_TIMEOUT:
+            return super().get(request, *args, **kwargs)
+        version = self.current_version()
+        # Pending flash messages change the page
+        if version is None or len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+
+        key = contact_list_cache.make_key(self.version_key, version, request.GET, *self.get_cache_variants(request))
+        entry = contact_list_cache.get(key)
+        if entry is not None:
+            kind, data, content_type = entry
+            if kind == 'data':
+                return Response(data)
+            return HttpResponse(data, content_type=content_type)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            if isinstance(response, Response):
+                contact_list_cache.set(key, ('data', response.data, None))
+            elif hasattr(response, 'render'):
+                response.render()
+                contact_list_cache.set(key, ('content', response.content, response['Content-Type']))
+        return response
@@ -0,0 +1,55 @@
+import re
+
+from django.db import connections
+
+
+FTS_TABLE = 'contacts_contact_fts'
+
+# Letters that Unicode does not decompose into a base letter and a diacritic;
+# the FTS triggers (migration 0007) fold them the same way
+FOLDED_LETTERS = {'ł': 'l', 'Ł': 'L'}
+
+_checked_aliases = {}
+
+
+def fold_text(text):
+    for letter, replacement in FOLDED_LETTERS.items():
+        text = text.replace(letter, replacement)
+    return text
+
+
+def build_match_query(query):
+    """Return an FTS5 query matching every word of ``query`` as a prefix, or None."""
+    words = re.findall(r'\w+', fold_text(query))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def fts_available(using='default'):
+    """Return whether the database has the contact FTS index (SQLite with FTS5)."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    if using not in _checked_aliases:
+        with connection.cursor() as cursor:
+            _checked_aliases[using] = FTS_TABLE in connection.introspection.table_names(cursor)
+    return _checked_aliases[using]
+
+
+def fts_search(queryset, query):
+    """Filter contacts matching ``query`` in the FTS index, annotated with ``search_rank``.
+
+    Lower ranks are better (bm25). Returns None when the query has no words.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return None
+    table = queryset.model._meta.db_table
+    # A join, not a subquery per row: the rank comes from the same MATCH scan
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = {table}.id'],
+        params=[match],
+        select={'search_rank': f'{FTS_TABLE}.rank'},
+    )
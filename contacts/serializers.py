@@ -1,5 +1,10 @@
+from operator import itemgetter
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Contact, ContactStatusChoices
+from .fieldsets import CONTACT_FIELDS, CONTACT_LIST_FIELDS
+from .models import Contact, ContactStatusChoices, ImportJob
+from .statuses import status_registry
 
 
 class ContactStatusSerializer(serializers.ModelSerializer):
@@ -10,21 +15,73 @@ class ContactStatusSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class StatusPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Status id input resolved through the status registry."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            status = status_registry.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if status is None:
+            self.fail('does_not_exist', pk_value=data)
+        return status
+
+
+class SparseFieldsMixin:
+    """Serializer outputting only the fields picked by ``?fields=`` / ``?expand=``.
+
+    Takes ``fields`` and ``expand`` from ``contacts.fieldsets.parse_fieldset``;
+    without ``fields`` it outputs ``default_fields`` (None: all of them).
+    Fields that are not output are dropped before serializing, so they are
+    neither read nor formatted. Write-only fields are kept.
+    """
+
+    default_fields = None
+    # Output names served by a serializer field of another name
+    field_aliases = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expand = expand
+        wanted = fields or self.default_fields
+        if wanted is None:
+            return
+        keep = {self.field_aliases.get(name, name) for name in wanted}
+        for name, field in list(self.fields.items()):
+            if name not in keep and not field.write_only:
+                self.fields.pop(name)
+
+
+def status_representation(status, expanded):
+    """Return a contact's status as its name, or as ``{id, name}`` when expanded."""
+    if status is None:
+        return None
+    if expanded:
+        return {'id': status.pk, 'name': status.name}
+    return str(status)
+
+
+class ContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Full serializer for contact create/update/detail operations."""
 
-    status_detail = ContactStatusSerializer(source='status', read_only=True)
-    status = serializers.PrimaryKeyRelatedField(
+    field_aliases = {'status': 'status_detail'}
+
+    status_detail = serializers.SerializerMethodField()
+    status = StatusPrimaryKeyField(
         queryset=ContactStatusChoices.objects.all(),
         write_only=True
     )
     date_added = serializers.DateTimeField(read_only=True, format='%Y-%m-%d %H:%M')
+    updated_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Contact
         fields = [
             'id', 'first_name', 'last_name', 'phone_number',
-            'email', 'city', 'status', 'status_detail', 'date_added'
+            'email', 'city', 'status', 'status_detail', 'date_added', 'updated_at'
         ]
 
     def validate_email(self, value):
@@ -59,19 +116,88 @@ class ContactSerializer(serializers.ModelSerializer):
         """Normalize city to title case."""
         return value.strip().title()
 
+    def get_status_detail(self, obj):
+        return ContactStatusSerializer(status_registry.get(obj.status_id)).data
+
     def to_representation(self, instance):
         """Replace status field with nested status_detail."""
         data = super().to_representation(instance)
-        data['status'] = data.pop('status_detail')
+        if 'status_detail' in data:
+            data['status'] = data.pop('status_detail')
         return data
 
 
-class ContactListSerializer(serializers.ModelSerializer):
+class ContactBulkSerializer(ContactSerializer):
+    """Validates one item of a bulk request; uniqueness is checked for the whole batch."""
+
+    class Meta(ContactSerializer.Meta):
+        extra_kwargs = {
+            'email': {'validators': []},
+            'phone_number': {'validators': [Contact.phone_regex]},
+        }
+
+    def validate_email(self, value):
+        return value.lower().strip()
+
+    def validate_phone_number(self, value):
+        return value.strip()
+
+
+class ContactListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Minimal serializer for contact list view (better performance)."""
 
-    status = serializers.StringRelatedField()
+    default_fields = CONTACT_LIST_FIELDS
+
+    status = serializers.SerializerMethodField()
     date_added = serializers.DateTimeField(format='%Y-%m-%d %H:%M')
 
     class Meta:
         model = Contact
-        fields = ['id', 'first_name', 'last_name', 'city', 'status', 'date_added']
+        fields = list(CONTACT_FIELDS)
+
+    def get_status(self, obj):
+        return status_representation(status_registry.get(obj.status_id), 'status' in self.expand)
+
+
+def _iso_datetime(value):
+    """Format like DRF's ``DateTimeField`` with the default ISO 8601 format."""
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def serialize_contact_rows(rows, fields=CONTACT_LIST_FIELDS, expand=()):
+    """Return ``ContactListSerializer`` data for ``values()`` rows.
+
+    Rows hold the columns of ``contacts.fieldsets.contact_columns(fields)``.
+    Same output as the serializer, without building a model instance and
+    running field machinery per row.
+    """
+    # Looked up once: it is a context variable read per row by localtime()
+    tz = timezone.get_current_timezone()
+    formatters = {}
+    if 'status' in fields:
+        statuses = {
+            status.pk: status_representation(status, 'status' in expand) for status in status_registry.all()
+        }
+        formatters['status'] = lambda row: statuses.get(row['status_id'])
+    formatters['date_added'] = lambda row: row['date_added'].astimezone(tz).strftime('%Y-%m-%d %H:%M')
+    formatters['updated_at'] = lambda row: _iso_datetime(row['updated_at'].astimezone(tz))
+    getters = [(name, formatters.get(name, itemgetter(name))) for name in fields]
+    return [{name: get(row) for name, get in getters} for row in rows]
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for polling the progress of a CSV import."""
+
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'status_display', 'finished', 'progress', 'file_name', 'file_size',
+            'processed_bytes', 'rows_processed', 'created_count', 'skipped_count',
+            'rejections', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
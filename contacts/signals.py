@@ -0,0 +1,34 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Contact, ContactStatusChoices
+from .statuses import status_registry
+from .triggers import install_triggers
+from .versions import bump_generation
+from .weather import queue_city_warmup
+
+
+@receiver(post_save, sender=Contact)
+def warm_weather_for_contact_city(sender, instance, created, update_fields=None, **kwargs):
+    """Queue weather warm-up for the city of a new contact, or a changed city, once the save is committed."""
+    if update_fields is not None and 'city' not in update_fields:
+        return
+    city = instance.city
+    if not created and getattr(instance, 'loaded_city', None) == city:
+        return
+    instance.loaded_city = city
+    transaction.on_commit(lambda: queue_city_warmup(city))
+
+
+@receiver(post_save, sender=ContactStatusChoices)
+@receiver(post_delete, sender=ContactStatusChoices)
+def invalidate_status_registry(sender, **kwargs):
+    """Reload statuses here at once and in other workers after the commit."""
+    status_registry.invalidate()
+    transaction.on_commit(lambda: bump_generation('statuses'))
+
+
+def reinstall_triggers(sender, using='default', **kwargs):
+    """Restore contact triggers that a table remake during ``migrate`` dropped."""
+    install_triggers(connections[using])
@@ -0,0 +1,114 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+
+class _Call:
+    """In-flight call shared by threads waiting for the same key."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent cache-miss fetches for the same cache key.
+
+    Within a process, threads asking for a key that is already being fetched
+    wait for the leader thread and share its result. Across worker processes,
+    the leader holds a lock entry in the shared cache and other workers poll
+    the cache for the value it stores instead of calling upstream themselves.
+
+    The fetch function must store its result in the cache under ``key``,
+    so that waiters in other processes can pick it up.
+    """
+
+    COUNTERS = ('upstream_calls', 'coalesced_local', 'coalesced_remote')
+
+    def __init__(self, name, lock_timeout=35, wait_timeout=30, poll_interval=0.1):
+        self.name = name
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fetch):
+        """Return ``fetch()`` for ``key``, sharing it with concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.event.wait()
+            self._incr('coalesced_local')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_shared(key, fetch)
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _do_shared(self, key, fetch):
+        """Run ``fetch`` under a cache lock, or wait for another worker's result."""
+        lock_key = f'{key}_lock'
+        deadline = time.monotonic() + self.wait_timeout
+
+        while True:
+            if cache.add(lock_key, 1, timeout=self.lock_timeout):
+                try:
+                    # Another worker may have finished right before we got the lock
+                    value = cache.get(key)
+                    if value is not None:
+                        self._incr('coalesced_remote')
+                        return value
+                    self._incr('upstream_calls')
+                    return fetch()
+                finally:
+                    cache.delete(lock_key)
+
+            value = cache.get(key)
+            if value is not None:
+                self._incr('coalesced_remote')
+                return value
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        # Lock holder is stuck; fetch on our own rather than failing
+        self._incr('upstream_calls')
+        return fetch()
+
+    def _counter_key(self, counter):
+        return f'singleflight_{self.name}_{counter}'
+
+    def _incr(self, counter):
+        key = self._counter_key(counter)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+
+    def get_stats(self):
+        """Return counters, including how many upstream calls were saved."""
+        values = cache.get_many([self._counter_key(c) for c in self.COUNTERS])
+        stats = {c: values.get(self._counter_key(c), 0) for c in self.COUNTERS}
+        stats['saved_calls'] = stats['coalesced_local'] + stats['coalesced_remote']
+        return stats
+
+    def reset_stats(self):
+        """Reset all counters to zero."""
+        cache.delete_many([self._counter_key(c) for c in self.COUNTERS])
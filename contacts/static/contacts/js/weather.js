@@ -40,6 +40,59 @@ async function getWeatherForCity(city) {
     }
 }
 
+async function getWeatherForCities(cities) {
+    const results = new Map();
+    const missing = [];
+
+    // Serve fresh entries from the client cache
+    cities.forEach(city => {
+        const cacheKey = city.toLowerCase().trim();
+        const cached = weatherCache.get(cacheKey);
+        if (cached && Date.now() - cached.timestamp < CACHE_DURATION) {
+            results.set(city, cached.data);
+        } else {
+            weatherCache.delete(cacheKey);
+            missing.push(city);
+        }
+    });
+
+    if (missing.length === 0) return results;
+
+    // Fetch all remaining cities in a single request
+    const params = new URLSearchParams();
+    missing.forEach(city => params.append('city', city));
+
+    try {
+        const response = await fetch(`/api/weather/?${params.toString()}`);
+        const data = await response.json();
+
+        if (!response.ok) {
+            missing.forEach(city => results.set(city, { error: data.error || 'Błąd pobierania danych' }));
+            return results;
+        }
+
+        missing.forEach(city => {
+            const weather = data.results[city];
+            if (!weather) {
+                results.set(city, { error: 'Brak danych' });
+                return;
+            }
+            if (!weather.error) {
+                weatherCache.set(city.toLowerCase().trim(), {
+                    data: weather,
+                    timestamp: Date.now()
+                });
+            }
+            results.set(city, weather);
+        });
+    } catch (error) {
+        console.error('Weather batch error:', error);
+        missing.forEach(city => results.set(city, { error: 'Błąd połączenia' }));
+    }
+
+    return results;
+}
+
 async function loadWeatherForAllContacts() {
     const cells = document.querySelectorAll('.weather-cell');
     if (cells.length === 0) return;
@@ -57,9 +110,10 @@ async function loadWeatherForAllContacts() {
         }
     });
 
-    // Fetch weather for each unique city
+    // Fetch weather for all unique cities in one request
+    const weatherByCity = await getWeatherForCities([...cityMap.keys()]);
     for (const [city, cellList] of cityMap) {
-        const weather = await getWeatherForCity(city);
+        const weather = weatherByCity.get(city);
         cellList.forEach(cell => updateWeatherCell(cell, weather));
     }
 }
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import ContactStatusChoices
+from .versions import get_generation
+
+
+class StatusRegistry:
+    """In-process copy of all contact statuses.
+
+    Statuses are a handful of rarely changed rows, so every worker keeps them
+    in memory and reloads them when the shared ``statuses`` generation (bumped
+    on every status write, see ``contacts.signals``) differs from the one it
+    loaded. The generation is checked at most every
+    ``STATUS_REGISTRY_CHECK_INTERVAL`` seconds, and at once on a lookup miss.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_name = {}
+        self._generation = None
+        self._checked_at = 0.0
+
+    def _refresh(self, force_check=False):
+        now = time.monotonic()
+        if not force_check and self._generation is not None and \
+                now - self._checked_at < settings.STATUS_REGISTRY_CHECK_INTERVAL:
+            return
+        generation = get_generation('statuses')
+        with self._lock:
+            self._checked_at = now
+            if generation == self._generation:
+                return
+            statuses = list(ContactStatusChoices.objects.all())
+            self._by_id = {status.pk: status for status in statuses}
+            self._by_name = {status.name.lower(): status for status in statuses}
+            self._generation = generation
+
+    def invalidate(self):
+        """Reload on next use; called on status writes in this process."""
+        with self._lock:
+            self._generation = None
+
+    def all(self):
+        """Return all statuses in their model ordering (by name)."""
+        self._refresh()
+        return sorted(self._by_id.values(), key=lambda status: status.name)
+
+    def get(self, status_id):
+        """Return the status with ``status_id``, or None."""
+        self._refresh()
+        status = self._by_id.get(status_id)
+        if status is None:
+            self._refresh(force_check=True)
+            status = self._by_id.get(status_id)
+        return status
+
+    def get_by_name(self, name):
+        """Return the status called ``name`` (case-insensitive), or None."""
+        self._refresh()
+        status = self._by_name.get(name.lower())
+        if status is None:
+            self._refresh(force_check=True)
+            status = self._by_name.get(name.lower())
+        return status
+
+    def attach(self, contacts):
+        """Set ``contact.status`` from the registry, so reading it runs no query."""
+        field = ContactStatusChoices.contacts.field
+        for contact in contacts:
+            status = self.get(contact.status_id)
+            if status is not None:
+                field.set_cached_value(contact, status)
+        return contacts
+
+
+status_registry = StatusRegistry()
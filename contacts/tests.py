@@ -1,8 +1,66 @@
-from django.test import TestCase, Client
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipIf
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Contact, ContactStatusChoices
+
+from core.cache import SQLiteCache
+
+from .counters import status_counts
+from .forecast import ForecastWindow, get_stored_window, store_window
+from .forms import ContactForm
+from .management.commands.bench_sqlite import run_bench
+from .geocoding import CityNotFound, geocode_city, geocode_lru
+from .importer import ContactImporter
+from .jobs import claim_next_job, fail_stale_jobs, process_pending_jobs, run_import_job
+from .models import Contact, ContactChange, ContactStatusChoices, ContactStatusCount, GeocodedCity, ImportJob
+from .response_cache import contact_list_cache
+from .resilience import Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError
+from .serializers import ContactSerializer
+from .statuses import status_registry
+from .validation import validate_chunks
+from .versions import bump_generation
+from .writes import (
+    INTERACTIVE_WRITES_KEY, interactive_write, interactive_writes_pending, yield_to_interactive_writes
+)
+from . import weather
+from .weather import get_cache_key, get_weather, warm_contact_cities, weather_flight
+from .weather_client import WeatherClient, get_async_client, httpx, reset_clients
+
+
+def hourly_forecast(temperature, humidity, wind, code, hours=72):
+    """Return an Open-Meteo style hourly response starting at the current hour."""
+    start = int(time.time()) // 3600 * 3600
+    return {
+        'hourly': {
+            'time': [start + 3600 * i for i in range(hours)],
+            'temperature_2m': [temperature] * hours,
+            'relativehumidity_2m': [humidity] * hours,
+            'windspeed_10m': [wind] * hours,
+            'weathercode': [code] * hours,
+        }
+    }
 
 
 class ContactCRUDTest(TestCase):
@@ -68,3 +126,1404 @@ class ContactAPITest(APITestCase):
         # Delete
         response = self.client.delete(f'/api/contacts/{contact_id}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(CONTACT_RESPONSE_CACHE_TIMEOUT=0)
+    def test_fast_list_matches_serializer_output(self):
+        for i, city in enumerate(['Łódź', 'Zielona\u2028Góra', 'Opole "Stare"']):
+            Contact.objects.create(
+                first_name='Żaneta', last_name=f'Bąk{i}', phone_number=f'+4877000000{i}',
+                email=f'zaneta{i}@example.com', city=city, status=self.status
+            )
+        for url in ('/api/contacts/?sort=last_name', '/api/contacts/?cursor=&order=asc', '/api/contacts/?q=bak'):
+            with override_settings(CONTACT_API_FAST_LIST=False):
+                expected = self.client.get(url, HTTP_ACCEPT='application/json').content
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.content, expected)
+            self.assertIn(b'\\u2028', response.content)
+            self.assertFalse([q for q in queries if 'contacts_contactstatuschoices' in q['sql']])
+
+    @override_settings(CONTACT_RESPONSE_CACHE_TIMEOUT=0)
+    def test_sparse_fieldsets(self):
+        contact = Contact.objects.create(
+            first_name='Anna', last_name='Nowak', phone_number='+48987654321',
+            email='anna@example.com', city='Kraków', status=self.status
+        )
+        for url in ('/api/contacts/?fields=id,email', f'/api/contacts/{contact.pk}/?fields=id&fields=email'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            data = response.json()
+            item = data['results'][0] if 'results' in data else data
+            self.assertEqual(item, {'id': contact.pk, 'email': 'anna@example.com'})
+            select = queries[-1]['sql']
+            self.assertNotIn('first_name', select)
+            self.assertNotIn('status_id', select)
+
+        response = self.client.get(f'/api/contacts/{contact.pk}/?fields=email&expand=status')
+        self.assertEqual(response.json(), {'email': 'anna@example.com', 'status': {'id': self.status.pk, 'name': 'nowy'}})
+
+        url = '/api/contacts/?fields=id,phone_number,status,updated_at&expand=status&sort=last_name'
+        with override_settings(CONTACT_API_FAST_LIST=False):
+            expected = self.client.get(url, HTTP_ACCEPT='application/json').content
+        self.assertEqual(self.client.get(url, HTTP_ACCEPT='application/json').content, expected)
+        self.assertEqual(json.loads(expected)['results'][0]['status'], {'id': self.status.pk, 'name': 'nowy'})
+
+        response = self.client.get('/api/contacts/?fields=id,password&expand=city')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json()['fields'][0])
+        self.assertIn('city', response.json()['expand'][0])
+        self.assertEqual(self.client.get(f'/api/contacts/{contact.pk}/?fields=nope').status_code, 400)
+
+
+@mock.patch('contacts.bulk.queue_city_warmup')
+class ContactBulkAPITest(APITestCase):
+    """Tests for the bulk contact endpoints."""
+
+    url = '/api/contacts/bulk/'
+
+    def setUp(self):
+        self.status, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+
+    def item(self, i, **fields):
+        return {
+            'first_name': 'ola', 'last_name': f'Nowak{i}', 'phone_number': f'+48730000{i:03d}',
+            'email': f'Ola{i}@Example.com', 'city': 'opole', 'status': self.status.pk, **fields
+        }
+
+    def test_bulk_create_reports_each_item(self, warmup):
+        Contact.objects.create(**{**self.item(0), 'email': 'ola0@example.com', 'status': self.status})
+        items = [self.item(i) for i in range(1, 101)]
+        items += [self.item(0, phone_number='+48739999999'), self.item(101, email='ola1@example.com'),
+                  self.item(102, status=9999), 'nie obiekt']
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary'], {'created': 100, 'error': 4})
+        results = response.data['results']
+        self.assertEqual(results[100]['errors'], {'email': ['Kontakt z tym adresem email już istnieje.']})
+        self.assertIn('email', results[101]['errors'])
+        self.assertIn('status', results[102]['errors'])
+        contact = Contact.objects.get(pk=results[0]['id'])
+        self.assertEqual((contact.email, contact.first_name), ('ola1@example.com', 'Ola'))
+        # Statuses, two uniqueness queries and the insert, whatever the number of items
+        statements = [q['sql'] for q in queries if 'SAVEPOINT' not in q['sql']]
+        self.assertLessEqual(len(statements), 4)
+        warmup.assert_called_once_with('Opole')
+
+    def test_bulk_update_by_email_and_delete_by_id(self, warmup):
+        self.client.post(self.url, [self.item(i) for i in range(3)], format='json')
+        ids = list(Contact.objects.order_by('pk').values_list('pk', flat=True))
+        response = self.client.patch(self.url + '?match=email', [
+            {'email': 'OLA0@example.com', 'city': 'gdańsk'},
+            {'email': 'ola1@example.com', 'phone_number': '+48730000002'},
+            {'email': 'brak@example.com', 'city': 'Opole'},
+            {'email': 'ola0@example.com', 'city': 'Kraków'},
+        ], format='json')
+        self.assertEqual(response.data['summary'], {'updated': 1, 'error': 3})
+        results = response.data['results']
+        self.assertEqual(results[0], {'status': 'updated', 'id': ids[0]})
+        self.assertEqual(results[1]['errors'], {'phone_number': ['Kontakt z tym numerem telefonu już istnieje.']})
+        self.assertEqual(results[2]['errors'], {'email': ['Nie znaleziono kontaktu.']})
+        self.assertEqual(results[3]['errors'], {'email': ['Kontakt występuje w żądaniu więcej niż raz.']})
+        self.assertEqual(Contact.objects.get(pk=ids[0]).city, 'Gdańsk')
+
+        response = self.client.delete(self.url, [ids[0], ids[1], 0], format='json')
+        self.assertEqual(response.data['summary'], {'deleted': 2, 'error': 1})
+        self.assertEqual(list(Contact.objects.values_list('pk', flat=True)), [ids[2]])
+
+    def test_bulk_update_of_statuses_does_not_load_them_per_contact(self, warmup):
+        other, _ = ContactStatusChoices.objects.get_or_create(name='zagubiony')
+        self.client.post(self.url, [self.item(i) for i in range(20)], format='json')
+        items = [{'id': pk, 'status': other.pk} for pk in Contact.objects.values_list('pk', flat=True)]
+        items[0]['status'] = self.status.pk
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, items, format='json')
+        self.assertEqual(response.data['summary'], {'updated': 20})
+        self.assertEqual(Contact.objects.filter(status=other).count(), 19)
+        status_queries = [q['sql'] for q in queries if 'contacts_contactstatuschoices' in q['sql']]
+        self.assertLessEqual(len(status_queries), 1)
+
+    def test_bulk_rejects_malformed_requests(self, warmup):
+        self.assertEqual(self.client.post(self.url, {'a': 1}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(self.url + '?match=city', [], format='json').status_code, 400)
+        with override_settings(CONTACT_BULK_MAX_ITEMS=2):
+            response = self.client.post(self.url, [self.item(i) for i in range(3)], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ContactChangesAPITest(APITestCase):
+    """Tests for the incremental contact change feed."""
+
+    url = '/api/contacts/changes/'
+
+    def setUp(self):
+        self.status, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.contacts = [
+            Contact.objects.create(
+                first_name='Ola', last_name=f'Nowak{i}', phone_number=f'+48740000{i:03d}',
+                email=f'ola{i}@example.com', city='Opole', status=self.status
+            )
+            for i in range(3)
+        ]
+
+    def sync(self, since=None, limit=None):
+        """Follow the feed from ``since`` to its end; return (changes, cursor)."""
+        changes = []
+        while True:
+            params = {k: v for k, v in (('since', since), ('limit', limit)) if v}
+            data = self.client.get(self.url, params).json()
+            changes += [(change['type'], change['id']) for change in data['changes']]
+            since = data['next']
+            if not data['has_more']:
+                return changes, since
+
+    def test_feed_returns_latest_change_of_each_contact_in_commit_order(self):
+        first, second, third = self.contacts
+        third_id = third.pk
+        changes, cursor = self.sync(limit=2)
+        self.assertEqual(changes, [('upsert', c.pk) for c in self.contacts])
+
+        self.assertEqual(self.sync(cursor)[0], [])
+        Contact.objects.filter(pk=first.pk).update(city='Gdańsk')
+        third.delete()
+        second.first_name = 'Ala'
+        second.save()
+        changes, cursor = self.sync(cursor)
+        self.assertEqual(changes, [('upsert', first.pk), ('delete', third_id), ('upsert', second.pk)])
+
+        response = self.client.get(self.url)
+        upsert = response.json()['changes'][0]
+        self.assertEqual(upsert['contact']['city'], 'Gdańsk')
+        self.assertEqual(upsert['contact']['status'], {'id': self.status.pk, 'name': 'nowy'})
+
+    def test_expired_and_invalid_cursors(self):
+        _, cursor = self.sync()
+        with override_settings(CONTACT_TOMBSTONE_RETENTION_DAYS=0):
+            self.assertEqual(self.client.get(self.url, {'since': cursor}).status_code, 410)
+        self.assertEqual(self.client.get(self.url, {'since': 'zły'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 'x'}).status_code, 400)
+
+    def test_empty_polls_renew_the_cursor(self):
+        """Test that a client finding no changes is not sent back to a full resync later."""
+        _, cursor = self.sync()
+        start = timezone.now()
+        with override_settings(CONTACT_TOMBSTONE_RETENTION_DAYS=30):
+            with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=20)):
+                changes, renewed = self.sync(cursor)
+            self.assertEqual(changes, [])
+            with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=40)):
+                self.assertEqual(self.client.get(self.url, {'since': cursor}).status_code, 410)
+                self.assertEqual(self.client.get(self.url, {'since': renewed}).status_code, 200)
+
+    def test_old_tombstones_are_pruned(self):
+        self.contacts[0].delete()
+        ContactChange.objects.filter(deleted=True).update(changed_at=timezone.now() - timedelta(days=31))
+        call_command('prune_contact_tombstones', stdout=io.StringIO())
+        self.assertFalse(ContactChange.objects.filter(deleted=True).exists())
+        self.assertEqual(ContactChange.objects.count(), 2)
+
+
+class ConditionalGetTest(APITestCase):
+    """Tests for ETag / Last-Modified on contact endpoints."""
+
+    def setUp(self):
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.contact = Contact.objects.create(
+            first_name='Ola', last_name='Nowak', phone_number='+48750000000',
+            email='ola@example.com', city='Opole', status=status_new
+        )
+        self.other = Contact.objects.create(
+            first_name='Ala', last_name='Bąk', phone_number='+48750000001',
+            email='ala@example.com', city='Opole', status=status_new
+        )
+
+    def assertNotModified(self, url, response):
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], response['ETag'])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('contacts_contactchange', queries[0]['sql'])
+
+    def test_unchanged_list_and_detail_answer_not_modified(self):
+        for url in ('/api/contacts/?sort=last_name', f'/api/contacts/{self.contact.pk}/',
+                    reverse('contacts:detail', args=[self.contact.pk])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            self.assertNotModified(url, response)
+
+    def test_any_write_changes_the_etag(self):
+        list_etag = self.client.get('/api/contacts/')['ETag']
+        detail_etag = self.client.get(f'/api/contacts/{self.contact.pk}/')['ETag']
+        other_etag = self.client.get(f'/api/contacts/{self.other.pk}/')['ETag']
+        self.assertNotEqual(self.client.get('/api/contacts/?page=1')['ETag'], list_etag)
+
+        Contact.objects.filter(pk=self.contact.pk).update(city='Gdańsk')
+        response = self.client.get('/api/contacts/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/api/contacts/{self.contact.pk}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.data['city'], 'Gdańsk')
+        response = self.client.get(f'/api/contacts/{self.other.pk}/', HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual(response.status_code, 304)
+
+        url = f'/api/contacts/{self.contact.pk}/'
+        self.contact.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 404)
+
+    def test_pruning_tombstones_does_not_restore_an_old_etag(self):
+        list_etag = self.client.get('/api/contacts/')['ETag']
+        self.contact.delete()
+        ContactChange.objects.filter(deleted=True).update(changed_at=timezone.now() - timedelta(days=31))
+        call_command('prune_contact_tombstones', stdout=io.StringIO())
+        response = self.client.get('/api/contacts/', HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+
+class ResponseCacheTest(APITestCase):
+    """Tests for the versioned contact list response cache."""
+
+    def setUp(self):
+        cache.clear()
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.contact = Contact.objects.create(
+            first_name='Ola', last_name='Nowak', phone_number='+48760000000',
+            email='ola@example.com', city='Opole', status=status_new
+        )
+
+    def test_repeated_list_served_from_cache(self):
+        for first_url, second_url in (('/?q=Nowak&sort=last_name', '/?sort=last_name&q=Nowak'),
+                                      ('/api/contacts/?q=Nowak', '/api/contacts/?q=Nowak')):
+            first = self.client.get(first_url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(second_url)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(len(queries), 1)
+            self.assertIn('contacts_contactchange', queries[0]['sql'])
+
+        stats = self.client.get('/api/metrics/cache/').json()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (2, 2, 0.5))
+        self.assertGreater(stats['stored_bytes'], 0)
+        self.assertGreater(stats['served_bytes'], 0)
+
+    def test_any_write_invalidates(self):
+        self.assertContains(self.client.get('/'), 'Opole')
+        self.assertEqual(self.client.get('/api/contacts/').json()['results'][0]['city'], 'Opole')
+
+        # Bulk update() bypasses signals; the change log still records it
+        Contact.objects.filter(pk=self.contact.pk).update(city='Gdańsk')
+        self.assertContains(self.client.get('/'), 'Gdańsk')
+        self.assertEqual(self.client.get('/api/contacts/').json()['results'][0]['city'], 'Gdańsk')
+        self.assertEqual(contact_list_cache.get_stats()['hits'], 0)
+
+
+class ContactPaginationTest(APITestCase):
+    """Tests for keyset (cursor) pagination."""
+
+    def setUp(self):
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        for i in range(25):
+            Contact.objects.create(
+                first_name=f'Imię{i:02d}', last_name=('Nowak', 'Kowalski')[i % 2],
+                phone_number=f'+48900000{i:03d}', email=f'page{i}@example.com',
+                city='Gdańsk', status=status_new
+            )
+        # Equal sort values: the id tiebreaker keeps the order stable
+        Contact.objects.filter(pk__lt=Contact.objects.order_by('pk')[10].pk).update(
+            date_added=timezone.now() - timedelta(days=1)
+        )
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [row['id'] for row in response.data['results']]
+            last = response.data
+            url = response.data['next']
+        return ids, last
+
+    def test_api_cursor_walks_every_contact_once(self):
+        """Test that forward and backward cursors agree with an offset-free ordering."""
+        for sort in ('date_added', 'last_name'):
+            expected = list(
+                Contact.objects.order_by(f'-{sort}', '-pk').values_list('pk', flat=True)
+            )
+            ids, last_page = self.walk(f'/api/contacts/?cursor=&sort={sort}&order=desc')
+            self.assertEqual(ids, expected)
+
+            # Walk back from the last page
+            back_ids = []
+            url = last_page['previous']
+            while url:
+                response = self.client.get(url)
+                back_ids = [row['id'] for row in response.data['results']] + back_ids
+                url = response.data['previous']
+            self.assertEqual(back_ids, expected[:len(back_ids)])
+            self.assertEqual(len(back_ids), 20)
+
+    def test_api_rejects_cursor_of_other_sort(self):
+        response = self.client.get('/api/contacts/?cursor=&sort=last_name')
+        cursor = parse_qs(urlparse(response.data['next']).query)['cursor'][0]
+        response = self.client.get(f'/api/contacts/?cursor={cursor}&sort=first_name')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_api_page_number_mode_is_default(self):
+        response = self.client.get('/api/contacts/?page=3')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+    @override_settings(CONTACT_PAGE_NUMBER_MAX_ROWS=20)
+    def test_list_view_switches_to_keyset_for_large_results(self):
+        """Test that the web list pages large result sets by cursor."""
+        response = self.client.get(reverse('contacts:list'), {'sort': 'first_name', 'order': 'asc'})
+        self.assertIn('keyset_page', response.context)
+        names = [c.first_name for c in response.context['contacts']]
+        response = self.client.get(reverse('contacts:list') + response.context['next_page_url'])
+        names += [c.first_name for c in response.context['contacts']]
+        self.assertEqual(names, [f'Imię{i:02d}' for i in range(20)])
+
+        response = self.client.get(reverse('contacts:list'), {'q': 'Nowak'})
+        self.assertNotIn('keyset_page', response.context)
+        self.assertEqual(response.context['paginator'].count, 13)
+
+
+class ContactSearchTest(TestCase):
+    """Tests for full-text contact search."""
+
+    def setUp(self):
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.lodz = Contact.objects.create(
+            first_name='Łucja', last_name='Żółkiewska', phone_number='+48600100200',
+            email='lucja@example.com', city='Łódź', status=status_new
+        )
+        self.kowalski = Contact.objects.create(
+            first_name='Jan', last_name='Kowalski', phone_number='+48600100300',
+            email='jan.kowalski@example.com', city='Kraków', status=status_new
+        )
+        self.kowalczyk = Contact.objects.create(
+            first_name='Kowal', last_name='Kowalczyk', phone_number='+48600100400',
+            email='kowalczyk@example.com', city='Opole', status=status_new
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('contacts:list'), {'q': query, **params})
+        return [c.pk for c in response.context['contacts']]
+
+    def test_search_folds_polish_letters_and_matches_prefixes(self):
+        self.assertEqual(self.search('lodz'), [self.lodz.pk])
+        self.assertEqual(self.search('zolkiew'), [self.lodz.pk])
+        self.assertEqual(self.search('ŁÓDŹ łucja'), [self.lodz.pk])
+        self.assertEqual(self.search('48600100300'), [self.kowalski.pk])
+
+    def test_search_ranks_results(self):
+        """Test that contacts matching in more fields come first by default."""
+        self.assertEqual(self.search('kowal'), [self.kowalczyk.pk, self.kowalski.pk])
+        self.assertEqual(
+            self.search('kowal', sort='last_name', order='asc'), [self.kowalczyk.pk, self.kowalski.pk]
+        )
+        self.assertEqual(
+            self.search('kowal', sort='last_name', order='desc'), [self.kowalski.pk, self.kowalczyk.pk]
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        Contact.objects.filter(pk=self.kowalski.pk).update(city='Łomża')
+        self.assertEqual(self.search('lomza'), [self.kowalski.pk])
+        self.kowalski.delete()
+        self.assertEqual(self.search('lomza'), [])
+
+    def test_search_falls_back_to_substring_match(self):
+        with mock.patch('contacts.filters.fts_available', return_value=False):
+            self.assertEqual(self.search('owalsk'), [self.kowalski.pk])
+            self.assertEqual(self.search('lodz'), [])
+
+
+class ContactCounterTest(TestCase):
+    """Tests for the per-status contact counters."""
+
+    def setUp(self):
+        self.status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.status_lost, _ = ContactStatusChoices.objects.get_or_create(name='zagubiony')
+
+    def make_contact(self, i, status):
+        return Contact(
+            first_name='Ala', last_name=f'Bąk{i}', phone_number=f'+48700000{i:03d}',
+            email=f'ala{i}@example.com', city='Opole', status=status
+        )
+
+    def assertCounts(self):
+        actual = {s.pk: s.contacts.count() for s in ContactStatusChoices.objects.all()}
+        self.assertEqual(status_counts(), actual)
+
+    def test_counters_follow_every_kind_of_write(self):
+        contact = self.make_contact(0, self.status_new)
+        contact.save()
+        Contact.objects.bulk_create([self.make_contact(i, self.status_new) for i in range(1, 6)])
+        self.assertEqual(status_counts()[self.status_new.pk], 6)
+
+        contact.status = self.status_lost
+        contact.save()
+        Contact.objects.filter(last_name__in=['Bąk1', 'Bąk2']).update(status=self.status_lost)
+        self.assertEqual(status_counts()[self.status_lost.pk], 3)
+        self.assertCounts()
+
+        Contact.objects.filter(status=self.status_lost).delete()
+        self.assertEqual(status_counts()[self.status_lost.pk], 0)
+        self.assertCounts()
+
+        new_status = ContactStatusChoices.objects.create(name='archiwalny')
+        self.assertEqual(status_counts()[new_status.pk], 0)
+
+    def test_repair_command_fixes_drift(self):
+        Contact.objects.bulk_create([self.make_contact(i, self.status_new) for i in range(3)])
+        ContactStatusCount.objects.filter(status=self.status_new).update(count=42)
+        ContactStatusCount.objects.filter(status=self.status_lost).delete()
+
+        out = io.StringIO()
+        call_command('repair_contact_counts', stdout=out)
+        self.assertIn('42 -> 3', out.getvalue())
+        self.assertIn('Poprawione liczniki: 2', out.getvalue())
+        self.assertCounts()
+
+    def test_list_reads_totals_from_counters(self):
+        Contact.objects.bulk_create([self.make_contact(i, self.status_new) for i in range(12)])
+        Contact.objects.bulk_create([self.make_contact(i, self.status_lost) for i in range(12, 15)])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('contacts:list'), {'status': self.status_lost.pk})
+        self.assertFalse([q for q in queries if 'COUNT(' in q['sql']])
+        # Read once for the page count and the status filter
+        self.assertEqual(len([q for q in queries if 'contacts_contactstatuscount' in q['sql']]), 1)
+        self.assertEqual(response.context['total_contacts'], 15)
+        self.assertEqual(response.context['paginator'].count, 3)
+        # Searches are still counted by the database
+        response = self.client.get(reverse('contacts:list'), {'q': 'Bąk1'})
+        self.assertEqual(response.context['paginator'].count, 6)
+
+
+class StatusRegistryTest(TestCase):
+    """Tests for the in-process status registry."""
+
+    def setUp(self):
+        self.status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        for i in range(10):
+            Contact.objects.create(
+                first_name='Ala', last_name=f'Bąk{i}', phone_number=f'+48710000{i:03d}',
+                email=f'ala{i}@example.com', city='Opole', status=self.status_new
+            )
+
+    def tearDown(self):
+        # The test transaction is rolled back under the registry
+        status_registry.invalidate()
+
+    @override_settings(CONTACT_RESPONSE_CACHE_TIMEOUT=0)
+    def test_list_queries_do_not_grow_with_page_size(self):
+        url = reverse('contacts:list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(url)
+        self.assertContains(response, 'nowy')
+        Contact.objects.filter(last_name__in=['Bąk0', 'Bąk1', 'Bąk2', 'Bąk3', 'Bąk4', 'Bąk5']).delete()
+        with CaptureQueriesContext(connection) as short_page:
+            self.client.get(url)
+        self.assertEqual(len(full_page), len(short_page))
+        self.assertFalse([q for q in full_page if 'contacts_contactstatuschoices' in q['sql']])
+
+        with CaptureQueriesContext(connection) as api_page:
+            response = self.client.get(reverse('contacts:api-list'))
+        self.assertEqual(response.json()['results'][0]['status'], 'nowy')
+        self.assertFalse([q for q in api_page if 'contacts_contactstatuschoices' in q['sql']])
+
+    @override_settings(STATUS_REGISTRY_CHECK_INTERVAL=0)
+    def test_changes_from_other_workers_seen_after_generation_bump(self):
+        self.assertEqual(status_registry.get(self.status_new.pk).name, 'nowy')
+        # A write without signals, as another process would look to this one
+        ContactStatusChoices.objects.filter(pk=self.status_new.pk).update(name='świeży')
+        self.assertEqual(status_registry.get(self.status_new.pk).name, 'nowy')
+        bump_generation('statuses')
+        self.assertEqual(status_registry.get(self.status_new.pk).name, 'świeży')
+        self.assertEqual(status_registry.get_by_name('ŚWIEŻY').pk, self.status_new.pk)
+
+    def test_form_and_serializer_resolve_statuses(self):
+        archived = ContactStatusChoices.objects.create(name='archiwalny')
+        form = ContactForm(data={
+            'first_name': 'Ola', 'last_name': 'Nowak', 'phone_number': '+48720000000',
+            'email': 'ola@example.com', 'city': 'Opole', 'status': archived.pk,
+        })
+        self.assertIn(str(archived.pk), str(form['status']))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['status'], archived)
+
+        serializer = ContactSerializer(data={
+            'first_name': 'Ola', 'last_name': 'Nowak', 'phone_number': '+48720000000',
+            'email': 'ola@example.com', 'city': 'Opole', 'status': 9999,
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('status', serializer.errors)
+
+
+class WeatherAPITest(APITestCase):
+    """Tests for weather API endpoints (upstream calls are mocked)."""
+
+    def setUp(self):
+        cache.clear()
+        geocode_lru.clear()
+
+    def mock_upstream(self):
+        # Batch lookups run in pool threads, so upstream is mocked above the DB layer
+        def fetch(city_decoded, city_normalized):
+            return {'city': city_decoded, 'temperature': 12.3, 'description': 'Pochmurno'}
+        return mock.patch('contacts.weather.fetch_weather', side_effect=fetch)
+
+    def test_batch_deduplicates_normalized_cities(self):
+        """Test that the batch endpoint fetches each normalized city once."""
+        with self.mock_upstream() as get:
+            response = self.client.get('/api/weather/', {'city': ['Warszawa', 'warszawa ', 'Kraków']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(set(response.data['results']), {'Warszawa', 'warszawa ', 'Kraków'})
+        self.assertEqual(response.data['results']['warszawa ']['temperature'], 12.3)
+
+        # Second request is answered from cache
+        with self.mock_upstream() as get:
+            response = self.client.get('/api/weather/', {'city': ['Warszawa', 'Kraków']})
+        self.assertEqual(get.call_count, 0)
+        self.assertEqual(response.data['results']['Kraków']['description'], 'Pochmurno')
+
+    @override_settings(WEATHER_MAX_CONCURRENT_CALLS=2)
+    def test_batch_larger_than_bulkhead_resolves_every_city(self):
+        """Test that a batch does not compete with itself for bulkhead slots."""
+        bulkhead = Bulkhead('weather', max_concurrent=2, acquire_timeout=0.05)
+
+        def slow_fetch(city_decoded, city_normalized):
+            with bulkhead.slot():
+                time.sleep(0.1)
+            return {'city': city_decoded, 'temperature': 12.3}
+
+        cities = ['Warszawa', 'Kraków', 'Gdańsk', 'Opole', 'Łódź', 'Poznań']
+        with mock.patch('contacts.weather.fetch_weather', side_effect=slow_fetch):
+            response = self.client.get('/api/weather/', {'city': cities})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for city in cities:
+            self.assertEqual(response.data['results'][city]['temperature'], 12.3, city)
+        self.assertEqual(bulkhead.snapshot()['rejected_calls'], 0)
+
+    def test_batch_requires_cities(self):
+        """Test that the batch endpoint rejects an empty request."""
+        response = self.client.get('/api/weather/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_misses_are_coalesced(self):
+        """Test that concurrent misses for one city make a single upstream fetch."""
+        barrier = threading.Barrier(5)
+        results = []
+
+        def slow_fetch(city_decoded, city_normalized):
+            time.sleep(0.2)
+            return {'city': city_decoded, 'temperature': 1}
+
+        def worker():
+            barrier.wait()
+            results.append(get_weather('Warszawa', 'warszawa'))
+
+        with mock.patch('contacts.weather.fetch_weather', side_effect=slow_fetch) as fetch:
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(len(results), 5)
+        stats = weather_flight.get_stats()
+        self.assertEqual(stats['upstream_calls'], 1)
+        self.assertEqual(stats['saved_calls'], 4)
+
+    def test_waits_for_fetch_in_other_worker(self):
+        """Test that a held cache lock makes callers wait for the stored result."""
+        cache_key = get_cache_key('gdańsk')
+        cache.add(f'{cache_key}_lock', 1)
+        entry = {'data': {'city': 'Gdańsk'}, 'fetched_at': time.time()}
+        threading.Timer(0.2, cache.set, args=(cache_key, entry)).start()
+
+        with mock.patch('contacts.weather.fetch_weather') as fetch:
+            result = get_weather('Gdańsk', 'gdańsk')
+
+        fetch.assert_not_called()
+        self.assertEqual(result, {'city': 'Gdańsk'})
+        self.assertEqual(weather_flight.get_stats()['coalesced_remote'], 1)
+
+    def wait_for_entry(self, cache_key, fetched_after, timeout=2):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if cache.get(cache_key).get('fetched_at', 0) > fetched_after:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def wait_for_refreshes(self, timeout=2):
+        deadline = time.monotonic() + timeout
+        while weather._refreshing and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def test_stale_entry_served_and_refreshed(self):
+        """Test that a stale entry is served immediately and refreshed in background."""
+        cache_key = get_cache_key('warszawa')
+        fetched_at = time.time() - 3600
+        cache.set(cache_key, {'data': {'city': 'Warszawa', 'temperature': 5}, 'fetched_at': fetched_at})
+
+        with mock.patch('contacts.weather.fetch_weather', return_value={'city': 'Warszawa', 'temperature': 20}):
+            weather = get_weather('Warszawa', 'warszawa')
+            self.assertEqual(weather['temperature'], 5)
+            self.assertTrue(weather['stale'])
+            self.assertTrue(self.wait_for_entry(cache_key, fetched_at))
+
+        self.assertEqual(get_weather('Warszawa', 'warszawa'), {'city': 'Warszawa', 'temperature': 20})
+
+    def test_entry_cached_without_fetch_time_is_stale(self):
+        """Test that weather cached before fetch times were recorded is served as stale and refreshed."""
+        cache_key = get_cache_key('opole')
+        cache.set(cache_key, {'city': 'Opole', 'temperature': 5})
+
+        with mock.patch('contacts.weather.fetch_weather', return_value={'city': 'Opole', 'temperature': 20}):
+            self.assertEqual(get_weather('Opole', 'opole'), {'city': 'Opole', 'temperature': 5, 'stale': True})
+            self.assertTrue(self.wait_for_entry(cache_key, 0))
+
+        self.assertEqual(get_weather('Opole', 'opole'), {'city': 'Opole', 'temperature': 20})
+
+    def test_stale_entry_served_during_outage(self):
+        """Test that the last known value is served when upstream is down."""
+        cache_key = get_cache_key('kraków')
+        cache.set(cache_key, {'data': {'city': 'Kraków', 'temperature': 5}, 'fetched_at': time.time() - 3600})
+
+        with mock.patch('contacts.weather.fetch_weather', side_effect=requests.Timeout) as fetch:
+            response = self.client.get('/api/weather/Kraków/')
+            deadline = time.monotonic() + 2
+            while not fetch.called and time.monotonic() < deadline:
+                time.sleep(0.02)
+            response = self.client.get('/api/weather/Kraków/')
+            self.wait_for_refreshes()
+
+        self.assertTrue(fetch.called)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['temperature'], 5)
+        self.assertTrue(response.data['stale'])
+
+
+class GeocodingTest(TestCase):
+    """Tests for persistent geocoding with negative caching."""
+
+    def setUp(self):
+        geocode_lru.clear()
+
+    def test_found_city_is_stored(self):
+        """Test that a resolved city is persisted and not geocoded again."""
+        with mock.patch('contacts.geocoding.nominatim_lookup', return_value=(49.3, 19.95)) as lookup:
+            self.assertEqual(geocode_city('Zakopane', 'zakopane'), (49.3, 19.95))
+            geocode_lru.clear()
+            self.assertEqual(geocode_city('Zakopane', 'zakopane'), (49.3, 19.95))
+        self.assertEqual(lookup.call_count, 1)
+        self.assertTrue(GeocodedCity.objects.get(name='zakopane').found)
+
+    def test_unknown_city_is_negatively_cached(self):
+        """Test that unknown cities are retried only after the negative TTL."""
+        with mock.patch('contacts.geocoding.nominatim_lookup', return_value=None) as lookup:
+            for _ in range(2):
+                with self.assertRaises(CityNotFound):
+                    geocode_city('Xyzzy', 'xyzzy')
+                geocode_lru.clear()
+            self.assertEqual(lookup.call_count, 1)
+
+            with self.settings(GEOCODE_NOT_FOUND_TIMEOUT=0):
+                with self.assertRaises(CityNotFound):
+                    geocode_city('Xyzzy', 'xyzzy')
+            self.assertEqual(lookup.call_count, 2)
+
+    def test_transport_errors_are_not_cached(self):
+        """Test that Nominatim failures do not store a negative result."""
+        with mock.patch('contacts.geocoding.nominatim_lookup', side_effect=requests.ConnectionError):
+            with self.assertRaises(CityNotFound):
+                geocode_city('Sopot', 'sopot')
+        self.assertFalse(GeocodedCity.objects.filter(name='sopot').exists())
+
+    def test_locked_database_does_not_fail_lookup(self):
+        """Test that geocoding and forecast results which cannot be stored are still returned."""
+        locked = OperationalError('database is locked')
+        with mock.patch('contacts.geocoding.nominatim_lookup', return_value=(54.44, 18.56)), \
+                mock.patch('contacts.geocoding.GeocodedCity.objects.update_or_create', side_effect=locked):
+            self.assertEqual(geocode_city('Sopot', 'sopot'), (54.44, 18.56))
+
+        forecast = hourly_forecast(temperature=1, humidity=2, wind=3, code=0)
+        with mock.patch('contacts.forecast.WeatherForecast.objects.update_or_create', side_effect=locked):
+            self.assertEqual(store_window(54.44, 18.56, forecast).hours, 72)
+
+
+class SQLiteCacheTest(TestCase):
+    """Tests for the shared SQLite cache backend."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.location = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'TIMEOUT': 60, 'OPTIONS': options})
+
+    def test_basic_operations(self):
+        """Test get/set/add/delete semantics and expiry."""
+        self.cache.set('a', {'x': 1})
+        self.assertEqual(self.cache.get('a'), {'x': 1})
+        self.assertFalse(self.cache.add('a', 2))
+        self.assertTrue(self.cache.add('b', 2))
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'a': {'x': 1}, 'b': 2})
+        self.cache.set('c', 3, timeout=0)
+        self.assertIsNone(self.cache.get('c'))
+        self.assertTrue(self.cache.add('c', 4))
+        self.assertTrue(self.cache.delete('a'))
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_entries_shared_between_instances(self):
+        """Test that separate backend instances (workers) see the same data."""
+        self.cache.set('shared', 'value')
+        self.assertEqual(self.make_cache().get('shared'), 'value')
+
+    def test_incr_is_atomic(self):
+        """Test that concurrent increments from several threads are not lost."""
+        self.cache.set('counter', 0)
+
+        def worker():
+            other = self.make_cache()
+            for _ in range(50):
+                other.incr('counter')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_beyond_64_bits(self):
+        """Test that integers stored pickled, or growing past 64 bits, are still incremented."""
+        self.cache.set('big', 2 ** 70)
+        self.assertEqual(self.cache.incr('big'), 2 ** 70 + 1)
+        self.assertEqual(self.cache.get('big'), 2 ** 70 + 1)
+        self.cache.set('edge', 2 ** 63 - 1)
+        self.assertEqual(self.cache.incr('edge'), 2 ** 63)
+        self.assertEqual(self.cache.decr('edge'), 2 ** 63 - 1)
+        self.assertEqual(self.cache.incr('edge', 2 ** 64), 2 ** 63 - 1 + 2 ** 64)
+        self.cache.set('text', 'a')
+        with self.assertRaises(TypeError):
+            self.cache.incr('text')
+        self.assertEqual(self.cache.get('text'), 'a')
+
+    def test_least_recently_used_entries_evicted(self):
+        """Test that culling keeps total size under MAX_SIZE, dropping old entries."""
+        cache = self.make_cache(MAX_SIZE=10000)
+        for i in range(20):
+            cache.set(f'key{i}', b'x' * 1000)
+            time.sleep(0.001)
+        cache.cull()
+        self.assertIsNone(cache.get('key0'))
+        self.assertIsNotNone(cache.get('key19'))
+        self.assertLessEqual(len(cache.get_many([f'key{i}' for i in range(20)])), 9)
+
+    def test_test_run_does_not_use_project_cache_file(self):
+        """Test that tests clearing the cache leave the project's cache file alone."""
+        location = os.path.abspath(settings.CACHES['default']['LOCATION'])
+        self.assertNotEqual(location, str(settings.BASE_DIR / 'cache.sqlite3'))
+
+
+class ResilienceTest(TestCase):
+    """Tests for the upstream circuit breaker and bulkhead."""
+
+    def test_breaker_opens_and_recovers(self):
+        """Test closed -> open -> half-open -> closed transitions."""
+        breaker = CircuitBreaker('upstream', failure_rate=0.5, min_calls=4, window=10, open_seconds=0.1)
+        failing = mock.Mock(side_effect=requests.ConnectionError)
+
+        for _ in range(4):
+            with self.assertRaises(requests.ConnectionError):
+                breaker.call(failing)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        # Open circuit fails fast without calling upstream
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(failing)
+        self.assertEqual(failing.call_count, 4)
+
+        time.sleep(0.15)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.snapshot()['rejected_calls'], 1)
+
+    def test_bulkhead_rejects_excess_calls(self):
+        """Test that calls beyond the concurrency limit are rejected."""
+        bulkhead = Bulkhead('upstream', max_concurrent=1, acquire_timeout=0.01)
+        with bulkhead.slot():
+            with self.assertRaises(BulkheadFullError):
+                with bulkhead.slot():
+                    pass
+        with bulkhead.slot():
+            pass
+        self.assertEqual(bulkhead.snapshot()['rejected_calls'], 1)
+
+    def test_open_circuit_returns_service_unavailable(self):
+        """Test that the weather view fast-fails with 503 when upstream is rejected."""
+        cache.clear()
+        with mock.patch('contacts.weather.fetch_weather', side_effect=CircuitOpenError('api.open-meteo.com')):
+            response = self.client.get('/api/weather/Warszawa/')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        response = self.client.get('/api/metrics/weather/')
+        self.assertIn('circuit_breakers', response.json())
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Nominatim and Open-Meteo APIs."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.paths.append(url.path)
+
+        if self.server.failures_left > 0:
+            self.server.failures_left -= 1
+            return self.reply(503, {})
+        if url.path == '/search':
+            found = query['q'][0] != 'Nowhere'
+            return self.reply(200, [{'lat': '49.3', 'lon': '19.95'}] if found else [])
+        forecast = hourly_forecast(temperature=3.5, humidity=88, wind=12.0, code=71)
+        # Multi-location requests get one forecast per location
+        locations = query['latitude'][0].split(',')
+        return self.reply(200, [forecast] * len(locations) if len(locations) > 1 else forecast)
+
+    def reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class WeatherClientTest(TestCase):
+    """Tests for the pooled weather clients against a local stub server."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        cls.urls = override_settings(
+            WEATHER_GEOCODE_URL=f'{base_url}/search',
+            WEATHER_FORECAST_URL=f'{base_url}/v1/forecast',
+            WEATHER_HTTP_BACKOFF=0,
+        )
+        cls.urls.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.urls.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        reset_clients()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.connections = 0
+        self.server.paths = []
+        self.server.failures_left = 0
+        cache.clear()
+        geocode_lru.clear()
+        reset_clients()
+
+    def test_connections_are_reused(self):
+        """Test that the session keeps one connection alive for all calls."""
+        client = WeatherClient()
+        for _ in range(3):
+            lat, lon = client.geocode('Zakopane')
+            client.forecast(lat, lon)
+        client.close()
+        self.assertEqual(len(self.server.paths), 6)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retryable_statuses_are_retried(self):
+        """Test that a 503 from upstream is retried transparently."""
+        self.server.failures_left = 1
+        self.assertEqual(WeatherClient().geocode('Zakopane'), (49.3, 19.95))
+        self.assertEqual(self.server.paths, ['/search', '/search'])
+
+    def test_sync_view_uses_stub(self):
+        """Test the weather view end to end against the stub server."""
+        response = self.client.get('/api/weather/Zakopane/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['description'], 'Lekki śnieg')
+        self.assertEqual(self.client.get('/api/weather/Nowhere/').status_code, 404)
+
+    @skipIf(httpx is None, 'httpx is not installed')
+    async def test_async_view_uses_stub(self):
+        """Test the async weather view end to end against the stub server."""
+        response = await self.async_client.get('/api/async/weather/Zakopane/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['humidity'], 88)
+        self.assertEqual(response.json()['temperature'], 3.5)
+
+        response = await self.async_client.get('/api/async/weather/Nowhere/')
+        self.assertEqual(response.status_code, 404)
+
+    @skipIf(httpx is None, 'httpx is not installed')
+    def test_async_client_closed_with_its_event_loop(self):
+        """Test that each event loop gets its own client, closed when the loop shuts down."""
+        clients = []
+
+        async def fetch():
+            client = get_async_client()
+            self.assertIs(get_async_client(), client)
+            self.assertEqual(await client.geocode('Zakopane'), (49.3, 19.95))
+            self.assertFalse(client.client.is_closed)
+            clients.append(client)
+
+        asyncio.run(fetch())
+        asyncio.run(fetch())
+        self.assertIsNot(clients[0], clients[1])
+        self.assertTrue(all(client.client.is_closed for client in clients))
+
+    def test_warm_up_fetches_all_cities_in_one_request(self):
+        """Test that warm-up geocodes unknown cities and batches forecasts."""
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        for i, city in enumerate(['Zakopane', 'Warszawa', 'Nowhere', 'warszawa']):
+            Contact.objects.create(
+                first_name='Jan', last_name='Test', phone_number=f'+4812345678{i}',
+                email=f'jan{i}@example.com', city=city, status=status_new
+            )
+
+        stats = warm_contact_cities()
+        self.assertEqual(stats['warmed'], 2)
+        self.assertEqual(stats['not_found'], 1)
+        self.assertEqual(self.server.paths.count('/v1/forecast'), 1)
+        self.assertEqual(cache.get(get_cache_key('zakopane'))['data']['temperature'], 3.5)
+
+        # Fresh entries are not fetched again
+        self.server.paths = []
+        self.assertEqual(warm_contact_cities()['fresh'], 2)
+        self.assertEqual(self.server.paths, [])
+
+    def test_new_contact_city_is_queued_for_warm_up(self):
+        """Test that saving a contact queues its city after commit."""
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        with mock.patch('contacts.signals.queue_city_warmup') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                Contact.objects.create(
+                    first_name='Ewa', last_name='Test', phone_number='+48111222333',
+                    email='ewa@example.com', city='Sopot', status=status_new
+                )
+        queue.assert_called_once_with('Sopot')
+
+    def test_contact_saved_without_city_change_is_not_queued(self):
+        """Test that updates queue warm-up only when they change the city."""
+        status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        contact = Contact.objects.create(
+            first_name='Ewa', last_name='Test', phone_number='+48111222333',
+            email='ewa@example.com', city='Sopot', status=status_new
+        )
+        with mock.patch('contacts.signals.queue_city_warmup') as queue:
+            with self.captureOnCommitCallbacks(execute=True):
+                contact.first_name = 'Ewelina'
+                contact.save()
+                contact = Contact.objects.get(pk=contact.pk)
+                contact.last_name = 'Nowak'
+                contact.save()
+                contact.city = 'Gdynia'
+                contact.save(update_fields=['first_name'])
+            queue.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                contact.save()
+                contact.save()
+        queue.assert_called_once_with('Gdynia')
+
+
+class ForecastWindowTest(TestCase):
+    """Tests for stored hourly forecast windows."""
+
+    def test_values_interpolated_between_hours(self):
+        """Test that values between two hours are interpolated, codes are not."""
+        data = hourly_forecast(temperature=10, humidity=50, wind=5, code=3, hours=2)
+        data['hourly']['temperature_2m'] = [10, 20]
+        data['hourly']['weathercode'] = [3, 61]
+        window = ForecastWindow.from_response(data)
+
+        values = window.at(window.starts_at + timedelta(minutes=30))
+        self.assertAlmostEqual(values['temperature_2m'], 15)
+        self.assertEqual(values['weathercode'], 3)
+        self.assertIsNone(window.at(window.starts_at + timedelta(hours=2)))
+
+    def test_stored_window_serves_later_hours(self):
+        """Test that a stored window answers any hour of the horizon."""
+        window = store_window(52.2297, 21.0122, hourly_forecast(temperature=1, humidity=2, wind=3, code=0))
+        self.assertEqual(window.hours, 72)
+
+        later = window.starts_at + timedelta(hours=47, minutes=10)
+        stored = get_stored_window(52.2297, 21.0122, when=later)
+        self.assertEqual(stored.at(later)['temperature_2m'], 1)
+        self.assertIsNone(get_stored_window(52.2297, 21.0122, when=later + timedelta(days=1)))
+
+    def test_weather_cache_miss_reuses_window(self):
+        """Test that a weather cache miss does not call upstream while a window is stored."""
+        cache.clear()
+        response = mock.Mock()
+        response.json.return_value = hourly_forecast(temperature=7, humidity=60, wind=4, code=2)
+        with mock.patch('requests.Session.get', return_value=response) as get:
+            self.assertEqual(get_weather('Lublin', 'lublin')['temperature'], 7)
+            cache.clear()
+            self.assertEqual(get_weather('Lublin', 'lublin')['description'], 'Częściowe zachmurzenie')
+        self.assertEqual(get.call_count, 1)
+
+    def test_forecast_not_covering_now_is_an_error(self):
+        """Test that a window ending before now gives an error, not empty readings described as clear sky."""
+        cache.clear()
+        data = hourly_forecast(temperature=7, humidity=60, wind=4, code=0)
+        data['hourly']['time'] = [t - 4 * 86400 for t in data['hourly']['time']]
+        response = mock.Mock()
+        response.json.return_value = data
+        with mock.patch('requests.Session.get', return_value=response):
+            response = self.client.get('/api/weather/Lublin/')
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.json()['error'], 'Brak prognozy pogody dla bieżącej godziny')
+        self.assertIsNone(cache.get(get_cache_key('lublin')))
+
+
+class SQLiteProfileTest(TestCase):
+    """Tests for the production SQLite profile and write priority."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_imports_yield_to_interactive_writes(self):
+        self.assertLess(yield_to_interactive_writes(timeout=1), 0.5)
+        with interactive_write():
+            self.assertTrue(interactive_writes_pending())
+            self.assertGreaterEqual(yield_to_interactive_writes(timeout=0.05), 0.05)
+        self.assertFalse(interactive_writes_pending())
+
+        with mock.patch('contacts.middleware.interactive_write', wraps=interactive_write) as marked:
+            self.client.get(reverse('contacts:list'))
+            marked.assert_not_called()
+            self.client.post(reverse('contacts:create'), {})
+            marked.assert_called_once()
+            # Writes that do not touch contacts are not counted
+            self.client.post(reverse('contacts:api-weather-batch'), {}, content_type='application/json')
+            marked.assert_called_once()
+
+    def test_interactive_write_count_survives_expiry(self):
+        """Test that writes ending after the counter expired do not drive it below zero."""
+        first, second, third = interactive_write(), interactive_write(), interactive_write()
+        first.__enter__()
+        second.__enter__()
+        cache.delete(INTERACTIVE_WRITES_KEY)
+        third.__enter__()
+        first.__exit__(None, None, None)
+        second.__exit__(None, None, None)
+        self.assertEqual(cache.get(INTERACTIVE_WRITES_KEY), 0)
+        third.__exit__(None, None, None)
+        with interactive_write():
+            self.assertTrue(interactive_writes_pending())
+        self.assertFalse(interactive_writes_pending())
+
+
+# Not a Django TestCase: its guards reject the connections of the bench database
+class SQLiteBenchTest(unittest.TestCase):
+    """Concurrency test of the production SQLite profile."""
+
+    def test_parallel_readers_and_writers_without_lock_errors(self):
+        stats = run_bench('production', seconds=1, readers=2, writers=2, imports=1, chunk_size=500)
+        for role in ('reader', 'writer', 'import'):
+            self.assertGreater(stats[role]['operations'], 0, role)
+            self.assertEqual(stats[role]['errors'], 0, role)
+
+
+@override_settings(CONTACT_IMPORT_WORKERS=0)
+class ContactImportTest(TestCase):
+    """Tests for CSV import."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+        self.status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.status_lost, _ = ContactStatusChoices.objects.get_or_create(name='zagubiony')
+        Contact.objects.create(
+            first_name='Jan', last_name='Kowalski', phone_number='+48100000000',
+            email='jan@example.com', city='Warszawa', status=self.status_new
+        )
+        patcher = mock.patch('contacts.jobs.queue_city_warmup')
+        self.queue_warmup = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def upload(self, content, encoding='utf-8'):
+        csv_file = SimpleUploadedFile('contacts.csv', content.encode(encoding), content_type='text/csv')
+        return self.client.post(reverse('contacts:import'), {'csv_file': csv_file}, follow=True)
+
+    def run_jobs(self):
+        while (job_id := claim_next_job()) is not None:
+            run_import_job(job_id)
+
+    def test_import_skips_duplicates(self):
+        """Test that duplicates in the database and within the file are skipped."""
+        response = self.upload(
+            'first_name;last_name;phone_number;email;city;status\n'
+            'anna;nowak;+48200000000;Anna@example.com;kraków;ZAGUBIONY\n'
+            'Adam;Nowak;+48300000000;JAN@example.com;Gdańsk;nowy\n'
+            'Ewa;Lis;+48200000000;ewa@example.com;Sopot;nowy\n'
+            'Ola;Lis;+48400000000;anna@example.com;Sopot;nowy\n'
+            ';;;;;\n'
+            'Piotr;Mak;+48500000000;piotr@example.com;łódź;nieznany\n'
+        )
+        self.assertEqual(response.status_code, 200)
+        job = response.context['job']
+        self.assertEqual(job.status, ImportJob.Status.PENDING)
+        self.run_jobs()
+        self.assertEqual(Contact.objects.count(), 3)
+
+        anna = Contact.objects.get(email='anna@example.com')
+        self.assertEqual((anna.first_name, anna.city, anna.status), ('Anna', 'Kraków', self.status_lost))
+        self.assertEqual(Contact.objects.get(email='piotr@example.com').status, self.status_new)
+
+        response = self.client.get(reverse('contacts:api-import-job', kwargs={'pk': job.pk}))
+        data = response.json()
+        self.assertEqual((data['status'], data['progress']), ('done', 100))
+        self.assertEqual((data['rows_processed'], data['created_count'], data['skipped_count']), (6, 2, 3))
+        self.assertEqual(data['rejections'], [
+            {'line': 3, 'reason': 'Kontakt z tym adresem email już istnieje.'},
+            {'line': 4, 'reason': 'Kontakt z tym numerem telefonu już istnieje.'},
+            {'line': 5, 'reason': 'Kontakt z tym adresem email już istnieje.'},
+        ])
+        self.assertFalse(ImportJob.objects.get(pk=job.pk).file)
+        self.assertEqual({c.args[0] for c in self.queue_warmup.call_args_list}, {'Kraków', 'Łódź'})
+
+    def test_rejections_report_file_lines(self):
+        """Test that blank lines and multi-line quoted values count in rejection line numbers."""
+        response = self.upload(
+            'first_name;last_name;phone_number;email;city;status\n'
+            '\n'
+            '"Anna";"Nowak\nKowalska";+48200000000;anna@example.com;Kraków;nowy\n'
+            'Adam;Nowak;+48300000000;JAN@example.com;Gdańsk;nowy\n'
+            '\n'
+            'E;Lis;+48400000000;ewa@example.com;Sopot;nowy\n'
+        )
+        self.run_jobs()
+        job = ImportJob.objects.get(pk=response.context['job'].pk)
+        self.assertEqual(sorted(rejection['line'] for rejection in job.rejections), [5, 7])
+
+    def test_stale_running_jobs_are_marked_failed(self):
+        """Test that running jobs without recent progress are marked failed, also by the import worker."""
+        header = 'first_name;last_name;phone_number;email;city;status\n'
+        self.upload(header)
+        self.upload(header)
+        stale_id, live_id = ImportJob.objects.order_by('created_at').values_list('pk', flat=True)
+        ImportJob.objects.filter(pk=stale_id).update(
+            status=ImportJob.Status.RUNNING, heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        ImportJob.objects.filter(pk=live_id).update(status=ImportJob.Status.RUNNING, heartbeat_at=timezone.now())
+
+        with override_settings(CONTACT_IMPORT_STALE_AFTER=600):
+            self.assertEqual(fail_stale_jobs(), 1)
+            stale = ImportJob.objects.get(pk=stale_id)
+            self.assertEqual(stale.status, ImportJob.Status.FAILED)
+            self.assertIn('przerwany', stale.error)
+            self.assertEqual(ImportJob.objects.get(pk=live_id).status, ImportJob.Status.RUNNING)
+
+        with override_settings(CONTACT_IMPORT_STALE_AFTER=0):
+            stderr = io.StringIO()
+            call_command('import_worker', once=True, stdout=io.StringIO(), stderr=stderr)
+        self.assertEqual(ImportJob.objects.get(pk=live_id).status, ImportJob.Status.FAILED)
+        self.assertIn('1', stderr.getvalue())
+
+    def test_pending_job_without_import_process_fails_when_polled(self):
+        """Test that polling fails a job no process took up, deleting its upload."""
+        job = self.upload('first_name;last_name;phone_number;email;city;status\n').context['job']
+        stored_name = job.file.name
+        ImportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        with override_settings(CONTACT_IMPORT_STALE_AFTER=600):
+            data = self.client.get(reverse('contacts:api-import-job', kwargs={'pk': job.pk})).json()
+        self.assertEqual(data['status'], 'failed')
+        self.assertIn('nie został rozpoczęty', data['error'])
+        self.assertFalse(ImportJob.objects.get(pk=job.pk).file)
+        self.assertFalse(job.file.storage.exists(stored_name))
+
+    def test_failed_import_deletes_upload(self):
+        """Test that a job failing during the import deletes its file like a finished one."""
+        job = self.upload('first_name;last_name;phone_number;email;city;status\n').context['job']
+        with mock.patch.object(ContactImporter, 'import_rows', side_effect=OSError('dysk pełny')):
+            self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.file.name), (ImportJob.Status.FAILED, 'dysk pełny', ''))
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'imports')), [])
+
+    def test_import_threads_take_leftover_pending_jobs(self):
+        """Test that an import thread works through every pending job, not just the one it was started for."""
+        header = 'first_name;last_name;phone_number;email;city;status\n'
+        self.upload(header + 'Anna;Nowak;+48200000000;anna@example.com;Kraków;nowy\n')
+        self.upload(header + 'Ewa;Lis;+48300000000;ewa@example.com;Sopot;nowy\n')
+        executor = mock.Mock()
+        executor.submit.side_effect = lambda run: run()
+        with override_settings(CONTACT_IMPORT_WORKERS=1), \
+                mock.patch('contacts.jobs._get_executor', return_value=executor), \
+                mock.patch('contacts.jobs.connection'):
+            process_pending_jobs()
+        executor.submit.assert_called_once()
+        self.assertEqual(
+            set(ImportJob.objects.values_list('status', flat=True)), {ImportJob.Status.DONE}
+        )
+        self.assertEqual(Contact.objects.count(), 3)
+
+    def test_import_streams_latin1_file_with_semicolons(self):
+        """Test that encoding and delimiter are detected from the start of the file."""
+        rows = ''.join(
+            f'Zoë;Müller;+48700{i:06d};zoe{i}@example.com;Köln;nowy\n' for i in range(2000)
+        )
+        self.upload('first_name;last_name;phone_number;email;city;status\n' + rows, encoding='latin-1')
+        self.run_jobs()
+        self.assertEqual(Contact.objects.filter(city='Köln').count(), 2000)
+        self.assertTrue(Contact.objects.filter(first_name='Zoë', last_name='Müller').exists())
+
+    @override_settings(CONTACT_IMPORT_MAX_SIZE=100)
+    def test_import_rejects_file_over_size_limit(self):
+        """Test that the upload size limit comes from settings."""
+        response = self.upload('first_name;last_name;phone_number;email;city;status\n' + 'x;' * 100)
+        self.assertContains(response, 'Plik jest zbyt duży')
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_import_rejects_missing_columns_before_queueing(self):
+        """Test that the header is validated during the upload."""
+        response = self.upload('first_name,last_name,email\nJan,Nowak,jan.nowak@example.com\n')
+        self.assertContains(response, 'Brakujące kolumny')
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_import_rejects_rows_failing_form_rules(self):
+        """Test that rows are validated with the same rules as ContactForm."""
+        rows = [
+            {'first_name': 'J', 'last_name': 'Nowak', 'phone_number': '+48111111111',
+             'email': 'j@example.com', 'city': 'Radom', 'status': 'nowy'},
+            {'first_name': 'Jan', 'last_name': 'Nowak', 'phone_number': '123',
+             'email': 'jn@example.com', 'city': 'Radom', 'status': 'nowy'},
+            {'first_name': 'Jan', 'last_name': 'Nowak', 'phone_number': '+48111111112',
+             'email': 'not-an-email', 'city': 'Radom', 'status': 'nowy'},
+            {'first_name': 'jan', 'last_name': 'nowak', 'phone_number': '+48111111113',
+             'email': ' JN@Example.com', 'city': 'radom', 'status': 'nowy'},
+        ]
+        importer = ContactImporter().import_rows(rows)
+        self.assertEqual((importer.created_count, importer.skipped_count), (1, 3))
+        self.assertEqual([r['line'] for r in importer.rejections], [2, 3, 4])
+        self.assertEqual(importer.rejections[0]['reason'], 'Imię musi mieć co najmniej 2 znaki.')
+        self.assertTrue(importer.rejections[1]['reason'].startswith('Numer telefonu:'))
+        self.assertTrue(importer.rejections[2]['reason'].startswith('Adres email:'))
+        contact = Contact.objects.get(phone_number='+48111111113')
+        self.assertEqual((contact.first_name, contact.email, contact.city), ('Jan', 'jn@example.com', 'Radom'))
+
+    def test_parallel_validation_keeps_row_order(self):
+        """Test that chunks validated in a process pool come back in order."""
+        chunks = [
+            [{'first_name': f'Imię{i}', 'last_name': 'Nowak', 'phone_number': f'+48800{i:06d}',
+              'email': f'p{i}@example.com' if i % 3 else 'zły', 'city': 'Opole', 'status': 'nowy'}
+             for i in range(start, start + 10)]
+            for start in range(0, 50, 10)
+        ]
+        parallel = list(validate_chunks(chunks, workers=2))
+        self.assertEqual(parallel, list(validate_chunks(chunks, workers=1)))
+        self.assertEqual(parallel[1][0][0]['first_name'], 'Imię10')
+        self.assertIsNotNone(parallel[0][0][1])
+
+    def test_only_import_worker_validates_in_process_pool(self):
+        """Test that jobs run by the web process validate rows inline."""
+        row = 'Anna;Nowak;+48200000000;anna@example.com;Kraków;nowy\n'
+        header = 'first_name;last_name;phone_number;email;city;status\n'
+        with mock.patch('contacts.importer.validate_chunks', wraps=validate_chunks) as validate:
+            self.upload(header + row)
+            self.run_jobs()
+            self.assertEqual(validate.call_args.args[1], 1)
+
+            self.upload(header + row.replace('anna', 'ewa').replace('+482', '+483'))
+            with override_settings(CONTACT_IMPORT_VALIDATION_WORKERS=3):
+                call_command('import_worker', once=True, stdout=io.StringIO())
+            self.assertEqual(validate.call_args.args[1], 3)
+        self.assertEqual(Contact.objects.count(), 3)
+
+    def test_import_query_count_does_not_grow_with_rows(self):
+        """Test that the importer runs a constant number of queries per chunk."""
+        rows = [
+            {'first_name': 'Ala', 'last_name': 'Bąk', 'phone_number': f'+48600000{i:03d}',
+             'email': f'user{i}@example.com', 'city': 'Lublin', 'status': 'nowy'}
+            for i in range(100)
+        ]
+        importer = ContactImporter(chunk_size=500)
+        with self.assertNumQueries(5):
+            importer.import_rows(rows)
+        self.assertEqual(importer.created_count, 100)
+
+
+class ContactExportTest(TestCase):
+    """Tests for streaming contact export."""
+
+    def setUp(self):
+        self.status_new, _ = ContactStatusChoices.objects.get_or_create(name='nowy')
+        self.status_lost, _ = ContactStatusChoices.objects.get_or_create(name='zagubiony')
+        Contact.objects.create(
+            first_name='Jan', last_name='Kowalski', phone_number='+48100000000',
+            email='jan@example.com', city='Łódź', status=self.status_new
+        )
+        Contact.objects.create(
+            first_name='Anna', last_name='Nowak', phone_number='+48100000001',
+            email='anna@example.com', city='Kraków', status=self.status_lost
+        )
+
+    def test_csv_export_uses_list_filters_and_import_columns(self):
+        """Test that the CSV export is filtered like the list and has importer columns."""
+        response = self.client.get(reverse('contacts:export'), {'q': 'nowak', 'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(content.splitlines(), [
+            'first_name,last_name,phone_number,email,city,status',
+            'Anna,Nowak,+48100000001,anna@example.com,Kraków,zagubiony',
+        ])
+
+    def test_csv_export_round_trips_through_importer(self):
+        """Test that an exported file is accepted by the importer."""
+        content = b''.join(self.client.get(reverse('contacts:export')).streaming_content)
+        Contact.objects.all().delete()
+        importer = ContactImporter().import_rows(csv.DictReader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual(importer.created_count, 2)
+        self.assertEqual(Contact.objects.get(email='anna@example.com').status, self.status_lost)
+
+    def test_ndjson_export_command(self):
+        """Test the NDJSON export of the management command."""
+        out = io.StringIO()
+        call_command('export_contacts', format='ndjson', sort='last_name', order='asc', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['last_name'] for row in rows], ['Kowalski', 'Nowak'])
+        self.assertEqual((rows[0]['city'], rows[0]['status']), ('Łódź', 'nowy'))
+
+    def test_unknown_export_format(self):
+        response = self.client.get(reverse('contacts:export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,98 @@
+"""SQLite triggers that maintain derived contact tables.
+
+- ``contacts_contact_fts``: full-text index (``contacts.search``, migration 0007)
+- ``contacts_contactstatuscount``: contacts per status (``contacts.counters``, migration 0008)
+- ``contacts_contactchange``: change log (``contacts.changes``, migration 0009)
+
+SQLite drops a table's triggers when Django remakes the table to alter it,
+so they are installed again after every ``migrate`` (see ``contacts.apps``).
+"""
+
+FTS_TABLE = 'contacts_contact_fts'
+FTS_COLUMNS = ', '.join(('first_name', 'last_name', 'email', 'city', 'phone_number'))
+COUNTER_TABLE = 'contacts_contactstatuscount'
+CHANGE_TABLE = 'contacts_contactchange'
+
+# Same text format as Django's SQLite datetime columns (UTC)
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _fts_values(row):
+    """Column values with ł/Ł folded, which remove_diacritics does not cover."""
+    return ', '.join(
+        f"replace(replace({row}.{column}, 'ł', 'l'), 'Ł', 'L')" for column in FTS_COLUMNS.split(', ')
+    )
+
+
+def _record_change(row, deleted):
+    return f"""
+        DELETE FROM {CHANGE_TABLE} WHERE contact_id = {row}.id;
+        INSERT INTO {CHANGE_TABLE} (contact_id, deleted, changed_at) VALUES ({row}.id, {deleted}, {NOW});
+    """
+
+
+FTS_TRIGGERS = {
+    'contacts_contact_fts_insert': f"""
+        AFTER INSERT ON contacts_contact BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+        END
+    """,
+    'contacts_contact_fts_update': f"""
+        AFTER UPDATE OF {FTS_COLUMNS} ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, {FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+        END
+    """,
+    'contacts_contact_fts_delete': f"""
+        AFTER DELETE ON contacts_contact BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+}
+
+COUNTER_TRIGGERS = {
+    # Every status gets its counter row, so contact triggers only need UPDATEs
+    'contacts_status_count_create': f"""
+        AFTER INSERT ON contacts_contactstatuschoices BEGIN
+            INSERT OR IGNORE INTO {COUNTER_TABLE} (status_id, count) VALUES (new.id, 0);
+        END
+    """,
+    'contacts_contact_count_insert': f"""
+        AFTER INSERT ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+    'contacts_contact_count_delete': f"""
+        AFTER DELETE ON contacts_contact BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+        END
+    """,
+    'contacts_contact_count_update': f"""
+        AFTER UPDATE OF status_id ON contacts_contact WHEN old.status_id <> new.status_id BEGIN
+            UPDATE {COUNTER_TABLE} SET count = count - 1 WHERE status_id = old.status_id;
+            UPDATE {COUNTER_TABLE} SET count = count + 1 WHERE status_id = new.status_id;
+        END
+    """,
+}
+
+CHANGE_TRIGGERS = {
+    'contacts_contact_change_insert': f"AFTER INSERT ON contacts_contact BEGIN {_record_change('new', 0)} END",
+    'contacts_contact_change_update': f"AFTER UPDATE ON contacts_contact BEGIN {_record_change('new', 0)} END",
+    'contacts_contact_change_delete': f"AFTER DELETE ON contacts_contact BEGIN {_record_change('old', 1)} END",
+}
+
+
+def install_triggers(connection):
+    """Create the missing contact triggers whose target tables exist; SQLite only."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        if 'contacts_contact' not in tables:
+            return
+        for table, triggers in ((FTS_TABLE, FTS_TRIGGERS), (COUNTER_TABLE, COUNTER_TRIGGERS),
+                                (CHANGE_TABLE, CHANGE_TRIGGERS)):
+            if table not in tables:
+                continue
+            for name, body in triggers.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
@@ -1,6 +1,7 @@
 from django.urls import path
 from . import views
 from . import api_views
+from . import async_views
 
 app_name = 'contacts'
 
@@ -11,10 +12,19 @@ urlpatterns = [
     path('contact/add/', views.ContactCreateView.as_view(), name='create'),
     path('contact/<int:pk>/edit/', views.ContactUpdateView.as_view(), name='update'),
     path('contact/<int:pk>/delete/', views.ContactDeleteView.as_view(), name='delete'),
+    path('export/', views.ContactExportView.as_view(), name='export'),
     path('import/', views.ContactImportView.as_view(), name='import'),
+    path('import/<int:pk>/', views.ImportJobDetailView.as_view(), name='import-job'),
 
     # REST API endpoints
     path('api/contacts/', api_views.ContactListCreateAPIView.as_view(), name='api-list'),
+    path('api/contacts/changes/', api_views.ContactChangesAPIView.as_view(), name='api-changes'),
+    path('api/contacts/bulk/', api_views.ContactBulkAPIView.as_view(), name='api-bulk'),
     path('api/contacts/<int:pk>/', api_views.ContactDetailAPIView.as_view(), name='api-detail'),
+    path('api/weather/', api_views.WeatherBatchAPIView.as_view(), name='api-weather-batch'),
     path('api/weather/<str:city>/', api_views.WeatherAPIView.as_view(), name='api-weather'),
+    path('api/async/weather/<str:city>/', async_views.AsyncWeatherView.as_view(), name='api-weather-async'),
+    path('api/imports/<int:pk>/', api_views.ImportJobAPIView.as_view(), name='api-import-job'),
+    path('api/metrics/weather/', api_views.WeatherMetricsAPIView.as_view(), name='api-metrics-weather'),
+    path('api/metrics/cache/', api_views.ResponseCacheMetricsAPIView.as_view(), name='api-metrics-cache'),
 ]
@@ -0,0 +1,102 @@
+"""Row validation for CSV imports, safe to run in worker processes.
+
+The module does not import models at load time, so spawned workers can
+unpickle its functions before ``init_worker`` has set Django up.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+
+# Minimum lengths enforced by ContactForm
+MIN_LENGTHS = {
+    'first_name': ('Imię musi mieć co najmniej 2 znaki.', 2),
+    'last_name': ('Nazwisko musi mieć co najmniej 2 znaki.', 2),
+    'city': ('Nazwa miasta musi mieć co najmniej 2 znaki.', 2),
+}
+
+TITLE_CASE_FIELDS = ('first_name', 'last_name', 'city')
+
+
+def normalize_row(row):
+    """Strip keys and values of a ``csv.DictReader`` row and lowercase the keys."""
+    return {k.strip().lower(): v.strip() if v else '' for k, v in row.items() if k}
+
+
+def validate_row(row):
+    """Validate and normalize a raw CSV row with the rules of ``ContactForm``.
+
+    Returns (record, error): a dict of normalized field values and None, or
+    None and the first error message. Empty rows give (None, None).
+    Uniqueness is checked later, against the database.
+    """
+    try:
+        row = normalize_row(row)
+    except AttributeError:
+        return None, 'Nieprawidłowy wiersz.'
+    if not any(row.values()):
+        return None, None
+
+    record = {
+        'first_name': row.get('first_name', ''),
+        'last_name': row.get('last_name', ''),
+        'phone_number': row.get('phone_number', ''),
+        'email': row.get('email', '').lower(),
+        'city': row.get('city', ''),
+    }
+    for name, value in record.items():
+        if name in MIN_LENGTHS and len(value) < MIN_LENGTHS[name][1]:
+            return None, MIN_LENGTHS[name][0]
+        field = apps.get_model('contacts', 'Contact')._meta.get_field(name)
+        try:
+            # Model field validators: max length, phone format, email format
+            field.run_validators(value)
+        except ValidationError as exc:
+            return None, f'{field.verbose_name}: {exc.messages[0]}'
+    for name in TITLE_CASE_FIELDS:
+        record[name] = record[name].title()
+    record['status'] = row.get('status', '').lower()
+    return record, None
+
+
+def validate_chunk(rows):
+    """Validate a list of raw rows; results are in row order."""
+    return [validate_row(row) for row in rows]
+
+
+def init_worker():
+    """Set up Django in a spawned validation process."""
+    django.setup()
+
+
+def validate_chunks(chunks, workers=None):
+    """Yield ``validate_chunk`` results for an iterable of chunks, in order.
+
+    With more than one worker and more than one chunk, chunks are validated
+    in a process pool while the caller consumes results, keeping at most
+    two chunks per worker in flight so memory use stays bounded.
+    """
+    if workers is None:
+        workers = settings.CONTACT_IMPORT_VALIDATION_WORKERS or 1
+    chunks = iter(chunks)
+    first = list(islice(chunks, 2))
+    if workers <= 1 or len(first) < 2:
+        yield from map(validate_chunk, chain(first, chunks))
+        return
+
+    # Spawned workers do not inherit threads and locks of the web process
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as executor:
+        pending = deque()
+        for chunk in chain(first, chunks):
+            pending.append(executor.submit(validate_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
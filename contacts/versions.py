@@ -0,0 +1,28 @@
+import time
+
+from django.core.cache import cache
+
+
+def _generation_key(name):
+    return f'contacts:generation:{name}'
+
+
+def _new_generation():
+    # Time based rather than a counter: a key evicted from the cache comes
+    # back with a value no process has seen before
+    return time.time_ns()
+
+
+def get_generation(name):
+    """Return the current generation of ``name``, shared by all worker processes."""
+    key = _generation_key(name)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(name):
+    """Start a new generation of ``name``, making every process drop its copies."""
+    cache.set(_generation_key(name), _new_generation(), None)
@@ -1,75 +1,121 @@
-import csv
-import io
+from django.conf import settings
 from django.urls import reverse_lazy
+from django.utils.functional import cached_property
 from django.views.generic import (
-    ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
+    ListView, DetailView, CreateView, UpdateView, DeleteView, FormView, View
 )
 from django.contrib import messages
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
 
-from .models import Contact, ContactStatusChoices
+from .conditional import ConditionalGetMixin, contact_version, contacts_version
+from .counters import count_for_params, status_counts
+from .models import Contact, ImportJob
+from .export import EXPORT_FORMATS, export_contacts
+from .filters import RELEVANCE, filter_contacts, get_sort
 from .forms import ContactForm, ContactImportForm
+from .importer import REQUIRED_COLUMNS, missing_columns, read_header
+from .jobs import check_import_queue, create_import_job
+from .pagination import CountedPaginator, InvalidCursor, KeysetPage, paginate_keyset
+from .response_cache import ResponseCacheMixin
+from .statuses import status_registry
 
 
-class ContactListView(ListView):
+class ContactListView(ResponseCacheMixin, ListView):
     """Display paginated list of contacts with search and sorting."""
 
     model = Contact
     template_name = 'contacts/contact_list.html'
     context_object_name = 'contacts'
     paginate_by = 10
+    paginator_class = CountedPaginator
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        search_query = self.request.GET.get('q', '').strip()
-        sort_by = self.request.GET.get('sort', 'date_added')
-        sort_order = self.request.GET.get('order', 'desc')
-        status_filter = self.request.GET.get('status', '')
+    version_key = 'list'
 
-        # Search filter
-        if search_query:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(city__icontains=search_query) |
-                Q(phone_number__icontains=search_query)
-            )
+    def get_version(self):
+        return contacts_version()
 
-        # Status filter
-        if status_filter:
-            queryset = queryset.filter(status_id=status_filter)
+    def get_cache_variants(self, request):
+        # Links on the page are relative and it has a single format
+        return ()
 
-        # Sorting
-        valid_sort_fields = ['last_name', 'date_added', 'first_name', 'city']
-        if sort_by not in valid_sort_fields:
-            sort_by = 'date_added'
-
-        order_prefix = '-' if sort_order == 'desc' else ''
-        queryset = queryset.order_by(f'{order_prefix}{sort_by}')
+    def get_queryset(self):
+        return filter_contacts(super().get_queryset(), self.request.GET)
+
+    @cached_property
+    def counts(self):
+        """Contacts per status, read once for the page count and the status filter."""
+        return status_counts()
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(queryset, per_page, count=self.known_count, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Number pages of small result sets; page larger ones (or ``?cursor=``) by keyset."""
+        cursor = self.request.GET.get('cursor')
+        limit = settings.CONTACT_PAGE_NUMBER_MAX_ROWS
+        # Unsearched lists are counted by the counters; otherwise a bounded
+        # count stops after limit + 1 rows instead of counting them all
+        self.known_count = count_for_params(self.request.GET, queryset.db, self.counts)
+        if self.known_count is not None:
+            small = self.known_count <= limit
+        else:
+            small = queryset.values('pk')[:limit + 1].count() <= limit
+        if cursor is None and small:
+            return super().paginate_queryset(queryset, page_size)
+
+        sort_by, descending = get_sort(self.request.GET)
+        if sort_by == RELEVANCE:
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = paginate_keyset(queryset, sort_by, descending, cursor, page_size)
+        except InvalidCursor:
+            page = paginate_keyset(queryset, sort_by, descending, None, page_size)
+        return None, page, page.object_list, page.has_other_pages()
 
-        return queryset
+    def cursor_url(self, cursor):
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        params['cursor'] = cursor
+        return f'?{params.urlencode()}'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_query'] = self.request.GET.get('q', '')
-        context['sort_by'] = self.request.GET.get('sort', 'date_added')
-        context['sort_order'] = self.request.GET.get('order', 'desc')
+        context['sort_by'], descending = get_sort(self.request.GET)
+        context['sort_order'] = 'desc' if descending else 'asc'
         context['selected_status'] = self.request.GET.get('status', '')
-        context['statuses'] = ContactStatusChoices.objects.all()
-        context['total_contacts'] = Contact.objects.count()
+        context['statuses'] = [
+            {'id': status.pk, 'name': status.name, 'contact_total': self.counts.get(status.pk, 0)}
+            for status in status_registry.all()
+        ]
+        context['total_contacts'] = sum(self.counts.values())
+        context['contacts'] = context['object_list'] = status_registry.attach(list(context['object_list']))
+
+        page = context['page_obj']
+        if isinstance(page, KeysetPage):
+            context['keyset_page'] = page
+            context['next_page_url'] = self.cursor_url(page.next_cursor) if page.has_next() else None
+            context['previous_page_url'] = self.cursor_url(page.previous_cursor) if page.has_previous() else None
         return context
 
 
-class ContactDetailView(DetailView):
+class ContactDetailView(ConditionalGetMixin, DetailView):
     """Display single contact details."""
 
     model = Contact
     template_name = 'contacts/contact_detail.html'
     context_object_name = 'contact'
 
+    version_key = 'detail'
+
+    def get_version(self):
+        return contact_version(self.kwargs['pk'])
+
+    def get_object(self, queryset=None):
+        contact = super().get_object(queryset)
+        status_registry.attach([contact])
+        return contact
+
 
 class ContactCreateView(CreateView):
     """Handle new contact creation."""
@@ -138,6 +184,20 @@ class ContactDeleteView(DeleteView):
         return super().form_valid(form)
 
 
+class ContactExportView(View):
+    """Stream contacts matching the list filters as CSV or NDJSON."""
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return HttpResponseBadRequest('Nieobsługiwany format eksportu.')
+        content_type, extension = EXPORT_FORMATS[fmt]
+        queryset = filter_contacts(Contact.objects.all(), request.GET)
+        response = StreamingHttpResponse(export_contacts(queryset, fmt), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="kontakty.{extension}"'
+        return response
+
+
 class ContactImportView(FormView):
     """Handle CSV file import for bulk contact creation."""
 
@@ -147,98 +207,37 @@ class ContactImportView(FormView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['csv_columns'] = ['first_name', 'last_name', 'phone_number', 'email', 'city', 'status']
+        context['csv_columns'] = list(REQUIRED_COLUMNS)
+        context['max_size'] = settings.CONTACT_IMPORT_MAX_SIZE
         return context
 
     def form_valid(self, form):
         csv_file = form.cleaned_data['csv_file']
 
-        # Decode file content
-        try:
-            decoded_file = csv_file.read().decode('utf-8-sig')
-        except UnicodeDecodeError:
-            try:
-                csv_file.seek(0)
-                decoded_file = csv_file.read().decode('latin-1')
-            except Exception:
-                messages.error(self.request, 'Nie można odczytać pliku.')
-                return self.form_invalid(form)
-
-        # Parse CSV with auto-detected delimiter
-        io_string = io.StringIO(decoded_file)
-        try:
-            sample = decoded_file[:1024]
-            dialect = csv.Sniffer().sniff(sample, delimiters=',;')
-            io_string.seek(0)
-            reader = csv.DictReader(io_string, dialect=dialect)
-        except csv.Error:
-            io_string.seek(0)
-            reader = csv.DictReader(io_string)
-
-        # Validate required columns
-        required_columns = {'first_name', 'last_name', 'phone_number', 'email', 'city', 'status'}
-        if not reader.fieldnames:
+        # Only the header is read here; rows are imported by a background job
+        columns = read_header(csv_file.file)
+        if not columns:
             messages.error(self.request, 'Plik CSV jest pusty lub ma nieprawidłowy format.')
             return self.form_invalid(form)
 
-        headers = {h.strip().lower() for h in reader.fieldnames if h}
-        missing_columns = required_columns - headers
-        if missing_columns:
-            messages.error(self.request, f'Brakujące kolumny: {", ".join(missing_columns)}')
+        missing = missing_columns(columns)
+        if missing:
+            messages.error(self.request, f'Brakujące kolumny: {", ".join(missing)}')
             return self.form_invalid(form)
 
-        # Process rows
-        created_count = 0
-        skipped_count = 0
+        job = create_import_job(csv_file)
+        messages.info(self.request, 'Plik został przyjęty. Import trwa w tle.')
+        return HttpResponseRedirect(job.get_absolute_url())
 
-        default_status, _ = ContactStatusChoices.objects.get_or_create(
-            name='nowy',
-            defaults={'description': 'Nowy kontakt'}
-        )
 
-        for row in reader:
-            try:
-                row = {k.strip().lower(): v.strip() if v else '' for k, v in row.items() if k}
-
-                if not any(row.values()):
-                    continue
-
-                # Get status or use default
-                status_name = row.get('status', '').strip()
-                try:
-                    status = ContactStatusChoices.objects.get(name__iexact=status_name)
-                except ContactStatusChoices.DoesNotExist:
-                    status = default_status
-
-                # Check for duplicates
-                email = row.get('email', '').lower()
-                phone = row.get('phone_number', '')
-
-                if Contact.objects.filter(email=email).exists():
-                    skipped_count += 1
-                    continue
-
-                if Contact.objects.filter(phone_number=phone).exists():
-                    skipped_count += 1
-                    continue
-
-                # Create contact
-                Contact.objects.create(
-                    first_name=row.get('first_name', '').title(),
-                    last_name=row.get('last_name', '').title(),
-                    phone_number=phone,
-                    email=email,
-                    city=row.get('city', '').title(),
-                    status=status
-                )
-                created_count += 1
-
-            except Exception:
-                skipped_count += 1
-
-        if created_count > 0:
-            messages.success(self.request, f'Zaimportowano {created_count} kontakt(ów).')
-        if skipped_count > 0:
-            messages.warning(self.request, f'Pominięto {skipped_count} wiersz(y).')
-
-        return HttpResponseRedirect(self.success_url)
+class ImportJobDetailView(DetailView):
+    """Show progress and results of a background CSV import."""
+
+    model = ImportJob
+    template_name = 'contacts/import_job.html'
+    context_object_name = 'job'
+
+    def get_object(self, queryset=None):
+        # Polled while the import runs; fail it here if its process is gone
+        check_import_queue()
+        return super().get_object(queryset)
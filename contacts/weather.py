@@ -0,0 +1,341 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .forecast import ForecastNotAvailable, get_stored_window, store_window
+from .geocoding import CityNotFound, ageocode_city, geocode_city
+from .resilience import UpstreamUnavailable
+from .singleflight import SingleFlight
+from .weather_client import get_async_client, get_client
+
+logger = logging.getLogger(__name__)
+
+# Weather code descriptions (Polish)
+WEATHER_CODES = {
+    0: "Bezchmurnie", 1: "Głównie bezchmurnie", 2: "Częściowe zachmurzenie",
+    3: "Pochmurno", 45: "Mgła", 48: "Szadź", 51: "Lekka mżawka",
+    53: "Umiarkowana mżawka", 55: "Gęsta mżawka", 61: "Lekki deszcz",
+    63: "Umiarkowany deszcz", 65: "Silny deszcz", 71: "Lekki śnieg",
+    73: "Umiarkowany śnieg", 75: "Silny śnieg", 80: "Przelotne opady",
+    81: "Umiarkowane przelotne opady", 82: "Silne przelotne opady",
+    95: "Burza", 96: "Burza z gradem", 99: "Silna burza z gradem"
+}
+
+# Coalesces concurrent upstream fetches for the same city
+weather_flight = SingleFlight(
+    'weather',
+    lock_timeout=settings.WEATHER_FETCH_LOCK_TIMEOUT,
+    wait_timeout=settings.WEATHER_FETCH_WAIT_TIMEOUT,
+)
+
+# Bounded pool refreshing stale entries off the request thread
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=settings.WEATHER_REFRESH_WORKERS,
+    thread_name_prefix='weather-refresh',
+)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def describe_weather_error(exc):
+    """Map a weather lookup exception to (message, HTTP status)."""
+    if isinstance(exc, CityNotFound):
+        return 'Nie znaleziono miasta', HTTPStatus.NOT_FOUND
+    if isinstance(exc, ForecastNotAvailable):
+        return 'Brak prognozy pogody dla bieżącej godziny', HTTPStatus.BAD_GATEWAY
+    if isinstance(exc, UpstreamUnavailable):
+        return 'Usługa pogodowa jest chwilowo niedostępna', HTTPStatus.SERVICE_UNAVAILABLE
+    if isinstance(exc, requests.Timeout):
+        return 'Przekroczono czas oczekiwania', HTTPStatus.GATEWAY_TIMEOUT
+    if isinstance(exc, requests.RequestException):
+        return 'Błąd pobierania danych pogodowych', HTTPStatus.BAD_GATEWAY
+    return 'Wystąpił błąd', HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def normalize_city(city):
+    """Return (decoded, normalized) city name used for lookups and cache keys."""
+    city_decoded = unquote(city)
+    return city_decoded, city_decoded.lower().strip()
+
+
+def get_cache_key(city_normalized):
+    """Return cache key for weather data of a normalized city name."""
+    return f'weather_{city_normalized.replace(" ", "_")}'
+
+
+def build_weather(city_decoded, window, when=None):
+    """Build the weather payload returned by the API from a forecast window.
+
+    Raises ``ForecastNotAvailable`` when the window does not cover ``when``.
+    """
+    values = window.at(when or timezone.now())
+    if values is None:
+        raise ForecastNotAvailable(f'No forecast for {city_decoded} at the requested time')
+    weather_code = values['weathercode']
+
+    return {
+        'city': city_decoded,
+        'temperature': _round(values['temperature_2m']),
+        'humidity': _round(values['relativehumidity_2m']),
+        'wind_speed': _round(values['windspeed_10m']),
+        'description': 'Nieznane' if weather_code is None else WEATHER_CODES.get(int(weather_code), 'Nieznane')
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def fetch_weather(city_decoded, city_normalized):
+    """Return current weather for a city from its stored forecast window.
+
+    Upstream is called only when no stored window covers the current time.
+    """
+    lat, lon = geocode_city(city_decoded, city_normalized)
+    now = timezone.now()
+    window = get_stored_window(lat, lon, now)
+    if window is None:
+        window = store_window(lat, lon, get_client().forecast(lat, lon))
+    return build_weather(city_decoded, window, now)
+
+
+async def afetch_weather(city_decoded, city_normalized):
+    """Async variant of ``fetch_weather``."""
+    lat, lon = await ageocode_city(city_decoded, city_normalized)
+    now = timezone.now()
+    window = await sync_to_async(get_stored_window)(lat, lon, now)
+    if window is None:
+        data = await get_async_client().forecast(lat, lon)
+        window = await sync_to_async(store_window)(lat, lon, data)
+    return build_weather(city_decoded, window, now)
+
+
+def _fetch_and_store(city_decoded, city_normalized):
+    """Fetch weather from upstream and cache it together with its fetch time.
+
+    Entries are kept for the hard TTL (``WEATHER_CACHE_STALE_TIMEOUT``) and
+    considered fresh for the soft TTL (``WEATHER_CACHE_TIMEOUT``).
+    """
+    entry = {
+        'data': fetch_weather(city_decoded, city_normalized),
+        'fetched_at': time.time(),
+    }
+    cache.set(get_cache_key(city_normalized), entry, timeout=settings.WEATHER_CACHE_STALE_TIMEOUT)
+    return entry
+
+
+def _refresh(cache_key, city_decoded, city_normalized):
+    """Refresh a stale entry, keeping the old value if upstream fails."""
+    lock_key = f'{cache_key}_refresh'
+    try:
+        # Only one worker refreshes a given city at a time
+        if not cache.add(lock_key, 1, timeout=settings.WEATHER_FETCH_LOCK_TIMEOUT):
+            return
+        try:
+            _fetch_and_store(city_decoded, city_normalized)
+        except Exception:
+            logger.warning('Weather refresh failed for %s, serving stale data', city_decoded, exc_info=True)
+        finally:
+            cache.delete(lock_key)
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(cache_key)
+        connection.close()
+
+
+def schedule_refresh(city_decoded, city_normalized):
+    """Queue a background refresh of a city; return False if it was not queued."""
+    cache_key = get_cache_key(city_normalized)
+    with _refreshing_lock:
+        if cache_key in _refreshing or len(_refreshing) >= settings.WEATHER_REFRESH_MAX_PENDING:
+            return False
+        _refreshing.add(cache_key)
+    _refresh_executor.submit(_refresh, cache_key, city_decoded, city_normalized)
+    return True
+
+
+def _entry_fetched_at(entry):
+    """Return the fetch time of a cache entry, 0 for entries cached without one.
+
+    Entries cached before fetch times were recorded hold the weather itself;
+    they count as stale until refreshed.
+    """
+    return entry.get('fetched_at', 0)
+
+
+def _from_entry(entry, city_decoded, city_normalized):
+    """Return weather stored in a cache entry, revalidating it when stale."""
+    data = entry['data'] if 'fetched_at' in entry else entry
+    if time.time() - _entry_fetched_at(entry) < settings.WEATHER_CACHE_TIMEOUT:
+        return data
+    schedule_refresh(city_decoded, city_normalized)
+    return {**data, 'stale': True}
+
+
+def get_cached_weather(cities):
+    """Return {normalized: weather} for cities found in cache.
+
+    ``cities`` maps normalized city names to their decoded form. Stale
+    entries are returned flagged as stale and refreshed in the background.
+    """
+    cache_keys = {get_cache_key(name): name for name in cities}
+    found = {}
+    for cache_key, entry in cache.get_many(cache_keys).items():
+        name = cache_keys[cache_key]
+        found[name] = _from_entry(entry, cities[name], name)
+    return found
+
+
+def get_weather(city_decoded, city_normalized):
+    """Return weather for a city from cache, fetching and caching it on a miss."""
+    cache_key = get_cache_key(city_normalized)
+    entry = cache.get(cache_key)
+    if entry:
+        return _from_entry(entry, city_decoded, city_normalized)
+
+    entry = weather_flight.do(cache_key, lambda: _fetch_and_store(city_decoded, city_normalized))
+    return entry['data']
+
+
+async def aget_weather(city_decoded, city_normalized):
+    """Async variant of ``get_weather``.
+
+    Concurrent misses are not coalesced here: waiting requests are cheap
+    coroutines rather than blocked worker threads.
+    """
+    cache_key = get_cache_key(city_normalized)
+    entry = await cache.aget(cache_key)
+    if entry:
+        return _from_entry(entry, city_decoded, city_normalized)
+
+    entry = {
+        'data': await afetch_weather(city_decoded, city_normalized),
+        'fetched_at': time.time(),
+    }
+    await cache.aset(cache_key, entry, timeout=settings.WEATHER_CACHE_STALE_TIMEOUT)
+    return entry['data']
+
+
+def warm_weather_cache(cities, force=False):
+    """Prefetch weather for many cities, using multi-location forecast requests.
+
+    Cities whose cached entry stays fresh for at least ``WEATHER_WARMUP_MARGIN``
+    seconds are skipped unless ``force`` is set. Returns counters.
+    """
+    pending = {}
+    for city in cities:
+        city_decoded, city_normalized = normalize_city(city or '')
+        if len(city_normalized) >= 2:
+            pending.setdefault(city_normalized, city_decoded)
+    stats = {'cities': len(pending), 'fresh': 0, 'warmed': 0, 'not_found': 0, 'failed': 0}
+
+    if not force:
+        fresh_after = time.time() - (settings.WEATHER_CACHE_TIMEOUT - settings.WEATHER_WARMUP_MARGIN)
+        cache_keys = {get_cache_key(name): name for name in pending}
+        for cache_key, entry in cache.get_many(cache_keys).items():
+            if _entry_fetched_at(entry) >= fresh_after:
+                del pending[cache_keys[cache_key]]
+                stats['fresh'] += 1
+
+    # Geocoding only calls upstream for cities that were never seen
+    located = []
+    for city_normalized, city_decoded in pending.items():
+        try:
+            located.append((city_normalized, city_decoded, geocode_city(city_decoded, city_normalized)))
+        except CityNotFound:
+            stats['not_found'] += 1
+        except Exception:
+            logger.warning('Geocoding failed for %s during warm-up', city_decoded, exc_info=True)
+            stats['failed'] += 1
+
+    # Locations with a usable stored forecast window need no upstream call
+    windows = {}
+    to_fetch = []
+    for city_normalized, city_decoded, coords in located:
+        window = get_stored_window(*coords)
+        if window is None:
+            to_fetch.append((city_normalized, city_decoded, coords))
+        else:
+            windows[city_normalized] = window
+
+    client = get_client()
+    batch_size = settings.WEATHER_WARMUP_BATCH_SIZE
+    for start in range(0, len(to_fetch), batch_size):
+        batch = to_fetch[start:start + batch_size]
+        try:
+            forecasts = client.forecast_many([coords for _, _, coords in batch])
+            for (city_normalized, _, coords), forecast in zip(batch, forecasts):
+                windows[city_normalized] = store_window(*coords, forecast)
+        except Exception:
+            logger.warning('Weather warm-up batch of %d cities failed', len(batch), exc_info=True)
+            stats['failed'] += len(batch)
+
+    fetched_at = time.time()
+    now = timezone.now()
+    entries = {}
+    for city_normalized, city_decoded, _ in located:
+        if city_normalized not in windows:
+            continue
+        try:
+            data = build_weather(city_decoded, windows[city_normalized], now)
+        except ForecastNotAvailable:
+            logger.warning('Forecast for %s does not cover the current time', city_decoded)
+            stats['failed'] += 1
+            continue
+        entries[get_cache_key(city_normalized)] = {'data': data, 'fetched_at': fetched_at}
+    cache.set_many(entries, timeout=settings.WEATHER_CACHE_STALE_TIMEOUT)
+    stats['warmed'] = len(entries)
+
+    return stats
+
+
+def warm_contact_cities(force=False):
+    """Prefetch weather for every distinct city of stored contacts."""
+    from .models import Contact
+
+    cities = Contact.objects.values_list('city', flat=True).distinct()
+    return warm_weather_cache(list(cities), force=force)
+
+
+def queue_city_warmup(city):
+    """Fetch weather for a city in the background unless it is already cached."""
+    city_decoded, city_normalized = normalize_city(city or '')
+    if len(city_normalized) < 2 or cache.has_key(get_cache_key(city_normalized)):
+        return False
+    return schedule_refresh(city_decoded, city_normalized)
+
+
+def _run_warmup_scheduler(interval):
+    while True:
+        time.sleep(interval)
+        # Only one worker process warms the cache per interval
+        if not cache.add('weather_warmup_lock', 1, timeout=int(interval * 0.9)):
+            continue
+        try:
+            logger.info('Weather warm-up finished: %s', warm_contact_cities())
+        except Exception:
+            logger.exception('Weather warm-up failed')
+        finally:
+            connection.close()
+
+
+def start_warmup_scheduler():
+    """Start the in-process warm-up thread when ``WEATHER_WARMUP_INTERVAL`` is set."""
+    interval = settings.WEATHER_WARMUP_INTERVAL
+    if not interval:
+        return None
+    thread = threading.Thread(
+        target=_run_warmup_scheduler, args=(interval,), name='weather-warmup', daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import threading
+import weakref
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # httpx is only needed for the async client
+    httpx = None
+
+from .forecast import SERIES
+from .resilience import get_breaker, guarded_get
+
+
+USER_AGENT = 'DjangoContactManager/1.0 (recruitment-task)'
+REQUEST_TIMEOUT = 15
+
+# Responses worth retrying with backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def geocode_params(city):
+    return {'q': city, 'format': 'json', 'limit': 1}
+
+
+def forecast_params(lat, lon):
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'hourly': ','.join(SERIES),
+        'forecast_days': settings.WEATHER_FORECAST_DAYS,
+        'timeformat': 'unixtime',
+        'timezone': 'GMT'
+    }
+
+
+def parse_geocode(geo_data):
+    """Return (lat, lon) from a Nominatim response, or None when nothing matched."""
+    if geo_data:
+        return float(geo_data[0]['lat']), float(geo_data[0]['lon'])
+    return None
+
+
+class WeatherClient:
+    """Blocking client for the geocoding and forecast APIs.
+
+    Owns a pooled ``requests.Session``, so connections (and TLS sessions)
+    are kept alive and reused between the geocode and forecast calls and
+    across requests served by the worker. Failed connections and retryable
+    statuses are retried with exponential backoff.
+    """
+
+    def __init__(self, geocode_url=None, forecast_url=None):
+        self.geocode_url = geocode_url or settings.WEATHER_GEOCODE_URL
+        self.forecast_url = forecast_url or settings.WEATHER_FORECAST_URL
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+
+        retry = Retry(
+            total=settings.WEATHER_HTTP_RETRIES,
+            backoff_factor=settings.WEATHER_HTTP_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=['GET'],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=settings.WEATHER_HTTP_POOL_SIZE,
+            max_retries=retry,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _get_json(self, url, params):
+        response = guarded_get(url, session=self.session, params=params, timeout=REQUEST_TIMEOUT)
+        return response.json()
+
+    def geocode(self, city):
+        """Return (lat, lon) for a city name, or None when it is unknown."""
+        return parse_geocode(self._get_json(self.geocode_url, geocode_params(city)))
+
+    def forecast(self, lat, lon):
+        """Return the raw hourly forecast response for a location."""
+        return self._get_json(self.forecast_url, forecast_params(lat, lon))
+
+    def forecast_many(self, coords):
+        """Return forecast responses for many (lat, lon) pairs in one request."""
+        params = forecast_params(
+            ','.join(str(lat) for lat, _ in coords),
+            ','.join(str(lon) for _, lon in coords),
+        )
+        data = self._get_json(self.forecast_url, params)
+        # Open-Meteo answers with a single object for one location
+        return data if isinstance(data, list) else [data]
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncWeatherClient:
+    """Non-blocking counterpart of ``WeatherClient`` built on ``httpx``.
+
+    Lets a single worker keep many upstream requests in flight when the
+    async weather view is served through ASGI. Connection limits replace the
+    thread bulkhead, since waiting requests do not hold worker threads.
+    """
+
+    def __init__(self, geocode_url=None, forecast_url=None):
+        if httpx is None:
+            raise ImproperlyConfigured('AsyncWeatherClient requires the httpx package.')
+        self.geocode_url = geocode_url or settings.WEATHER_GEOCODE_URL
+        self.forecast_url = forecast_url or settings.WEATHER_FORECAST_URL
+        transport = httpx.AsyncHTTPTransport(
+            retries=settings.WEATHER_HTTP_RETRIES,
+            limits=httpx.Limits(
+                max_connections=settings.WEATHER_HTTP_POOL_SIZE,
+                max_keepalive_connections=settings.WEATHER_HTTP_POOL_SIZE,
+            ),
+        )
+        self.client = httpx.AsyncClient(
+            transport=transport,
+            headers={'User-Agent': USER_AGENT},
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    async def _get_json(self, url, params):
+        retries = settings.WEATHER_HTTP_RETRIES
+        backoff = settings.WEATHER_HTTP_BACKOFF
+
+        async def get():
+            # httpx errors are translated so that they are handled like requests errors
+            try:
+                for attempt in range(retries + 1):
+                    response = await self.client.get(url, params=params)
+                    if response.status_code not in RETRY_STATUSES or attempt == retries:
+                        break
+                    await asyncio.sleep(backoff * 2 ** attempt)
+                response.raise_for_status()
+            except httpx.TimeoutException as exc:
+                raise requests.Timeout(str(exc)) from exc
+            except httpx.HTTPError as exc:
+                raise requests.RequestException(str(exc)) from exc
+            return response.json()
+
+        return await get_breaker(urlparse(url).netloc).acall(get)
+
+    async def geocode(self, city):
+        """Return (lat, lon) for a city name, or None when it is unknown."""
+        return parse_geocode(await self._get_json(self.geocode_url, geocode_params(city)))
+
+    async def forecast(self, lat, lon):
+        """Return the raw hourly forecast response for a location."""
+        return await self._get_json(self.forecast_url, forecast_params(lat, lon))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """Return the worker's WeatherClient (a new one after fork)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = WeatherClient()
+            _client_pid = os.getpid()
+        return _client
+
+
+async def _close_on_loop_shutdown(client):
+    """Close ``client`` when its event loop shuts down.
+
+    Event loops have no shutdown callbacks, but ``asyncio.run()`` (used by
+    asgiref for async views under WSGI and by ASGI servers) finishes the
+    async generators still suspended in the loop before closing it.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+def get_async_client():
+    """Return the AsyncWeatherClient bound to the running event loop.
+
+    The client is closed when the loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncWeatherClient()
+        # The loop tracks the generator weakly; the client keeps it alive
+        client.closer = _close_on_loop_shutdown(client)
+        loop.create_task(anext(client.closer))
+    return client
+
+
+def reset_clients():
+    """Drop cached clients, e.g. after changing upstream URLs."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+    _async_clients.clear()
@@ -0,0 +1,63 @@
+"""Priority of interactive writes over background imports.
+
+SQLite has a single writer at a time. Writers waiting for the lock poll
+for it (``busy_timeout``), and an import committing chunk after chunk can
+win it again and again, so a form save may wait for many chunks. Requests
+that write contacts count themselves in a counter shared by worker processes
+through the cache (``InteractiveWriteMiddleware``); imports call
+``yield_to_interactive_writes()`` before each chunk and wait while the
+counter is raised.
+"""
+
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+INTERACTIVE_WRITES_KEY = 'contacts:writes:interactive'
+# Expiry of the counter after the last interactive write started: a count
+# left by a killed process is forgotten after it
+COUNTER_TIMEOUT = 60
+
+
+@contextmanager
+def interactive_write():
+    """Mark the enclosed writes as interactive, making imports wait for them."""
+    try:
+        cache.incr(INTERACTIVE_WRITES_KEY)
+    except ValueError:
+        if not cache.add(INTERACTIVE_WRITES_KEY, 1, COUNTER_TIMEOUT):
+            cache.incr(INTERACTIVE_WRITES_KEY)
+    # Steady traffic must not let the counter expire under writes in flight
+    cache.touch(INTERACTIVE_WRITES_KEY, COUNTER_TIMEOUT)
+    try:
+        yield
+    finally:
+        try:
+            count = cache.decr(INTERACTIVE_WRITES_KEY)
+        except ValueError:
+            # Expired meanwhile; the count started over
+            pass
+        else:
+            if count < 0:
+                # Writes counted before an expiry ended after it; floor at 0
+                cache.incr(INTERACTIVE_WRITES_KEY, -count)
+
+
+def interactive_writes_pending():
+    return (cache.get(INTERACTIVE_WRITES_KEY) or 0) > 0
+
+
+def yield_to_interactive_writes(timeout=None, poll_interval=0.005):
+    """Wait while interactive writes are pending, at most ``timeout`` seconds; return the time waited.
+
+    ``timeout`` defaults to ``CONTACT_IMPORT_YIELD_TIMEOUT``, which keeps a
+    steady stream of interactive writes from stalling an import.
+    """
+    if timeout is None:
+        timeout = settings.CONTACT_IMPORT_YIELD_TIMEOUT
+    start = time.monotonic()
+    while time.monotonic() - start < timeout and interactive_writes_pending():
+        time.sleep(poll_interval)
+    return time.monotonic() - start
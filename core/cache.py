@@ -0,0 +1,281 @@
+"""
+Shared cache backend stored in a local SQLite file.
+
+Unlike LocMemCache, all worker processes on the host see the same entries,
+so gunicorn workers share warm weather/geocoding data and invalidation is
+visible everywhere. The file uses WAL mode, so readers do not block the
+writer. Integers are stored natively, which makes ``incr``/``decr`` a
+single atomic UPDATE. When the total size of stored values exceeds
+``MAX_SIZE`` bytes the least recently used entries are evicted.
+
+Example configuration::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': BASE_DIR / 'cache.sqlite3',
+            'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024},
+        }
+    }
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Cache backend keeping entries in a WAL-mode SQLite file."""
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    # Reads refresh an entry's LRU timestamp at most this often (seconds)
+    ACCESS_RESOLUTION = 5
+    # Size-based eviction is checked once per this many writes
+    CULL_CHECK_INTERVAL = 100
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = str(location)
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._busy_timeout = int(options.get('BUSY_TIMEOUT', 5000))
+        self._local = threading.local()
+        self._writes = 0
+
+    # Connection handling
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # Connections must not be shared with forked worker processes
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _connect(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=self._busy_timeout / 1000, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={self._busy_timeout}')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed REAL, size INTEGER)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+        return conn
+
+    # Value encoding
+
+    def _encode(self, value):
+        # Plain integers are stored natively so that incr() can run in SQL
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    @staticmethod
+    def _size(stored):
+        return len(stored) if isinstance(stored, bytes) else 8
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        return {key_map[k]: v for k, v in self._get_many(list(key_map)).items()}
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        conn = self._connection()
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        rows = conn.execute(
+            f'SELECT key, value, expires, accessed FROM cache WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+
+        result, expired, touched = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            result[key] = self._decode(value)
+            if now - accessed > self.ACCESS_RESOLUTION:
+                touched.append(key)
+
+        if expired:
+            conn.execute(
+                f'DELETE FROM cache WHERE key IN ({",".join("?" * len(expired))}) AND expires <= ?',
+                [*expired, now],
+            )
+        if touched:
+            conn.execute(
+                f'UPDATE cache SET accessed = ? WHERE key IN ({",".join("?" * len(touched))})',
+                [now, *touched],
+            )
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._set_many({key: value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set_many(
+            {self.make_and_validate_key(key, version=version): value for key, value in data.items()},
+            timeout,
+        )
+        return []
+
+    def _set_many(self, data, timeout):
+        if not data:
+            return
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = []
+        for key, value in data.items():
+            stored = self._encode(value)
+            rows.append((key, stored, expires, now, self._size(stored)))
+
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_cull(len(rows))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        stored = self._encode(value)
+        now = time.time()
+        # Insert, or overwrite only an entry that has already expired
+        cursor = self._connection().execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+            'accessed = excluded.accessed, size = excluded.size '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, stored, self.get_backend_timeout(timeout), now, self._size(stored), now),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._maybe_cull(1)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        now = time.time()
+        if type(delta) is int and abs(delta) < 2 ** 62:
+            # Atomic in SQL while the sum cannot overflow 64 bits
+            rows = conn.execute(
+                "UPDATE cache SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' "
+                'AND abs(value) < ? AND (expires IS NULL OR expires > ?) RETURNING value',
+                (delta, key, 2 ** 62, now),
+            ).fetchall()
+            if rows:
+                return rows[0][0]
+
+        # Pickled values (e.g. ints beyond 64 bits): read, add and write back
+        # in one write transaction
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = self._decode(row[0]) + delta
+            stored = self._encode(value)
+            conn.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?', (stored, self._size(stored), key)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now),
+        )
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({",".join("?" * len(keys))})', keys
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+    # Eviction
+
+    def _maybe_cull(self, writes):
+        self._writes += writes
+        if self._writes >= self.CULL_CHECK_INTERVAL:
+            self._writes = 0
+            self.cull()
+
+    def cull(self):
+        """Drop expired entries, then least recently used ones above MAX_SIZE."""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+            if total > self._max_size:
+                # Evict down to 90% of the limit to avoid culling on every write
+                excess = total - int(self._max_size * 0.9)
+                conn.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    'SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY accessed, key) AS running '
+                    'FROM cache) WHERE running - size < ?)',
+                    (excess,),
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
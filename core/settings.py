@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'contacts.middleware.InteractiveWriteMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -78,11 +82,36 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# DJANGO_DB_PROFILE=production tunes SQLite for several worker processes
+# writing at once (see `manage.py bench_sqlite`).
+DATABASE_PROFILES = {
+    'development': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    'production': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_LOCATION', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,  # seconds a worker keeps its connection and page cache
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Transactions take the write lock at BEGIN and wait for it; a deferred
+            # transaction that reads first fails at once when another writer got in
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',  # readers and the writer do not block each other
+                'PRAGMA synchronous=NORMAL',  # no fsync per commit; safe with WAL
+                'PRAGMA busy_timeout=20000',  # ms a writer waits for the lock
+                'PRAGMA cache_size=-65536',  # page cache per connection, in KiB
+                'PRAGMA mmap_size=268435456',  # bytes of the file read through mmap
+                'PRAGMA temp_store=MEMORY',
+            ]),
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[os.environ.get('DJANGO_DB_PROFILE', 'development')],
 }
 
 
@@ -124,6 +153,10 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Uploaded files (CSV imports waiting to be processed)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -138,14 +171,101 @@ REST_FRAMEWORK = {
 }
 
 # Cache configuration
-CACHES = {
-    'default': {
+# The default SQLite file cache is shared by all worker processes on the host.
+# Set DJANGO_CACHE_BACKEND=locmem to use a per-process in-memory cache instead.
+CACHE_BACKENDS = {
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', BASE_DIR / 'cache.sqlite3'),
+        'TIMEOUT': 1800,
+        'OPTIONS': {
+            'MAX_SIZE': 64 * 1024 * 1024,  # bytes, least recently used entries evicted above this
+        },
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
         'TIMEOUT': 1800,
-    }
+    },
 }
 
+# Tests clear the cache, so `manage.py test` never uses the file of a running instance
+if sys.argv[1:2] == ['test']:
+    _test_cache_dir = tempfile.TemporaryDirectory(prefix='contacts-test-cache-')
+    CACHE_BACKENDS['sqlite']['LOCATION'] = os.path.join(_test_cache_dir.name, 'cache.sqlite3')
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('DJANGO_CACHE_BACKEND', 'sqlite')],
+}
+
+# Weather upstream APIs
+WEATHER_GEOCODE_URL = 'https://nominatim.openstreetmap.org/search'
+WEATHER_FORECAST_URL = 'https://api.open-meteo.com/v1/forecast'
+WEATHER_HTTP_POOL_SIZE = 10     # keep-alive connections per host and worker
+WEATHER_HTTP_RETRIES = 2        # retries of failed connections and 429/5xx responses
+WEATHER_HTTP_BACKOFF = 0.3      # seconds, doubled on every retry
+WEATHER_FORECAST_DAYS = 3       # hourly forecast horizon stored per location
+
 # Weather API cache settings
-WEATHER_CACHE_TIMEOUT = 1800    # 30 minutes
-GEOCODE_CACHE_TIMEOUT = 86400   # 24 hours
+WEATHER_CACHE_TIMEOUT = 1800    # 30 minutes, entries older than this are refreshed
+WEATHER_CACHE_STALE_TIMEOUT = 86400  # 24 hours, stale entries served until then
+GEOCODE_CACHE_TIMEOUT = 86400   # 24 hours, in-process LRU lifetime of known cities
+GEOCODE_NOT_FOUND_TIMEOUT = 21600  # 6 hours before an unknown city is retried
+GEOCODE_LRU_SIZE = 1024         # cities kept in the per-process LRU
+
+# Batch weather endpoint limits
+WEATHER_BATCH_MAX_CITIES = 50   # cities accepted in a single request
+WEATHER_BATCH_MAX_WORKERS = 8   # concurrent upstream fetches per request, capped by WEATHER_MAX_CONCURRENT_CALLS
+
+# Single-flight coalescing of concurrent weather cache misses
+WEATHER_FETCH_LOCK_TIMEOUT = 35  # seconds a worker may hold the fetch lock
+WEATHER_FETCH_WAIT_TIMEOUT = 30  # seconds other workers wait for the result
+
+# Background refresh of stale weather entries
+WEATHER_REFRESH_WORKERS = 4      # threads per worker process
+WEATHER_REFRESH_MAX_PENDING = 100  # queued refreshes before new ones are dropped
+
+# Bulk weather warm-up (manage.py warm_weather and optional in-process scheduler)
+WEATHER_WARMUP_BATCH_SIZE = 50  # locations per Open-Meteo request
+WEATHER_WARMUP_MARGIN = 600     # refresh entries that would go stale within this many seconds
+WEATHER_WARMUP_INTERVAL = None  # seconds between scheduled warm-ups, None disables the scheduler
+
+# Circuit breaker per upstream host (Nominatim, Open-Meteo)
+WEATHER_BREAKER_FAILURE_RATE = 0.5  # failure rate that opens the circuit
+WEATHER_BREAKER_MIN_CALLS = 5       # calls needed before the rate is evaluated
+WEATHER_BREAKER_WINDOW = 20         # most recent calls taken into account
+WEATHER_BREAKER_OPEN_SECONDS = 30   # fast-fail period before a trial call
+
+# Bulkhead: upstream weather calls allowed at once in one worker process
+WEATHER_MAX_CONCURRENT_CALLS = 4
+WEATHER_BULKHEAD_TIMEOUT = 0.5  # seconds to wait for a free slot
+
+# Contact statuses (in-process registry, see contacts.statuses)
+STATUS_REGISTRY_CHECK_INTERVAL = 1  # seconds between checks for status changes made by other workers
+
+# Contact list pagination
+CONTACT_PAGE_NUMBER_MAX_ROWS = 1000  # larger result sets are paged by keyset (cursor)
+CONTACT_RESPONSE_CACHE_TIMEOUT = 300  # seconds a cached list response is kept (any write replaces it sooner); 0 disables the cache
+
+# Contact list API (api/contacts/)
+CONTACT_API_FAST_LIST = True  # serialize list rows from values() instead of ContactListSerializer
+
+# Bulk contact API (api/contacts/bulk/)
+CONTACT_BULK_MAX_ITEMS = 5000  # items accepted in one request
+
+# Contact change feed (api/contacts/changes/)
+CONTACT_CHANGES_PAGE_SIZE = 1000  # changes per response, also the largest ?limit=
+CONTACT_TOMBSTONE_RETENTION_DAYS = 30  # deletions kept for sync; older cursors must resync
+
+# Contact export (CSV / NDJSON)
+CONTACT_EXPORT_CHUNK_SIZE = 2000  # rows fetched from the database at a time
+
+# CSV import
+CONTACT_IMPORT_CHUNK_SIZE = 2000  # rows checked and inserted per transaction
+CONTACT_IMPORT_MAX_SIZE = 512 * 1024 * 1024  # bytes; None disables the limit
+CONTACT_IMPORT_MAX_REJECTIONS = 1000  # skipped rows listed per job
+CONTACT_IMPORT_VALIDATION_WORKERS = os.cpu_count() or 1  # row validation processes of `manage.py import_worker`; 1 validates inline (web process jobs always do)
+CONTACT_IMPORT_WORKERS = int(os.environ.get('CONTACT_IMPORT_WORKERS', 0))  # import threads per web process; 0 leaves jobs to `manage.py import_worker`
+CONTACT_IMPORT_POLL_INTERVAL = 2  # seconds between queue checks of `manage.py import_worker`
+CONTACT_IMPORT_STALE_AFTER = 600  # seconds without progress after which a running job is marked failed
+CONTACT_IMPORT_YIELD_TIMEOUT = 2  # seconds a chunk waits at most for interactive writes to finish